@@ -0,0 +1,107 @@
+"""
+Run N reader processes and one writer process against the same SQLite catalog.
+
+Readers repeatedly plan and read the latest version with ``read_dataset``
+while the writer appends new versions. The benchmark is run once per catalog
+profile (``legacy`` rollback journal vs. ``default`` WAL) and reports reader
+throughput, p95 read latency, writer commits and "database is locked" errors.
+
+Usage::
+
+    python benchmarks/bench_catalog_readers_writer.py --readers 8 --seconds 5
+"""
+
+from __future__ import annotations
+
+import argparse
+import multiprocessing
+import pathlib
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from typing import Dict, List, Tuple
+
+import pyarrow as pa
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1] / "src"))
+
+from data_lagoon.dataset import read_dataset, write_dataset  # noqa: E402
+
+
+def _reader(args: Tuple[str, float]) -> Tuple[List[float], int]:
+    catalog_uri, deadline = args
+    latencies: List[float] = []
+    locked = 0
+    while time.time() < deadline:
+        start = time.perf_counter()
+        try:
+            read_dataset("bench", catalog_uri=catalog_uri)
+        except sqlite3.OperationalError:
+            locked += 1
+            continue
+        latencies.append(time.perf_counter() - start)
+    return latencies, locked
+
+
+def _writer(args: Tuple[str, float]) -> Tuple[int, int]:
+    catalog_uri, deadline = args
+    commits = 0
+    locked = 0
+    table = pa.table({"value": list(range(1000))})
+    while time.time() < deadline:
+        try:
+            write_dataset("bench", table, catalog_uri=catalog_uri)
+        except sqlite3.OperationalError:
+            locked += 1
+            continue
+        commits += 1
+    return commits, locked
+
+
+def _run(profile: str, readers: int, seconds: float) -> Dict[str, float]:
+    with tempfile.TemporaryDirectory() as tmp:
+        root = pathlib.Path(tmp)
+        catalog_uri = f"sqlite:///{root / 'catalog.db'}?profile={profile}"
+        write_dataset(
+            "bench",
+            pa.table({"value": list(range(1000))}),
+            catalog_uri=catalog_uri,
+            base_uri=str(root / "bench"),
+        )
+
+        deadline = time.time() + seconds
+        with multiprocessing.Pool(readers + 1) as pool:
+            writer = pool.apply_async(_writer, ((catalog_uri, deadline),))
+            reader_results = pool.map(_reader, [(catalog_uri, deadline)] * readers)
+            commits, writer_locked = writer.get()
+
+    latencies = [latency for result, _ in reader_results for latency in result]
+    reads = len(latencies)
+    p95 = statistics.quantiles(latencies, n=20)[-1] if len(latencies) >= 20 else float("nan")
+    return {
+        "reads/s": reads / seconds,
+        "p95 read ms": p95 * 1000,
+        "commits/s": commits / seconds,
+        "reader locked": sum(locked for _, locked in reader_results),
+        "writer locked": writer_locked,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--readers", type=int, default=4)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--profiles", nargs="+", default=["legacy", "default"])
+    args = parser.parse_args()
+
+    print(f"readers={args.readers} seconds={args.seconds}")
+    for profile in args.profiles:
+        metrics = _run(profile, args.readers, args.seconds)
+        summary = "  ".join(f"{key}={value:.1f}" for key, value in metrics.items())
+        print(f"{profile:<8} {summary}")
+
+
+if __name__ == "__main__":
+    main()
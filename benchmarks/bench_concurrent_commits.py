@@ -0,0 +1,88 @@
+"""
+Measure commit throughput with several processes appending to one dataset.
+
+Every worker performs ``--commits`` small appends against a shared catalog
+(a temporary SQLite file unless ``--catalog-uri`` is given); conflicts are
+resolved by the optimistic retry loop in ``write_dataset``. Reports commits
+per second and how many commits needed a retry.
+
+Usage::
+
+    python benchmarks/bench_concurrent_commits.py --workers 8 --commits 25
+    python benchmarks/bench_concurrent_commits.py \
+        --catalog-uri postgresql://postgres@localhost:5432/postgres
+"""
+
+from __future__ import annotations
+
+import argparse
+import multiprocessing
+import pathlib
+import sys
+import tempfile
+import time
+from typing import Tuple
+
+import pyarrow as pa
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1] / "src"))
+
+from data_lagoon.catalog import connect_catalog  # noqa: E402
+from data_lagoon.dataset import write_dataset  # noqa: E402
+
+
+def _worker(args: Tuple[str, str, int, int]) -> Tuple[int, int]:
+    catalog_uri, name, worker_id, commits = args
+    retried = 0
+    for i in range(commits):
+        table = pa.table({"worker": [worker_id], "seq": [i]})
+        result = write_dataset(name, table, catalog_uri=catalog_uri, max_commit_retries=100)
+        if f"/v{result.version}/" not in result.files[0]:
+            retried += 1
+    return commits, retried
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--commits", type=int, default=25)
+    parser.add_argument("--catalog-uri", default=None)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        root = pathlib.Path(tmp)
+        catalog_uri = args.catalog_uri or f"sqlite:///{root / 'catalog.db'}"
+        name = f"bench-{root.name}"
+        write_dataset(
+            name,
+            pa.table({"worker": [-1], "seq": [-1]}),
+            catalog_uri=catalog_uri,
+            base_uri=str(root / "bench"),
+        )
+
+        start = time.perf_counter()
+        with multiprocessing.Pool(args.workers) as pool:
+            results = pool.map(
+                _worker,
+                [(catalog_uri, name, worker, args.commits) for worker in range(args.workers)],
+            )
+        elapsed = time.perf_counter() - start
+
+        total = sum(count for count, _ in results)
+        retried = sum(count for _, count in results)
+        catalog = connect_catalog(catalog_uri)
+        try:
+            dataset = catalog.resolve_dataset(name)
+            versions = len(catalog.list_transactions_since(dataset.id, 0))
+        finally:
+            catalog.close()
+
+    print(f"workers={args.workers} commits/worker={args.commits}")
+    print(f"committed versions : {versions - 1} (expected {total})")
+    print(f"retried commits    : {retried}")
+    print(f"elapsed            : {elapsed:.2f} s")
+    print(f"commits per second : {total / elapsed:.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+Compare the engine integration helpers against ``read_dataset(...).to_pandas()``.
+
+Each case runs a selective filter plus a single-column aggregate so that
+predicate and projection pushdown have something to skip.
+
+Usage::
+
+    python benchmarks/bench_engine_integrations.py --rows 2000000 --repeat 3
+"""
+
+from __future__ import annotations
+
+import argparse
+import pathlib
+import statistics
+import sys
+import tempfile
+import time
+from typing import Callable, Dict
+
+import pyarrow as pa
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1] / "src"))
+
+from data_lagoon.dataset import read_dataset, write_dataset  # noqa: E402
+from data_lagoon.integrations import (  # noqa: E402
+    datafusion,
+    duckdb,
+    pl,
+    scan_polars,
+    to_datafusion,
+    to_duckdb,
+)
+
+
+def _build_dataset(root: pathlib.Path, rows: int, days: int) -> str:
+    catalog_uri = f"sqlite:///{root / 'catalog.db'}"
+    table = pa.table(
+        {
+            "day": pa.array([f"2024-01-{(i % days) + 1:02d}" for i in range(rows)]),
+            "id": pa.array(range(rows), type=pa.int64()),
+            "amount": pa.array([float(i % 1000) for i in range(rows)]),
+        }
+    )
+    write_dataset(
+        "bench",
+        table,
+        catalog_uri=catalog_uri,
+        base_uri=str(root / "bench"),
+        partition_by=["day"],
+    )
+    return catalog_uri
+
+
+def _time(fn: Callable[[], object], repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--days", type=int, default=28)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        catalog_uri = _build_dataset(pathlib.Path(tmp), args.rows, args.days)
+        threshold = args.rows // 2
+
+        cases: Dict[str, Callable[[], object]] = {
+            "read_dataset().to_pandas()": lambda: (
+                lambda df: df[(df["day"] == "2024-01-03") & (df["id"] > threshold)][
+                    "amount"
+                ].sum()
+            )(read_dataset("bench", catalog_uri=catalog_uri).to_pandas()),
+        }
+        if duckdb is not None:
+            cases["to_duckdb"] = lambda: to_duckdb("bench", catalog_uri=catalog_uri).filter(
+                f"day = '2024-01-03' AND id > {threshold}"
+            ).aggregate("sum(amount)").fetchall()
+        if pl is not None:
+            cases["scan_polars"] = lambda: (
+                scan_polars("bench", catalog_uri=catalog_uri)
+                .filter((pl.col("day") == "2024-01-03") & (pl.col("id") > threshold))
+                .select(pl.col("amount").sum())
+                .collect()
+            )
+        if datafusion is not None:
+            cases["to_datafusion"] = lambda: (
+                to_datafusion("bench", catalog_uri=catalog_uri)
+                .filter(
+                    (datafusion.col("day") == datafusion.lit("2024-01-03"))
+                    & (datafusion.col("id") > datafusion.lit(threshold))
+                )
+                .aggregate([], [datafusion.functions.sum(datafusion.col("amount"))])
+                .to_arrow_table()
+            )
+
+        print(f"rows={args.rows} days={args.days} repeat={args.repeat}")
+        for name, fn in cases.items():
+            print(f"{name:<30} {_time(fn, args.repeat) * 1000:10.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""
+Measure read-planning latency on a catalog with many historical versions,
+before and after ``expire_snapshots``.
+
+The catalog is populated directly (no Parquet files are written) with
+``--versions`` commits of ``--files`` files each, one row group and one
+partition per file. Planning is what ``read_dataset`` does before touching
+storage: resolve the snapshot and load partitions/row-group statistics.
+
+Usage::
+
+    python benchmarks/bench_expire_snapshots.py --versions 100000 --keep-last 10
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import pathlib
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1] / "src"))
+
+from data_lagoon.catalog import connect_catalog  # noqa: E402
+from data_lagoon.dataset import (  # noqa: E402
+    _open_snapshot,
+    _prune_files_and_row_groups,
+)
+from data_lagoon.maintenance import expire_snapshots  # noqa: E402
+
+
+def _populate(db_path: pathlib.Path, base_uri: str, versions: int, files: int) -> None:
+    catalog = connect_catalog(f"sqlite:///{db_path}")
+    try:
+        dataset = catalog.register_dataset("bench", base_uri)
+    finally:
+        catalog.close()
+
+    stats = json.dumps({"value": 0})
+    conn = sqlite3.connect(db_path)
+    with conn:
+        conn.executemany(
+            "INSERT INTO transactions (dataset_id, version, operation) VALUES (?, ?, 'append')",
+            ((dataset.id, version) for version in range(1, versions + 1)),
+        )
+        conn.executemany(
+            """
+            INSERT INTO files (id, dataset_id, version, file_path, file_size_bytes, row_count)
+            VALUES (?, ?, ?, ?, 1024, 100)
+            """,
+            (
+                (file_id, dataset.id, file_id // files + 1, f"{base_uri}/f{file_id}.parquet")
+                for file_id in range(versions * files)
+            ),
+        )
+        conn.executemany(
+            """
+            INSERT INTO row_groups (file_id, row_group_index, stats_min_json, stats_max_json,
+                                    null_counts_json, row_count)
+            VALUES (?, 0, ?, ?, '{}', 100)
+            """,
+            ((file_id, stats, stats) for file_id in range(versions * files)),
+        )
+        conn.executemany(
+            "INSERT INTO partitions (file_id, key, value) VALUES (?, 'day', 'a')",
+            ((file_id,) for file_id in range(versions * files)),
+        )
+        conn.execute("UPDATE datasets SET current_version = ? WHERE id = ?", (versions, dataset.id))
+    conn.close()
+
+
+def _plan_latency(catalog_uri: str, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        snapshot = _open_snapshot("bench", catalog_uri=catalog_uri, version=None)
+        _prune_files_and_row_groups(
+            catalog_uri=catalog_uri,
+            dataset_id=snapshot.dataset.id,
+            version=snapshot.version,
+            file_records=snapshot.file_records,
+            predicates=[],
+        )
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--versions", type=int, default=100_000)
+    parser.add_argument("--files", type=int, default=4)
+    parser.add_argument("--keep-last", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = pathlib.Path(tmp) / "catalog.db"
+        catalog_uri = f"sqlite:///{db_path}"
+        start = time.perf_counter()
+        _populate(db_path, f"{tmp}/bench", args.versions, args.files)
+        print(f"versions={args.versions} files/version={args.files} "
+              f"(populated in {time.perf_counter() - start:.1f} s)")
+
+        before = _plan_latency(catalog_uri, args.repeat)
+        size_before = os.path.getsize(db_path)
+
+        start = time.perf_counter()
+        result = expire_snapshots("bench", catalog_uri=catalog_uri, keep_last=args.keep_last)
+        expire_seconds = time.perf_counter() - start
+
+        after = _plan_latency(catalog_uri, args.repeat)
+        size_after = os.path.getsize(db_path)
+
+    print(f"expired versions   : {result.versions_expired} in {expire_seconds:.1f} s "
+          f"({result.files_tombstoned} files tombstoned)")
+    print(f"planning latency   : {before * 1000:8.2f} ms -> {after * 1000:8.2f} ms")
+    print(f"catalog size       : {size_before / 2**20:8.1f} MiB -> {size_after / 2**20:8.1f} MiB")
+
+
+if __name__ == "__main__":
+    main()
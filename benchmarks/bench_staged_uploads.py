@@ -0,0 +1,172 @@
+"""
+Compare partitioned writes straight to an object store with staged writes
+(local Parquet files uploaded in parallel, ``StagingOptions``).
+
+By default the target is an in-process object-store stand-in that charges
+every uploaded part a round trip (``--latency-ms``) plus transfer time at
+``--bandwidth-mbps`` per stream, like S3 multipart uploads. Pass
+``--base-uri`` (and ``--storage-option key=value``) to write to a real
+store instead.
+
+Usage::
+
+    python benchmarks/bench_staged_uploads.py --rows 2000000 --partitions 64
+    python benchmarks/bench_staged_uploads.py --base-uri s3://bucket/bench \
+        --storage-option endpoint_url=http://localhost:9000
+"""
+
+from __future__ import annotations
+
+import argparse
+import pathlib
+import statistics
+import sys
+import tempfile
+import time
+import uuid
+from typing import Any, Dict, List, Optional
+
+import fsspec
+import pyarrow as pa
+from fsspec.implementations.memory import MemoryFileSystem
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1] / "src"))
+
+from data_lagoon.dataset import write_dataset  # noqa: E402
+from data_lagoon.storage import StagingOptions  # noqa: E402
+
+DEFAULT_PART_SIZE = 5 * 1024 * 1024
+
+
+class LatencyObjectStore(MemoryFileSystem):
+    """
+    Memory filesystem whose uploads cost per-part latency and bandwidth.
+
+    Like s3fs, a part is uploaded (blocking the writing thread) each time
+    the write buffer fills ``block_size`` and once more on close.
+    """
+
+    protocol = "benchstore"
+    store: Dict[str, Any] = {}
+    pseudo_dirs = [""]
+    latency = 0.02
+    bandwidth = 50 * 1024 * 1024
+
+    def _open(
+        self,
+        path: str,
+        mode: str = "rb",
+        block_size: Optional[int] = None,
+        autocommit: bool = True,
+        cache_options: Any = None,
+        **kwargs: Any,
+    ) -> Any:
+        handle = super()._open(path, mode, block_size, autocommit, cache_options, **kwargs)
+        if "w" not in mode:
+            return handle
+        part_size = block_size or DEFAULT_PART_SIZE
+        write, commit = handle.write, handle.close
+        uploaded = [0]
+
+        def upload(nbytes: int) -> None:
+            time.sleep(self.latency + nbytes / self.bandwidth)
+            uploaded[0] += nbytes
+
+        def write_part(data: Any) -> int:
+            written = write(data)
+            while handle.getbuffer().nbytes - uploaded[0] >= part_size:
+                upload(part_size)
+            return written
+
+        def close() -> None:
+            if not handle.closed:
+                size = handle.getbuffer().nbytes
+                if uploaded[0]:
+                    # Initiating and completing the multipart upload.
+                    time.sleep(2 * self.latency)
+                upload(size - uploaded[0])
+            commit()
+
+        handle.write = write_part
+        handle.close = close
+        return handle
+
+
+def _table(rows: int, partitions: int) -> pa.Table:
+    return pa.table(
+        {
+            "bucket": pa.array([f"p{i % partitions:04d}" for i in range(rows)]),
+            "id": pa.array(range(rows), type=pa.int64()),
+            "amount": pa.array([float(i % 1000) for i in range(rows)]),
+            "note": pa.array([f"row-{i}" for i in range(rows)]),
+        }
+    )
+
+
+def _write(
+    table: pa.Table,
+    catalog_uri: str,
+    base_uri: str,
+    storage_options: Optional[Dict[str, Any]],
+    staging: Optional[StagingOptions],
+) -> float:
+    name = f"bench_{uuid.uuid4().hex[:8]}"
+    start = time.perf_counter()
+    write_dataset(
+        name,
+        table,
+        catalog_uri=catalog_uri,
+        base_uri=f"{base_uri.rstrip('/')}/{name}",
+        partition_by=["bucket"],
+        storage_options=storage_options,
+        staging=staging,
+    )
+    return time.perf_counter() - start
+
+
+def _parse_options(pairs: List[str]) -> Optional[Dict[str, Any]]:
+    options: Dict[str, Any] = {}
+    for pair in pairs:
+        key, _, value = pair.partition("=")
+        options[key] = value
+    return options or None
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--partitions", type=int, default=32)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--workers", type=int, default=16)
+    parser.add_argument("--chunk-mb", type=int, default=64)
+    parser.add_argument("--latency-ms", type=float, default=20.0)
+    parser.add_argument("--bandwidth-mbps", type=float, default=50.0)
+    parser.add_argument("--base-uri", default=None)
+    parser.add_argument("--storage-option", action="append", default=[])
+    args = parser.parse_args()
+
+    LatencyObjectStore.latency = args.latency_ms / 1000
+    LatencyObjectStore.bandwidth = args.bandwidth_mbps * 1024 * 1024
+    fsspec.register_implementation("benchstore", LatencyObjectStore, clobber=True)
+    base_uri = args.base_uri or "benchstore://bench"
+    storage_options = _parse_options(args.storage_option)
+
+    table = _table(args.rows, args.partitions)
+    staging = StagingOptions(max_workers=args.workers, chunk_size=args.chunk_mb * 1024 * 1024)
+    with tempfile.TemporaryDirectory() as tmp:
+        catalog_uri = f"sqlite:///{pathlib.Path(tmp) / 'catalog.db'}"
+        cases = {"direct": None, "staged": staging}
+        print(
+            f"rows={args.rows} partitions={args.partitions} repeat={args.repeat} "
+            f"target={base_uri}"
+        )
+        for label, options in cases.items():
+            samples = [
+                _write(table, catalog_uri, base_uri, storage_options, options)
+                for _ in range(args.repeat)
+            ]
+            print(f"{label:<8} {statistics.median(samples) * 1000:10.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+Compare the Parquet write profiles (``WRITE_PROFILES``) on the same table:
+bytes on disk, write time, full-scan time and the time of a selective read
+that the catalog can prune to a few row groups.
+
+Usage::
+
+    python benchmarks/bench_write_profiles.py --rows 2000000 --repeat 5
+    python benchmarks/bench_write_profiles.py --profiles balanced small-scan
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import pathlib
+import statistics
+import sys
+import tempfile
+import time
+from typing import Callable, List
+
+import pyarrow as pa
+import pyarrow.compute as pc
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1] / "src"))
+
+from data_lagoon.dataset import WRITE_PROFILES, read_dataset, write_dataset  # noqa: E402
+
+
+def _table(rows: int) -> pa.Table:
+    ids = pa.array(range(rows), type=pa.int64())
+    return pa.table(
+        {
+            "id": ids,
+            "epoch_ms": pc.add(pc.multiply(ids, 250), 1_700_000_000_000),
+            "price": pa.array([round((i * 7919 % 100_000) / 100, 2) for i in range(rows)]),
+            "ratio": pa.array([(i % 997) / 997 for i in range(rows)]),
+            "category": pa.array([f"cat-{i % 50:02d}" for i in range(rows)]),
+            "note": pa.array([f"order {i % 20_000} shipped" for i in range(rows)]),
+        }
+    )
+
+
+def _median_ms(func: Callable[[], object], repeat: int) -> float:
+    samples: List[float] = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples) * 1000
+
+
+def _size(path: str) -> int:
+    return sum(
+        os.path.getsize(os.path.join(root, name))
+        for root, _, names in os.walk(path)
+        for name in names
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--profiles", nargs="+", default=list(WRITE_PROFILES))
+    args = parser.parse_args()
+
+    table = _table(args.rows)
+    # About 1% of the ids; ``id`` increases, so row-group statistics prune.
+    low = args.rows // 2
+    selective = [("id", ">=", low), ("id", "<", low + max(args.rows // 100, 1))]
+    with tempfile.TemporaryDirectory() as tmp:
+        catalog_uri = f"sqlite:///{pathlib.Path(tmp) / 'catalog.db'}"
+        print(f"rows={args.rows} repeat={args.repeat}")
+        print(
+            f"{'profile':<12} {'size MB':>9} {'write ms':>10} {'scan ms':>9} {'selective ms':>13}"
+        )
+        for name in args.profiles:
+            runs = iter(range(args.repeat))
+
+            def write() -> None:
+                run = next(runs)
+                write_dataset(
+                    f"{name}_{run}",
+                    table,
+                    catalog_uri=catalog_uri,
+                    base_uri=os.path.join(tmp, name, str(run)),
+                    write_profile=name,
+                )
+
+            write_ms = _median_ms(write, args.repeat)
+            dataset = f"{name}_0"
+            scan_ms = _median_ms(
+                lambda: read_dataset(dataset, catalog_uri=catalog_uri), args.repeat
+            )
+            selective_ms = _median_ms(
+                lambda: read_dataset(dataset, catalog_uri=catalog_uri, predicates=selective),
+                args.repeat,
+            )
+            size_mb = _size(os.path.join(tmp, name, "0")) / 1e6
+            print(
+                f"{name:<12} {size_mb:9.1f} {write_ms:10.1f} {scan_ms:9.1f} {selective_ms:13.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -2,8 +2,21 @@
 Public package interface for data_lagoon.
 """
 
+from .aio import (
+    AsyncCatalog,
+    connect_catalog_async,
+    head_async,
+    list_versions_async,
+    read_changes_async,
+    read_dataset_async,
+    set_async_executor,
+    write_dataset_async,
+)
+from .appender import Appender
+from .batch import BatchWrite, write_batch
 from .catalog import (
     CatalogError,
+    CommitConflictError,
     DatasetConflictError,
     DatasetIdentity,
     DatasetNotFoundError,
@@ -12,11 +25,38 @@ from .catalog import (
     connect_catalog,
     looks_like_uri,
 )
-from .dataset import DatasetError, WriteResult, read_dataset, write_dataset
+from .dataset import (
+    WRITE_PROFILES,
+    DatasetError,
+    ParquetWriteProfile,
+    VersionInfo,
+    WriteResult,
+    head,
+    list_versions,
+    read_changes,
+    read_dataset,
+    sample,
+    set_write_profile,
+    write_dataset,
+)
+from .integrations import scan_polars, to_datafusion, to_duckdb
+from .maintenance import (
+    CompactionResult,
+    ExpireSnapshotsResult,
+    RecoveryResult,
+    VacuumResult,
+    compact_dataset,
+    expire_snapshots,
+    recover,
+    vacuum,
+)
+from .mutations import MutationResult, delete_rows, merge_dataset, update_rows
 from .schema_manager import SchemaMismatchError
+from .storage import StagingOptions
 
 __all__ = [
     "CatalogError",
+    "CommitConflictError",
     "DatasetConflictError",
     "DatasetIdentity",
     "DatasetNotFoundError",
@@ -28,7 +68,42 @@ __all__ = [
     "SchemaMismatchError",
     "WriteResult",
     "write_dataset",
+    "StagingOptions",
+    "ParquetWriteProfile",
+    "WRITE_PROFILES",
+    "set_write_profile",
     "read_dataset",
+    "read_changes",
+    "VersionInfo",
+    "list_versions",
+    "head",
+    "sample",
+    "to_duckdb",
+    "scan_polars",
+    "to_datafusion",
+    "CompactionResult",
+    "compact_dataset",
+    "VacuumResult",
+    "vacuum",
+    "ExpireSnapshotsResult",
+    "expire_snapshots",
+    "RecoveryResult",
+    "recover",
+    "MutationResult",
+    "delete_rows",
+    "merge_dataset",
+    "update_rows",
+    "Appender",
+    "BatchWrite",
+    "write_batch",
+    "read_dataset_async",
+    "write_dataset_async",
+    "head_async",
+    "read_changes_async",
+    "list_versions_async",
+    "AsyncCatalog",
+    "connect_catalog_async",
+    "set_async_executor",
 ]
 
 
@@ -0,0 +1,163 @@
+"""
+asyncio entry points.
+
+The catalog drivers and Arrow's scanner are blocking, so the coroutines
+here run them on a dedicated thread pool and the event loop never waits
+on catalog queries or storage I/O. Both release the GIL while they wait,
+which lets one process serve many concurrent requests. ``AsyncCatalog``
+gives each catalog connection its own thread because SQLite and DuckDB
+connections must not be shared between threads.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import functools
+import os
+import threading
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+from .catalog import DatasetRef, SqlCatalog, connect_catalog
+from .dataset import head, list_versions, read_changes, read_dataset, write_dataset
+
+__all__ = [
+    "AsyncCatalog",
+    "connect_catalog_async",
+    "head_async",
+    "list_versions_async",
+    "read_changes_async",
+    "read_dataset_async",
+    "set_async_executor",
+    "write_dataset_async",
+]
+
+DEFAULT_MAX_WORKERS = min(32, (os.cpu_count() or 1) + 4)
+
+_executor: Optional[Executor] = None
+_executor_lock = threading.Lock()
+
+
+def set_async_executor(executor: Optional[Executor]) -> None:
+    """
+    Use ``executor`` for the blocking work of the ``*_async`` functions.
+
+    ``None`` restores the default pool of ``DEFAULT_MAX_WORKERS`` threads,
+    created on first use. The caller owns executors passed in here.
+    """
+
+    global _executor
+    with _executor_lock:
+        _executor = executor
+
+
+def _get_executor() -> Executor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=DEFAULT_MAX_WORKERS, thread_name_prefix="data-lagoon-io"
+            )
+        return _executor
+
+
+async def _run(executor: Executor, func: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(executor, functools.partial(func, *args, **kwargs))
+
+
+async def read_dataset_async(ref_or_name: DatasetRef | str, **kwargs: Any) -> Any:
+    """Awaitable ``read_dataset``; accepts the same keyword arguments."""
+
+    return await _run(_get_executor(), read_dataset, ref_or_name, **kwargs)
+
+
+async def head_async(ref_or_name: DatasetRef | str, n: int = 10, **kwargs: Any) -> Any:
+    """Awaitable ``head``; accepts the same keyword arguments."""
+
+    return await _run(_get_executor(), head, ref_or_name, n, **kwargs)
+
+
+async def read_changes_async(
+    ref_or_name: DatasetRef | str,
+    start_version: int,
+    end_version: Optional[int] = None,
+    **kwargs: Any,
+) -> Any:
+    """Awaitable ``read_changes``; accepts the same keyword arguments."""
+
+    return await _run(
+        _get_executor(), read_changes, ref_or_name, start_version, end_version, **kwargs
+    )
+
+
+async def list_versions_async(ref_or_name: DatasetRef | str, **kwargs: Any) -> Any:
+    """Awaitable ``list_versions``; accepts the same keyword arguments."""
+
+    return await _run(_get_executor(), list_versions, ref_or_name, **kwargs)
+
+
+async def write_dataset_async(ref_or_name: DatasetRef | str, data: Any, **kwargs: Any) -> Any:
+    """Awaitable ``write_dataset``; accepts the same keyword arguments."""
+
+    return await _run(_get_executor(), write_dataset, ref_or_name, data, **kwargs)
+
+
+class AsyncCatalog:
+    """
+    A ``SqlCatalog`` whose public methods return awaitables.
+
+    Every call runs on a single thread owned by this object, which is also
+    the thread that opened the connection. Use ``connect_catalog_async`` to
+    create one, and ``await catalog.close()`` (or ``async with``) to release
+    the connection and the thread.
+    """
+
+    def __init__(self, catalog: SqlCatalog, executor: ThreadPoolExecutor) -> None:
+        self._catalog = catalog
+        self._executor = executor
+
+    @property
+    def backend(self) -> str:
+        return self._catalog.backend
+
+    @property
+    def read_only(self) -> bool:
+        return self._catalog.read_only
+
+    def __getattr__(self, name: str) -> Callable[..., Any]:
+        if name.startswith("_"):
+            raise AttributeError(name)
+        method = getattr(self._catalog, name)
+        if not callable(method):
+            raise AttributeError(name)
+
+        @functools.wraps(method)
+        async def call(*args: Any, **kwargs: Any) -> Any:
+            return await _run(self._executor, method, *args, **kwargs)
+
+        return call
+
+    async def close(self) -> None:
+        try:
+            await _run(self._executor, self._catalog.close)
+        finally:
+            self._executor.shutdown(wait=False)
+
+    async def __aenter__(self) -> "AsyncCatalog":
+        return self
+
+    async def __aexit__(self, exc_type: Any, exc: Any, tb: Any) -> None:
+        await self.close()
+
+
+async def connect_catalog_async(uri: str, *, read_only: bool = False) -> AsyncCatalog:
+    """Open a catalog like ``connect_catalog`` and wrap it as an ``AsyncCatalog``."""
+
+    executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="data-lagoon-catalog")
+    try:
+        catalog = await _run(executor, connect_catalog, uri, read_only=read_only)
+    except BaseException:
+        executor.shutdown(wait=False)
+        raise
+    return AsyncCatalog(catalog, executor)
@@ -0,0 +1,311 @@
+"""
+Buffered micro-batch appends for streaming ingestion.
+
+An ``Appender`` collects small batches and writes them with one
+``write_dataset`` call per flush, so a high-rate producer yields a few
+well-sized files and one catalog transaction per flush instead of one per
+batch. Buffered data lives in memory and, past ``memory_limit_bytes``, in
+Arrow IPC spill files on local disk.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import tempfile
+import threading
+import time
+from typing import Any, Dict, List, Optional, Sequence
+
+import pyarrow as pa
+import pyarrow.ipc as ipc
+
+from .catalog import DatasetRef
+from .dataset import (
+    DatasetError,
+    WriteProfileInput,
+    WriteResult,
+    _normalize_to_table,
+    write_dataset,
+)
+from .storage import StagingOptions
+
+__all__ = ["Appender", "DEFAULT_FLUSH_BYTES"]
+
+DEFAULT_FLUSH_BYTES = 128 * 1024 * 1024
+
+
+class Appender:
+    """
+    Buffer batches for a dataset and commit them as one version per flush.
+
+    A flush happens when the buffer reaches ``max_rows`` or ``max_bytes``
+    (in-memory Arrow size), when the oldest buffered batch is older than
+    ``flush_interval`` seconds (checked by a background thread, so an idle
+    stream is still flushed), or on ``flush()``/``close()``. Each flush is a
+    single ``write_dataset`` call and therefore commits exactly like it.
+
+    The appender is thread-safe; asyncio producers use the ``*_async``
+    methods, which run flushes in a worker thread instead of blocking the
+    event loop. Errors from background flushes are raised by the next call.
+    """
+
+    def __init__(
+        self,
+        ref_or_name: DatasetRef | str,
+        *,
+        catalog_uri: str = "sqlite:///:memory:",
+        base_uri: Optional[str] = None,
+        partition_by: Optional[Sequence[str]] = None,
+        schema_merge: bool = True,
+        promote_to_string: bool = False,
+        max_commit_retries: int = 5,
+        max_rows: Optional[int] = None,
+        max_bytes: Optional[int] = DEFAULT_FLUSH_BYTES,
+        flush_interval: Optional[float] = None,
+        memory_limit_bytes: Optional[int] = None,
+        spill_dir: Optional[str] = None,
+        storage_options: Optional[Dict[str, Any]] = None,
+        staging: Optional[StagingOptions] = None,
+        write_profile: Optional[WriteProfileInput] = None,
+    ) -> None:
+        if max_rows is None and max_bytes is None and flush_interval is None:
+            raise DatasetError(
+                "Appender requires at least one of max_rows, max_bytes or flush_interval"
+            )
+        self._ref = ref_or_name
+        self._write_options = {
+            "catalog_uri": catalog_uri,
+            "base_uri": base_uri,
+            "partition_by": partition_by,
+            "schema_merge": schema_merge,
+            "promote_to_string": promote_to_string,
+            "max_commit_retries": max_commit_retries,
+            "storage_options": storage_options,
+            "staging": staging,
+            "write_profile": write_profile,
+        }
+        self._max_rows = max_rows
+        self._max_bytes = max_bytes
+        self._flush_interval = flush_interval
+        self._memory_limit = memory_limit_bytes
+        self._spill_dir = spill_dir
+
+        self._lock = threading.Condition()
+        self._flush_lock = threading.Lock()
+        self._tables: List[pa.Table] = []
+        self._memory_bytes = 0
+        self._spill_files: List[str] = []
+        self._spill_writer: Optional[ipc.RecordBatchStreamWriter] = None
+        self._spill_sink: Any = None
+        self._spill_schema: Optional[pa.Schema] = None
+        self._rows = 0
+        self._bytes = 0
+        self._first_buffered_at: Optional[float] = None
+        self._error: Optional[BaseException] = None
+        self._closed = False
+
+        self._timer: Optional[threading.Thread] = None
+        if flush_interval is not None:
+            self._timer = threading.Thread(
+                target=self._flush_periodically, name="data-lagoon-appender", daemon=True
+            )
+            self._timer.start()
+
+    @property
+    def buffered_rows(self) -> int:
+        return self._rows
+
+    @property
+    def buffered_bytes(self) -> int:
+        return self._bytes
+
+    def append(self, data: Any) -> Optional[WriteResult]:
+        """Buffer ``data``; returns the flush result if this append triggered one."""
+
+        return self._flush(only_if_due=True) if self._add(data) else None
+
+    def flush(self) -> Optional[WriteResult]:
+        """Write everything buffered so far as one version (``None`` if empty)."""
+
+        return self._flush(only_if_due=False)
+
+    def _flush(self, *, only_if_due: bool) -> Optional[WriteResult]:
+        with self._flush_lock:
+            with self._lock:
+                self._raise_pending_error()
+                # Appends that crossed a threshold while another flush was
+                # running must not commit the few rows buffered since.
+                if only_if_due and not self._thresholds_reached():
+                    return None
+                table = self._drain()
+            if table is None:
+                return None
+            try:
+                return write_dataset(self._ref, table, **self._write_options)
+            except BaseException:
+                # Keep the rows so a later flush can retry them.
+                with self._lock:
+                    self._restore(table)
+                raise
+
+    def close(self) -> Optional[WriteResult]:
+        """Flush the remaining buffer and stop the background timer."""
+
+        with self._lock:
+            if self._closed:
+                return None
+            self._closed = True
+            self._lock.notify_all()
+        if self._timer is not None:
+            self._timer.join()
+        try:
+            return self.flush()
+        finally:
+            self._discard_spill_files()
+
+    async def append_async(self, data: Any) -> Optional[WriteResult]:
+        if not self._add(data):
+            return None
+        return await asyncio.to_thread(self._flush, only_if_due=True)
+
+    async def flush_async(self) -> Optional[WriteResult]:
+        return await asyncio.to_thread(self.flush)
+
+    async def close_async(self) -> Optional[WriteResult]:
+        return await asyncio.to_thread(self.close)
+
+    def __enter__(self) -> "Appender":
+        return self
+
+    def __exit__(self, exc_type: Any, exc: Any, tb: Any) -> None:
+        self.close()
+
+    async def __aenter__(self) -> "Appender":
+        return self
+
+    async def __aexit__(self, exc_type: Any, exc: Any, tb: Any) -> None:
+        await self.close_async()
+
+    def _add(self, data: Any) -> bool:
+        """Buffer ``data`` and report whether a flush threshold was reached."""
+
+        table = _normalize_to_table(data)
+        with self._lock:
+            self._raise_pending_error()
+            if self._closed:
+                raise DatasetError("Appender is closed")
+            if table.num_rows:
+                self._buffer(table)
+            return self._thresholds_reached()
+
+    # Buffering (callers hold ``self._lock``)
+
+    def _buffer(self, table: pa.Table) -> None:
+        if self._first_buffered_at is None:
+            self._first_buffered_at = time.monotonic()
+            self._lock.notify_all()
+        self._rows += table.num_rows
+        self._bytes += table.nbytes
+        memory_bytes = self._memory_bytes + table.nbytes
+        # Once spilling has started every later batch follows it to disk, so
+        # a flush reads memory, then spill files, in arrival order.
+        if self._spill_files or (
+            self._memory_limit is not None and memory_bytes > self._memory_limit
+        ):
+            self._spill(table)
+        else:
+            self._tables.append(table)
+            self._memory_bytes = memory_bytes
+
+    def _restore(self, table: pa.Table) -> None:
+        self._tables.insert(0, table)
+        self._memory_bytes += table.nbytes
+        self._rows += table.num_rows
+        self._bytes += table.nbytes
+        self._first_buffered_at = self._first_buffered_at or time.monotonic()
+
+    def _spill(self, table: pa.Table) -> None:
+        if self._spill_writer is not None and not self._spill_schema.equals(table.schema):
+            self._close_spill_writer()
+        if self._spill_writer is None:
+            fd, path = tempfile.mkstemp(prefix="appender-", suffix=".arrows", dir=self._spill_dir)
+            self._spill_sink = pa.OSFile(path, "wb")
+            os.close(fd)
+            self._spill_writer = ipc.new_stream(self._spill_sink, table.schema)
+            self._spill_schema = table.schema
+            self._spill_files.append(path)
+        self._spill_writer.write_table(table)
+
+    def _close_spill_writer(self) -> None:
+        if self._spill_writer is not None:
+            self._spill_writer.close()
+            self._spill_sink.close()
+            self._spill_writer = None
+            self._spill_sink = None
+
+    def _thresholds_reached(self) -> bool:
+        if not self._rows:
+            return False
+        if self._max_rows is not None and self._rows >= self._max_rows:
+            return True
+        if self._max_bytes is not None and self._bytes >= self._max_bytes:
+            return True
+        return self._interval_elapsed()
+
+    def _interval_elapsed(self) -> bool:
+        return (
+            self._flush_interval is not None
+            and self._first_buffered_at is not None
+            and time.monotonic() - self._first_buffered_at >= self._flush_interval
+        )
+
+    def _drain(self) -> Optional[pa.Table]:
+        if not self._rows:
+            return None
+        self._close_spill_writer()
+        tables = list(self._tables)
+        for path in self._spill_files:
+            with pa.OSFile(path) as source:
+                tables.append(ipc.open_stream(source).read_all())
+        self._discard_spill_files()
+        self._tables = []
+        self._memory_bytes = 0
+        self._rows = 0
+        self._bytes = 0
+        self._first_buffered_at = None
+        return pa.concat_tables(tables, promote_options="default")
+
+    def _discard_spill_files(self) -> None:
+        self._close_spill_writer()
+        for path in self._spill_files:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+        self._spill_files = []
+
+    def _raise_pending_error(self) -> None:
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise error
+
+    def _flush_periodically(self) -> None:
+        assert self._flush_interval is not None
+        while True:
+            with self._lock:
+                if self._closed:
+                    return
+                if self._first_buffered_at is None:
+                    timeout = self._flush_interval
+                else:
+                    elapsed = time.monotonic() - self._first_buffered_at
+                    timeout = max(self._flush_interval - elapsed, 0.0)
+                self._lock.wait(timeout)
+                if self._closed or not self._interval_elapsed():
+                    continue
+            try:
+                self._flush(only_if_due=True)
+            except BaseException as exc:  # surfaced on the next call
+                with self._lock:
+                    self._error = exc
@@ -0,0 +1,242 @@
+"""
+Atomic writes across several datasets.
+
+A ``BatchWrite`` stages writes to many datasets through one catalog
+connection, writes their Parquet files in parallel and then commits every
+catalog record in a single database transaction, so readers see either all
+of the new versions or none of them.
+"""
+
+from __future__ import annotations
+
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence
+
+from .catalog import CommitConflictError, DatasetIdentity, DatasetRef, connect_catalog
+from .dataset import (
+    DatasetError,
+    WriteProfileInput,
+    WriteResult,
+    _commit_metadata,
+    _conflict_backoff,
+    _dataset_filesystem,
+    _distinct_partitions,
+    _partitions_to_keep,
+    _prepare_table_for_write,
+    _prepare_write_destination,
+    _rebase_after_conflict,
+    _register_write_intent,
+    _validate_write_mode,
+    _write_result,
+    _write_profile,
+    _write_table_files,
+)
+from .storage import StagingOptions
+
+__all__ = ["BatchWrite", "write_batch"]
+
+
+@dataclass
+class _StagedWrite:
+    dataset: DatasetIdentity
+    mode: str
+    partition_by: Optional[Sequence[str]]
+    intent_id: int
+    files: "Future[List[dict[str, Any]]]"
+
+
+class BatchWrite:
+    """
+    Collect writes to several datasets and commit them atomically.
+
+    ``write`` validates the data and registers the dataset's write intent
+    right away, then writes its files on a thread pool while the caller
+    stages the next dataset. Leaving the ``with`` block commits all staged
+    writes in one catalog transaction; an exception inside the block commits
+    nothing (files already written are cleaned up by ``recover``).
+
+    Append and partition-overwrite conflicts are retried as in
+    ``write_dataset``: if a dataset moved while the batch was being written,
+    the whole batch is re-committed on top of the new versions as long as the
+    intervening commits are compatible.
+    """
+
+    def __init__(
+        self,
+        *,
+        catalog_uri: str = "sqlite:///:memory:",
+        max_workers: Optional[int] = None,
+        max_commit_retries: int = 5,
+    ) -> None:
+        self._catalog_uri = catalog_uri
+        self._catalog = connect_catalog(catalog_uri)
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="data-lagoon-batch"
+        )
+        self._max_commit_retries = max_commit_retries
+        self._staged: List[_StagedWrite] = []
+        self._done = False
+        self.results: List[WriteResult] = []
+
+    def write(
+        self,
+        ref_or_name: DatasetRef | str,
+        data: Any,
+        *,
+        base_uri: Optional[str] = None,
+        partition_by: Optional[Sequence[str]] = None,
+        schema_merge: bool = True,
+        promote_to_string: bool = False,
+        mode: str = "append",
+        storage_options: Optional[Dict[str, Any]] = None,
+        staging: Optional[StagingOptions] = None,
+        write_profile: Optional[WriteProfileInput] = None,
+    ) -> None:
+        """Stage ``data`` as the next version of a dataset in this batch."""
+
+        if self._done:
+            raise DatasetError("Batch has already been committed or aborted")
+        _validate_write_mode(mode, partition_by)
+        catalog = self._catalog
+        dataset = catalog.resolve_dataset(ref_or_name, create_if_missing=True, base_uri=base_uri)
+        if not dataset.base_uri:
+            raise DatasetError("Dataset has no base_uri configured")
+        if any(staged.dataset.id == dataset.id for staged in self._staged):
+            raise DatasetError(f"Dataset '{dataset.name}' is already part of this batch")
+
+        table, schema_version_id = _prepare_table_for_write(
+            catalog,
+            dataset,
+            data,
+            schema_merge=schema_merge,
+            promote_to_string=promote_to_string,
+        )
+        fs_handle = _dataset_filesystem(dataset, storage_options)
+        base_dir, filename_template = _prepare_write_destination(
+            fs_handle, dataset.current_version + 1
+        )
+        intent_id = _register_write_intent(
+            catalog, dataset.id, dataset.current_version + 1, fs_handle, base_dir, filename_template
+        )
+        files = self._executor.submit(
+            _write_table_files,
+            fs_handle,
+            base_dir,
+            filename_template,
+            table,
+            partition_by=partition_by,
+            schema_version_id=schema_version_id,
+            staging=staging,
+            profile=_write_profile(dataset, write_profile),
+        )
+        self._staged.append(_StagedWrite(dataset, mode, partition_by, intent_id, files))
+
+    def commit(self) -> List[WriteResult]:
+        """Wait for the staged files and commit every dataset in one transaction."""
+
+        if self._done:
+            raise DatasetError("Batch has already been committed or aborted")
+        try:
+            written = [staged.files.result() for staged in self._staged]
+            for staged, files in zip(self._staged, written):
+                if not files:
+                    raise DatasetError(f"Batch write to '{staged.dataset.name}' produced no files")
+            if written:
+                self._commit(written)
+            return self.results
+        finally:
+            self._close()
+
+    def abort(self) -> None:
+        """Discard the batch without committing anything."""
+
+        if self._done:
+            return
+        for staged in self._staged:
+            staged.files.cancel()
+        wait([staged.files for staged in self._staged])
+        self._close()
+
+    def __enter__(self) -> "BatchWrite":
+        return self
+
+    def __exit__(self, exc_type: Any, exc: Any, tb: Any) -> None:
+        if exc_type is None:
+            self.commit()
+        else:
+            self.abort()
+
+    def _commit(self, written: Sequence[List[dict[str, Any]]]) -> None:
+        catalog = self._catalog
+        partitions: List[Optional[List[Dict[str, str]]]] = [
+            _distinct_partitions(files, staged.partition_by) if staged.partition_by else None
+            for staged, files in zip(self._staged, written)
+        ]
+        datasets = [staged.dataset for staged in self._staged]
+        attempt = 0
+        while True:
+            writes = []
+            for staged, dataset, files, touched in zip(
+                self._staged, datasets, written, partitions
+            ):
+                carried = (
+                    _partitions_to_keep(touched or [])(catalog, dataset)
+                    if staged.mode == "overwrite_partitions"
+                    else ()
+                )
+                writes.append(
+                    {
+                        "dataset": dataset,
+                        "version": dataset.current_version + 1,
+                        "files": files,
+                        "operation": staged.mode,
+                        "carried_file_ids": carried,
+                        "metadata": _commit_metadata(staged.mode, touched),
+                        "intent_ids": [staged.intent_id],
+                    }
+                )
+            try:
+                updated = catalog.record_writes(writes)
+                break
+            except CommitConflictError:
+                if attempt >= self._max_commit_retries:
+                    raise
+                attempt += 1
+            datasets = [
+                _rebase_after_conflict(catalog, dataset, staged.mode, touched)
+                for staged, dataset, touched in zip(self._staged, datasets, partitions)
+            ]
+            _conflict_backoff(attempt)
+
+        self.results = [
+            _write_result(dataset, dataset.current_version, files, self._catalog_uri)
+            for dataset, files in zip(updated, written)
+        ]
+
+    def _close(self) -> None:
+        self._done = True
+        self._executor.shutdown(wait=True)
+        self._catalog.close()
+
+
+def write_batch(
+    *,
+    catalog_uri: str = "sqlite:///:memory:",
+    max_workers: Optional[int] = None,
+    max_commit_retries: int = 5,
+) -> BatchWrite:
+    """
+    Start an atomic multi-dataset write; use the result as a context manager::
+
+        with write_batch(catalog_uri=uri) as batch:
+            batch.write("orders", orders, partition_by=["day"])
+            batch.write("customers", customers)
+        batch.results  # one WriteResult per write, in order
+    """
+
+    return BatchWrite(
+        catalog_uri=catalog_uri,
+        max_workers=max_workers,
+        max_commit_retries=max_commit_retries,
+    )
@@ -1,15 +1,29 @@
 from __future__ import annotations
 
 import json
-from dataclasses import dataclass
-from typing import Any, Dict, List, Optional, Sequence, Tuple
+import math
+import random
+import tempfile
+import time
+import uuid
+import zlib
+from dataclasses import asdict, dataclass, fields
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
 
 import pyarrow as pa
+import pyarrow.compute as pc
 import pyarrow.dataset as ds
 import pyarrow.fs as pa_fs
 from pyarrow.dataset import WrittenFile
 
-from .catalog import DatasetRef, connect_catalog
+from .catalog import (
+    CommitConflictError,
+    DatasetIdentity,
+    DatasetRef,
+    SqlCatalog,
+    connect_catalog,
+)
 from .schema_manager import (
     SchemaMismatchError,
     align_table_to_schema,
@@ -17,11 +31,16 @@ from .schema_manager import (
     merge_schemas,
     serialize_schema,
 )
-from .storage import FileSystemHandle, resolve_filesystem
-
-
-def _to_arrow_fs(fs_handle: FileSystemHandle) -> pa_fs.FileSystem:
-    return pa_fs.PyFileSystem(pa_fs.FSSpecHandler(fs_handle.filesystem))
+from .storage import (
+    FileSystemHandle,
+    RangeCachedFile,
+    StagingOptions,
+    arrow_filesystem,
+    fetch_ranges,
+    merge_storage_options,
+    resolve_filesystem,
+    upload_files,
+)
 
 
 class DatasetError(RuntimeError):
@@ -37,6 +56,176 @@ class WriteResult:
     file_metadata: Sequence[dict[str, Any]] = ()
 
 
+@dataclass
+class VersionInfo:
+    version: int
+    timestamp: datetime
+    operation: str
+    file_count: int
+    row_count: int
+
+
+@dataclass(frozen=True)
+class ParquetWriteProfile:
+    """
+    Parquet writer settings for a dataset's files.
+
+    ``use_dictionary`` is ``"all"``, ``"none"``, ``"strings"`` (string and
+    binary columns only) or a tuple of column names; with
+    ``byte_stream_split_floats`` float columns use BYTE_STREAM_SPLIT instead
+    of dictionary encoding. ``statistics_columns`` limits the footer
+    statistics to those columns (``None``: all). Arrow does not truncate
+    footer statistics, so ``statistics_truncate_length`` applies to the
+    string min/max values kept in the catalog. ``max_rows_per_group`` bounds
+    the row groups the catalog can prune.
+    """
+
+    compression: str = "snappy"
+    compression_level: Optional[int] = None
+    use_dictionary: str | Tuple[str, ...] = "all"
+    data_page_size: Optional[int] = None
+    data_page_version: str = "1.0"
+    byte_stream_split_floats: bool = False
+    statistics_columns: Optional[Tuple[str, ...]] = None
+    statistics_truncate_length: Optional[int] = None
+    max_rows_per_group: Optional[int] = None
+    write_page_index: bool = False
+
+    def file_options(self, schema: pa.Schema) -> ds.FileWriteOptions:
+        floats = (
+            [field.name for field in schema if pa.types.is_floating(field.type)]
+            if self.byte_stream_split_floats
+            else []
+        )
+        if self.use_dictionary == "all":
+            dictionary = list(schema.names)
+        elif self.use_dictionary == "none":
+            dictionary = []
+        elif self.use_dictionary == "strings":
+            dictionary = [
+                field.name
+                for field in schema
+                if pa.types.is_string(field.type)
+                or pa.types.is_large_string(field.type)
+                or pa.types.is_binary(field.type)
+                or pa.types.is_large_binary(field.type)
+            ]
+        else:
+            dictionary = list(self.use_dictionary)
+        options: Dict[str, Any] = {
+            "compression": self.compression,
+            "use_dictionary": [name for name in dictionary if name not in floats],
+            "data_page_version": self.data_page_version,
+            "write_statistics": (
+                True if self.statistics_columns is None else list(self.statistics_columns)
+            ),
+            "write_page_index": self.write_page_index,
+        }
+        if self.compression_level is not None:
+            options["compression_level"] = self.compression_level
+        if self.data_page_size is not None:
+            options["data_page_size"] = self.data_page_size
+        if floats:
+            options["use_byte_stream_split"] = floats
+        try:
+            return ds.ParquetFileFormat().make_write_options(**options)
+        except (TypeError, ValueError, pa.ArrowException) as exc:
+            raise DatasetError(f"Invalid Parquet write profile: {exc}") from exc
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "ParquetWriteProfile":
+        known = {field.name for field in fields(cls)}
+        unknown = sorted(set(data) - known)
+        if unknown:
+            raise DatasetError(f"Unknown Parquet write profile settings: {', '.join(unknown)}")
+        return cls(
+            **{
+                key: tuple(value) if isinstance(value, list) else value
+                for key, value in data.items()
+            }
+        )
+
+
+WRITE_PROFILES: Dict[str, ParquetWriteProfile] = {
+    # Arrow's defaults: snappy, dictionary encoding for every column.
+    "default": ParquetWriteProfile(),
+    # Cheapest encode: LZ4 and no dictionaries for numeric columns, which
+    # rarely repeat enough to pay for building them.
+    "fast-write": ParquetWriteProfile(compression="lz4", use_dictionary="strings"),
+    # ZSTD at a low level is close to the best ratio at about snappy speed.
+    "balanced": ParquetWriteProfile(
+        compression="zstd",
+        compression_level=1,
+        use_dictionary="strings",
+        data_page_version="2.0",
+    ),
+    # Small row groups and pages so selective reads fetch little data, plus
+    # a page index for engines that use it; smaller files at a higher
+    # write cost.
+    "small-scan": ParquetWriteProfile(
+        compression="zstd",
+        compression_level=6,
+        use_dictionary="strings",
+        byte_stream_split_floats=True,
+        data_page_size=64 * 1024,
+        data_page_version="2.0",
+        statistics_truncate_length=64,
+        max_rows_per_group=128 * 1024,
+        write_page_index=True,
+    ),
+}
+
+WriteProfileInput = str | ParquetWriteProfile
+
+
+def _resolve_write_profile(profile: WriteProfileInput) -> ParquetWriteProfile:
+    if isinstance(profile, ParquetWriteProfile):
+        return profile
+    try:
+        return WRITE_PROFILES[profile]
+    except KeyError:
+        raise DatasetError(
+            f"Unknown write profile '{profile}'; expected one of {', '.join(WRITE_PROFILES)}"
+        ) from None
+
+
+def _write_profile(
+    dataset: DatasetIdentity, override: Optional[WriteProfileInput] = None
+) -> Optional[ParquetWriteProfile]:
+    """The call's profile, else the dataset's cataloged one, else Arrow's defaults."""
+
+    if override is not None:
+        return _resolve_write_profile(override)
+    if dataset.write_profile:
+        return ParquetWriteProfile.from_dict(dataset.write_profile)
+    return None
+
+
+def set_write_profile(
+    ref_or_name: DatasetRef | str,
+    profile: Optional[WriteProfileInput],
+    *,
+    catalog_uri: str = "sqlite:///:memory:",
+) -> ParquetWriteProfile:
+    """
+    Store the Parquet write profile (a ``WRITE_PROFILES`` name or a
+    ``ParquetWriteProfile``) used for the dataset's new files from now on,
+    including compactions and mutations. ``None`` restores the defaults.
+    """
+
+    resolved = _resolve_write_profile(profile) if profile is not None else None
+    catalog = connect_catalog(catalog_uri)
+    try:
+        dataset = catalog.resolve_dataset(ref_or_name)
+        catalog.set_write_profile(dataset, resolved.to_dict() if resolved else None)
+    finally:
+        catalog.close()
+    return resolved or WRITE_PROFILES["default"]
+
+
 PredicateInput = Tuple[str, str, Any]
 
 
@@ -72,15 +261,171 @@ def _normalize_to_table(data: Any) -> pa.Table:
     raise DatasetError(f"Unsupported data type for write_dataset: {type(data)!r}")
 
 
+def _prepare_table_for_write(
+    catalog: SqlCatalog,
+    dataset: DatasetIdentity,
+    data: Any,
+    *,
+    schema_merge: bool,
+    promote_to_string: bool,
+) -> Tuple[pa.Table, int]:
+    """Align ``data`` to the merged dataset schema and record that schema."""
+
+    table = _normalize_to_table(data)
+    current_schema_bytes = catalog.get_latest_schema_bytes(dataset.id)
+    current_schema = (
+        deserialize_schema(current_schema_bytes)
+        if current_schema_bytes
+        else None
+    )
+    merge_result = merge_schemas(
+        current_schema,
+        table.schema,
+        schema_merge=schema_merge,
+        promote_to_string=promote_to_string,
+    )
+    table = align_table_to_schema(table, merge_result)
+    schema_bytes = serialize_schema(merge_result.schema)
+    return table, catalog.ensure_schema_version(dataset.id, schema_bytes)
+
+
 def _prepare_write_destination(fs_handle: FileSystemHandle, version: int) -> Tuple[str, str]:
     sep = getattr(fs_handle.filesystem, "sep", "/")
     base_root = fs_handle.root_path.rstrip(sep)
     version_dir = f"{base_root}{sep}v{version}" if base_root else f"v{version}"
     fs_handle.filesystem.makedirs(version_dir, exist_ok=True)
-    basename_template = f"part-v{version}-{{i}}.parquet"
+    # A per-write token keeps concurrent writers that target the same version
+    # directory from overwriting each other's files.
+    basename_template = f"part-v{version}-{uuid.uuid4().hex}-{{i}}.parquet"
     return version_dir, basename_template
 
 
+def _register_write_intent(
+    catalog: SqlCatalog,
+    dataset_id: int,
+    version: int,
+    fs_handle: FileSystemHandle,
+    base_dir: str,
+    basename_template: str,
+) -> int:
+    """
+    Record where the upcoming files will land before any of them is written,
+    so a crash between writing and committing leaves a findable trail.
+    """
+
+    return catalog.register_write_intent(
+        dataset_id,
+        version,
+        fs_handle.filesystem.unstrip_protocol(base_dir),
+        basename_template.split("{i}", 1)[0],
+    )
+
+
+def _write_table_files(
+    fs_handle: FileSystemHandle,
+    base_dir: str,
+    basename_template: str,
+    table: pa.Table,
+    *,
+    partition_by: Optional[Sequence[str]],
+    schema_version_id: Optional[int],
+    staging: Optional[StagingOptions] = None,
+    arrow_fs: Optional[pa_fs.FileSystem] = None,
+    profile: Optional[ParquetWriteProfile] = None,
+) -> List[Dict[str, Any]]:
+    """Write ``table`` below ``base_dir`` and return the catalog file entries."""
+
+    if staging is not None:
+        return _write_staged_table_files(
+            fs_handle,
+            base_dir,
+            basename_template,
+            table,
+            partition_by=partition_by,
+            schema_version_id=schema_version_id,
+            staging=staging,
+            profile=profile,
+        )
+
+    written_files: List[Dict[str, Any]] = []
+    truncate_length = profile.statistics_truncate_length if profile else None
+
+    def _visitor(written: WrittenFile) -> None:
+        written_files.append(
+            _written_file_record(
+                fs_handle, base_dir, written, schema_version_id, truncate_length
+            )
+        )
+
+    partitioning = (
+        ds.partitioning(pa.schema([(name, table.schema.field(name).type) for name in partition_by]), flavor="hive")
+        if partition_by
+        else None
+    )
+
+    ds.write_dataset(
+        data=table,
+        base_dir=base_dir,
+        format="parquet",
+        basename_template=basename_template,
+        partitioning=partitioning,
+        existing_data_behavior="overwrite_or_ignore",
+        file_visitor=_visitor,
+        filesystem=arrow_fs or arrow_filesystem(fs_handle),
+        file_options=profile.file_options(table.schema) if profile else None,
+        max_rows_per_group=(
+            profile.max_rows_per_group if profile and profile.max_rows_per_group else 1 << 20
+        ),
+    )
+    return written_files
+
+
+def _write_staged_table_files(
+    fs_handle: FileSystemHandle,
+    base_dir: str,
+    basename_template: str,
+    table: pa.Table,
+    *,
+    partition_by: Optional[Sequence[str]],
+    schema_version_id: Optional[int],
+    staging: StagingOptions,
+    profile: Optional[ParquetWriteProfile],
+) -> List[Dict[str, Any]]:
+    """
+    Write ``table`` to a local staging directory, upload the files below
+    ``base_dir`` concurrently and return entries pointing at the uploads.
+    """
+
+    sep = getattr(fs_handle.filesystem, "sep", "/")
+    with tempfile.TemporaryDirectory(prefix="data-lagoon-", dir=staging.directory) as local_dir:
+        local_handle = resolve_filesystem(local_dir)
+        staged_files = _write_table_files(
+            local_handle,
+            local_handle.root_path,
+            basename_template,
+            table,
+            partition_by=partition_by,
+            schema_version_id=schema_version_id,
+            # Arrow's native local filesystem skips the Python I/O layer.
+            arrow_fs=pa_fs.LocalFileSystem(),
+            profile=profile,
+        )
+        uploads = []
+        for entry in staged_files:
+            local_path = resolve_filesystem(entry["file_path"]).root_path
+            relative_path = local_path[len(local_handle.root_path) :].lstrip("/")
+            remote_path = base_dir.rstrip(sep) + sep + relative_path.replace("/", sep)
+            uploads.append((local_path, remote_path))
+            entry["file_path"] = fs_handle.filesystem.unstrip_protocol(remote_path)
+        upload_files(
+            fs_handle.filesystem,
+            uploads,
+            max_workers=staging.max_workers,
+            chunk_size=staging.chunk_size,
+        )
+    return staged_files
+
+
 def _extract_partitions(relative_path: str, sep: str) -> Dict[str, str]:
     segments = [segment for segment in relative_path.split(sep) if segment]
     partitions: Dict[str, str] = {}
@@ -91,7 +436,57 @@ def _extract_partitions(relative_path: str, sep: str) -> Dict[str, str]:
     return partitions
 
 
-def _extract_row_groups(metadata: Optional[pa.parquet.FileMetaData]) -> List[dict[str, Any]]:
+def _written_file_record(
+    fs_handle: FileSystemHandle,
+    base_dir: str,
+    written: WrittenFile,
+    schema_version_id: Optional[int],
+    statistics_truncate_length: Optional[int] = None,
+) -> Dict[str, Any]:
+    """Build the catalog file entry for a file reported by ``ds.write_dataset``."""
+
+    sep = getattr(fs_handle.filesystem, "sep", "/")
+    root_marker = getattr(fs_handle.filesystem, "root_marker", "")
+    if root_marker and written.path.startswith(root_marker):
+        relative_path = written.path
+    else:
+        relative_path = f"{base_dir}{sep}{written.path}".replace(f"{sep}{sep}", sep)
+    absolute_path = fs_handle.filesystem.unstrip_protocol(relative_path)
+    row_count = written.metadata.num_rows if written.metadata else None
+    try:
+        size = fs_handle.filesystem.size(relative_path)
+    except Exception:
+        size = None
+    row_groups = _extract_row_groups(written.metadata, statistics_truncate_length)
+    return {
+        "file_path": absolute_path,
+        "row_count": row_count,
+        "file_size_bytes": size,
+        "partitions": _extract_partitions(relative_path, sep),
+        "row_groups": row_groups,
+        "schema_version_id": schema_version_id,
+        "metadata_dict": written.metadata.to_dict() if written.metadata else None,
+        "footer_length": _footer_length(size, row_groups),
+    }
+
+
+def _footer_length(size: Optional[int], row_groups: Sequence[dict[str, Any]]) -> Optional[int]:
+    """Bytes after the last column chunk: page indexes, footer and magic."""
+
+    ends = [
+        rg["byte_offset"] + rg["byte_length"]
+        for rg in row_groups
+        if rg.get("byte_offset") is not None and rg.get("byte_length") is not None
+    ]
+    if size is None or not ends:
+        return None
+    return size - max(ends)
+
+
+def _extract_row_groups(
+    metadata: Optional[pa.parquet.FileMetaData],
+    statistics_truncate_length: Optional[int] = None,
+) -> List[dict[str, Any]]:
     if metadata is None:
         return []
     meta_dict = metadata.to_dict()
@@ -100,15 +495,27 @@ def _extract_row_groups(metadata: Optional[pa.parquet.FileMetaData]) -> List[dic
         stats_min: Dict[str, Any] = {}
         stats_max: Dict[str, Any] = {}
         null_counts: Dict[str, Any] = {}
+        chunk_start: Optional[int] = None
+        chunk_end: Optional[int] = None
         for column in rg.get("columns", []):
+            start = (
+                column.get("dictionary_page_offset")
+                if column.get("has_dictionary_page")
+                else column.get("data_page_offset")
+            )
+            if start is not None and column.get("total_compressed_size") is not None:
+                end = start + column["total_compressed_size"]
+                chunk_start = start if chunk_start is None else min(chunk_start, start)
+                chunk_end = end if chunk_end is None else max(chunk_end, end)
             stats = column.get("statistics") or {}
             name = column.get("path_in_schema") or column.get("name")
             if name is None:
                 continue
-            if "min" in stats:
-                stats_min[name] = stats["min"]
-            if "max" in stats:
-                stats_max[name] = stats["max"]
+            upper = _truncate_max(stats.get("max"), statistics_truncate_length)
+            if upper is not None:
+                stats_max[name] = upper
+                if "min" in stats:
+                    stats_min[name] = _truncate_min(stats["min"], statistics_truncate_length)
             if "null_count" in stats:
                 null_counts[name] = stats["null_count"]
         row_groups.append(
@@ -118,11 +525,35 @@ def _extract_row_groups(metadata: Optional[pa.parquet.FileMetaData]) -> List[dic
                 "stats_min": stats_min,
                 "stats_max": stats_max,
                 "null_counts": null_counts,
+                "byte_offset": chunk_start,
+                "byte_length": (
+                    chunk_end - chunk_start if chunk_start is not None and chunk_end else None
+                ),
             }
         )
     return row_groups
 
 
+def _truncate_min(value: Any, length: Optional[int]) -> Any:
+    if length is None or not isinstance(value, str) or len(value) <= length:
+        return value
+    return value[:length]
+
+
+def _truncate_max(value: Any, length: Optional[int]) -> Any:
+    """Shorten a string upper bound so it still sorts at or after ``value``."""
+
+    if length is None or not isinstance(value, str) or len(value) <= length:
+        return value
+    prefix = value[:length]
+    while prefix:
+        last = ord(prefix[-1])
+        if last < 0x10FFFF and not 0xD7FF <= last < 0xDFFF:
+            return prefix[:-1] + chr(last + 1)
+        prefix = prefix[:-1]
+    return None
+
+
 def write_dataset(
     ref_or_name: DatasetRef | str,
     data: Any,
@@ -132,7 +563,31 @@ def write_dataset(
     partition_by: Optional[Sequence[str]] = None,
     schema_merge: bool = True,
     promote_to_string: bool = False,
+    max_commit_retries: int = 5,
+    mode: str = "append",
+    storage_options: Optional[Dict[str, Any]] = None,
+    staging: Optional[StagingOptions] = None,
+    write_profile: Optional[WriteProfileInput] = None,
 ) -> WriteResult:
+    """
+    Write ``data`` as a new version of the dataset.
+
+    With ``mode="overwrite_partitions"`` the new version replaces only the
+    ``partition_by`` partitions present in ``data``; the file records of all
+    other partitions of the current version are carried forward in the same
+    commit without copying any data. ``storage_options`` are passed to fsspec
+    on top of the dataset's cataloged options.
+
+    With ``staging`` the files are written to local disk and then uploaded
+    in parallel (see ``StagingOptions``), which is much faster than writing
+    many partitions straight to an object store.
+
+    ``write_profile`` (a ``WRITE_PROFILES`` name or a ``ParquetWriteProfile``)
+    overrides the dataset's profile (see ``set_write_profile``) for this
+    write only.
+    """
+
+    _validate_write_mode(mode, partition_by)
     catalog = connect_catalog(catalog_uri)
     try:
         dataset = catalog.resolve_dataset(
@@ -142,102 +597,243 @@ def write_dataset(
         if not dataset.base_uri:
             raise DatasetError("Dataset has no base_uri configured")
 
-        table = _normalize_to_table(data)
-        current_schema_bytes = catalog.get_latest_schema_bytes(dataset.id)
-        current_schema = (
-            deserialize_schema(current_schema_bytes)
-            if current_schema_bytes
-            else None
-        )
-        merge_result = merge_schemas(
-            current_schema,
-            table.schema,
+        table, schema_version_id = _prepare_table_for_write(
+            catalog,
+            dataset,
+            data,
             schema_merge=schema_merge,
             promote_to_string=promote_to_string,
         )
-        table = align_table_to_schema(table, merge_result)
-        schema_bytes = serialize_schema(merge_result.schema)
-        schema_version_id = catalog.ensure_schema_version(dataset.id, schema_bytes)
         version = dataset.current_version + 1
-        fs_handle = resolve_filesystem(dataset.base_uri)
+        fs_handle = _dataset_filesystem(dataset, storage_options)
         base_dir, filename_template = _prepare_write_destination(fs_handle, version)
-
-        written_files: List[Dict[str, Any]] = []
-
-        sep = getattr(fs_handle.filesystem, "sep", "/")
-
-        root_marker = getattr(fs_handle.filesystem, "root_marker", "")
-
-        def _visitor(written: WrittenFile) -> None:
-            if root_marker and written.path.startswith(root_marker):
-                relative_path = written.path
-            else:
-                relative_path = f"{base_dir}{sep}{written.path}".replace(f"{sep}{sep}", sep)
-            absolute_path = fs_handle.filesystem.unstrip_protocol(relative_path)
-            row_count = written.metadata.num_rows if written.metadata else None
-            try:
-                size = fs_handle.filesystem.size(relative_path)
-            except Exception:
-                size = None
-            partitions = _extract_partitions(relative_path, sep)
-            written_files.append(
-                {
-                    "file_path": absolute_path,
-                    "row_count": row_count,
-                    "file_size_bytes": size,
-                    "partitions": partitions,
-                    "row_groups": _extract_row_groups(written.metadata),
-                    "schema_version_id": schema_version_id,
-                    "metadata_dict": written.metadata.to_dict() if written.metadata else None,
-                }
-            )
-
-        arrow_fs = _to_arrow_fs(fs_handle)
-
-        partitioning = (
-            ds.partitioning(pa.schema([(name, table.schema.field(name).type) for name in partition_by]), flavor="hive")
-            if partition_by
-            else None
+        intent_id = _register_write_intent(
+            catalog, dataset.id, version, fs_handle, base_dir, filename_template
         )
 
-        ds.write_dataset(
-            data=table,
-            base_dir=base_dir,
-            format="parquet",
-            basename_template=filename_template,
-            partitioning=partitioning,
-            existing_data_behavior="overwrite_or_ignore",
-            file_visitor=_visitor,
-            filesystem=arrow_fs,
+        written_files = _write_table_files(
+            fs_handle,
+            base_dir,
+            filename_template,
+            table,
+            partition_by=partition_by,
+            schema_version_id=schema_version_id,
+            staging=staging,
+            profile=_write_profile(dataset, write_profile),
         )
 
         if not written_files:
             raise DatasetError("write_dataset produced no output files")
 
-        updated_dataset = catalog.record_write_with_metadata(
+        touched_partitions = (
+            _distinct_partitions(written_files, partition_by) if partition_by else None
+        )
+        updated_dataset, version = _commit_with_retry(
+            catalog,
             dataset,
             version=version,
             files=written_files,
+            max_retries=max_commit_retries,
+            operation=mode,
+            intent_ids=[intent_id],
+            partitions=touched_partitions,
+            carry_forward=(
+                _partitions_to_keep(touched_partitions or [])
+                if mode == "overwrite_partitions"
+                else None
+            ),
         )
     finally:
         catalog.close()
 
-    total_rows = sum(entry.get("row_count") or 0 for entry in written_files)
+    return _write_result(updated_dataset, version, written_files, catalog_uri)
+
+
+def _dataset_filesystem(
+    dataset: DatasetIdentity,
+    storage_options: Optional[Dict[str, Any]] = None,
+    uri: Optional[str] = None,
+) -> FileSystemHandle:
+    """Resolve ``uri`` (default: the dataset's base URI) with its storage options."""
 
+    return resolve_filesystem(
+        uri or dataset.base_uri,
+        storage_options=merge_storage_options(dataset.storage_options, storage_options),
+    )
+
+
+def _write_result(
+    dataset: DatasetIdentity,
+    version: int,
+    written_files: Sequence[dict[str, Any]],
+    catalog_uri: str,
+) -> WriteResult:
     return WriteResult(
         dataset_ref=DatasetRef(
-            name=updated_dataset.name,
-            base_uri=updated_dataset.base_uri,
-            dataset_id=updated_dataset.id,
+            name=dataset.name,
+            base_uri=dataset.base_uri,
+            dataset_id=dataset.id,
             catalog_uri=catalog_uri,
         ),
-        row_count=total_rows,
+        row_count=sum(entry.get("row_count") or 0 for entry in written_files),
         files=[entry["file_path"] for entry in written_files],
         version=version,
         file_metadata=[entry.get("metadata_dict") or {} for entry in written_files],
     )
 
 
+_WRITE_MODES = ("append", "overwrite_partitions")
+
+
+def _validate_write_mode(mode: str, partition_by: Optional[Sequence[str]]) -> None:
+    if mode not in _WRITE_MODES:
+        raise DatasetError(
+            f"Unsupported mode '{mode}'; expected one of {', '.join(_WRITE_MODES)}"
+        )
+    if mode == "overwrite_partitions" and not partition_by:
+        raise DatasetError("mode='overwrite_partitions' requires partition_by")
+
+
+_APPEND_COMPATIBLE_OPERATIONS = frozenset({"append"})
+
+# Operations that only touch the partitions listed in their transaction
+# metadata; they conflict with a concurrent commit only if those overlap.
+_PARTITION_SCOPED_OPERATIONS = frozenset({"overwrite_partitions"})
+
+CarryForward = Callable[[SqlCatalog, DatasetIdentity], Sequence[int]]
+
+
+def _distinct_partitions(
+    files: Sequence[dict[str, Any]], partition_by: Sequence[str]
+) -> List[Dict[str, str]]:
+    seen: Dict[Tuple[Optional[str], ...], Dict[str, str]] = {}
+    for entry in files:
+        partitions = entry.get("partitions") or {}
+        key = tuple(partitions.get(name) for name in partition_by)
+        seen.setdefault(key, {name: partitions.get(name) for name in partition_by})
+    return list(seen.values())
+
+
+def _partitions_to_keep(replaced: Sequence[Dict[str, str]]) -> CarryForward:
+    """Carry forward every file of the base version outside ``replaced``."""
+
+    replaced_keys = {tuple(sorted(partitions.items())) for partitions in replaced}
+    names = sorted({name for partitions in replaced for name in partitions})
+
+    def _carry(catalog: SqlCatalog, dataset: DatasetIdentity) -> Sequence[int]:
+        if dataset.current_version <= 0:
+            return []
+        file_ids = [
+            record["id"]
+            for record in catalog.list_file_records_for_version(
+                dataset.id, dataset.current_version
+            )
+        ]
+        partition_map = catalog.fetch_partitions_for_files(file_ids)
+        return [
+            file_id
+            for file_id in file_ids
+            if tuple((name, partition_map.get(file_id, {}).get(name)) for name in names)
+            not in replaced_keys
+        ]
+
+    return _carry
+
+
+def _transaction_is_compatible(
+    transaction: dict[str, Any], partitions: Optional[Sequence[Dict[str, str]]]
+) -> bool:
+    if transaction["operation"] in _APPEND_COMPATIBLE_OPERATIONS:
+        return True
+    if transaction["operation"] not in _PARTITION_SCOPED_OPERATIONS or partitions is None:
+        return False
+    theirs = {
+        tuple(sorted(entry.items()))
+        for entry in (transaction.get("metadata") or {}).get("partitions") or []
+    }
+    return not theirs & {tuple(sorted(entry.items())) for entry in partitions}
+
+
+def _commit_with_retry(
+    catalog: SqlCatalog,
+    dataset: DatasetIdentity,
+    *,
+    version: int,
+    files: Sequence[dict[str, Any]],
+    max_retries: int,
+    operation: str = "append",
+    intent_ids: Sequence[int] = (),
+    partitions: Optional[Sequence[Dict[str, str]]] = None,
+    carry_forward: Optional[CarryForward] = None,
+) -> Tuple[DatasetIdentity, int]:
+    """
+    Commit already-written files, retrying on version conflicts.
+
+    When another writer wins the race, the intervening transactions are
+    checked for compatibility and the same file records are re-committed
+    under the next free version; no data is rewritten. ``carry_forward``
+    picks the existing file records to keep from the version the attempt is
+    based on, so it is re-evaluated after every conflict. ``partitions``
+    lists the partitions this commit touches.
+    """
+
+    metadata = _commit_metadata(operation, partitions)
+    attempt = 0
+    while True:
+        try:
+            updated = catalog.record_write_with_metadata(
+                dataset,
+                version=version,
+                files=files,
+                operation=operation,
+                carried_file_ids=carry_forward(catalog, dataset) if carry_forward else (),
+                metadata=metadata,
+                intent_ids=intent_ids,
+            )
+            return updated, version
+        except CommitConflictError:
+            if attempt >= max_retries:
+                raise
+            attempt += 1
+
+        dataset = _rebase_after_conflict(catalog, dataset, operation, partitions)
+        version = dataset.current_version + 1
+        _conflict_backoff(attempt)
+
+
+def _commit_metadata(
+    operation: str, partitions: Optional[Sequence[Dict[str, str]]]
+) -> Optional[dict[str, Any]]:
+    if partitions is not None and operation in _PARTITION_SCOPED_OPERATIONS:
+        return {"partitions": list(partitions)}
+    return None
+
+
+def _rebase_after_conflict(
+    catalog: SqlCatalog,
+    dataset: DatasetIdentity,
+    operation: str,
+    partitions: Optional[Sequence[Dict[str, str]]],
+) -> DatasetIdentity:
+    """
+    Return the latest state of ``dataset`` if every transaction committed
+    since ``dataset.current_version`` is compatible with this write.
+    """
+
+    latest = catalog.get_dataset_by_id(dataset.id)
+    for transaction in catalog.list_transactions_since(dataset.id, dataset.current_version):
+        if not _transaction_is_compatible(transaction, partitions):
+            raise CommitConflictError(
+                f"Concurrent '{transaction['operation']}' at version "
+                f"{transaction['version']} conflicts with this {operation}"
+            )
+    return latest
+
+
+def _conflict_backoff(attempt: int) -> None:
+    time.sleep(random.uniform(0, min(0.01 * 2**attempt, 0.5)))
+
+
 def parse_predicates(predicates: Optional[Sequence[PredicateInput]]) -> List[Predicate]:
     result: List[Predicate] = []
     if not predicates:
@@ -252,44 +848,612 @@ def parse_predicates(predicates: Optional[Sequence[PredicateInput]]) -> List[Pre
     return result
 
 
-def read_dataset(
+@dataclass(frozen=True)
+class _Snapshot:
+    dataset: DatasetIdentity
+    version: int
+    file_records: Sequence[dict[str, Any]]
+    schema: Optional[pa.Schema]
+    fragment_schemas: Dict[int, pa.Schema]
+    storage_options: Optional[Dict[str, Any]] = None
+
+
+def _open_snapshot(
     ref_or_name: DatasetRef | str,
     *,
-    catalog_uri: str = "sqlite:///:memory:",
-    version: Optional[int] = None,
-    as_dataset: bool = False,
-    predicates: Optional[Sequence[PredicateInput]] = None,
-) -> pa.Table | ds.Dataset:
-    catalog = connect_catalog(catalog_uri)
+    catalog_uri: str,
+    version: Optional[int],
+    as_of: Optional[datetime] = None,
+    storage_options: Optional[Dict[str, Any]] = None,
+) -> _Snapshot:
+    """
+    Resolve the files of a dataset version together with the catalog schemas
+    needed to read them.
+
+    The read schema is the dataset's latest schema; the schema of each file is
+    taken from its ``schema_version_id`` so no Parquet footer has to be opened
+    to reconcile evolved files. ``as_of`` selects the newest version committed
+    at or before that time (naive datetimes are taken as UTC). The snapshot's
+    ``storage_options`` are the dataset's merged with ``storage_options``.
+    """
+
+    if version is not None and as_of is not None:
+        raise DatasetError("Specify either version or as_of, not both")
+    catalog = connect_catalog(catalog_uri, read_only=True)
     try:
         dataset = catalog.resolve_dataset(ref_or_name)
+        if as_of is not None:
+            version = catalog.find_version_as_of(dataset.id, as_of)
+            if version is None:
+                raise DatasetError(f"No retained version was committed at or before {as_of}")
         effective_version = version or dataset.current_version
         if effective_version <= 0:
             raise DatasetError("Dataset has no committed versions to read")
         file_records = catalog.list_file_records_for_version(dataset.id, effective_version)
+        latest_schema_bytes = catalog.get_latest_schema_bytes(dataset.id)
+        schema_version_ids = sorted(
+            {
+                record["schema_version_id"]
+                for record in file_records
+                if record.get("schema_version_id") is not None
+            }
+        )
+        schema_version_bytes = catalog.fetch_schema_versions(schema_version_ids)
     finally:
         catalog.close()
 
     if not file_records:
         raise DatasetError(f"No files found for dataset version {effective_version}")
 
+    return _Snapshot(
+        dataset=dataset,
+        version=effective_version,
+        file_records=file_records,
+        schema=deserialize_schema(latest_schema_bytes) if latest_schema_bytes else None,
+        fragment_schemas={
+            schema_id: deserialize_schema(data)
+            for schema_id, data in schema_version_bytes.items()
+        },
+        storage_options=merge_storage_options(dataset.storage_options, storage_options),
+    )
+
+
+def read_dataset(
+    ref_or_name: DatasetRef | str,
+    *,
+    catalog_uri: str = "sqlite:///:memory:",
+    version: Optional[int] = None,
+    as_of: Optional[datetime] = None,
+    as_dataset: bool = False,
+    predicates: Optional[Sequence[PredicateInput]] = None,
+    limit: Optional[int] = None,
+    output: str = "arrow",
+    prefetch: Optional[bool] = None,
+    storage_options: Optional[Dict[str, Any]] = None,
+) -> Any:
+    """
+    Read a dataset version (the latest by default) as an Arrow table.
+
+    ``prefetch`` fetches the Parquet footers of all selected files, plus
+    their selected row groups for a full materialized read, in one batch of
+    concurrent ranged requests before scanning. It defaults to on for
+    remote storage, where per-file round trips dominate many-file scans.
+    ``storage_options`` are passed to fsspec on top of the dataset's
+    cataloged options.
+    """
+
+    if limit is not None and limit < 0:
+        raise DatasetError("limit must be a non-negative integer")
+    _validate_output(output)
+    if as_dataset and output != "arrow":
+        raise DatasetError("as_dataset=True cannot be combined with output conversion")
+
+    snapshot = _open_snapshot(
+        ref_or_name,
+        catalog_uri=catalog_uri,
+        version=version,
+        as_of=as_of,
+        storage_options=storage_options,
+    )
     parsed_predicates = parse_predicates(predicates)
     pruned_files = _prune_files_and_row_groups(
         catalog_uri=catalog_uri,
-        dataset_id=dataset.id,
-        version=effective_version,
-        file_records=file_records,
+        dataset_id=snapshot.dataset.id,
+        version=snapshot.version,
+        file_records=snapshot.file_records,
         predicates=parsed_predicates,
     )
-
+    if limit is not None and not parsed_predicates:
+        pruned_files = _limit_fragments(pruned_files, limit)
+
+    prefetched = None
+    if _should_prefetch(prefetch, pruned_files, snapshot.storage_options):
+        # Lazy and limited reads may touch little of each file: footers only.
+        prefetched = _prefetch_files(
+            pruned_files,
+            row_groups=not as_dataset and limit is None,
+            storage_options=snapshot.storage_options,
+        )
     dataset_obj = _build_dataset_from_fragments(
         pruned_files,
         predicates=parsed_predicates,
+        schema=snapshot.schema,
+        fragment_schemas=snapshot.fragment_schemas,
+        prefetched=prefetched,
+        storage_options=snapshot.storage_options,
     )
     if as_dataset:
         return dataset_obj
     filter_expr = _build_arrow_filter(parsed_predicates)
-    return dataset_obj.to_table(filter=filter_expr)
+    if limit is not None:
+        # ``head`` stops pulling batches from the scanner once enough rows
+        # have been produced, so residual filters do not force a full scan.
+        return _convert_output(dataset_obj.head(limit, filter=filter_expr), output)
+    if output == "arrow":
+        return dataset_obj.to_table(filter=filter_expr)
+    return _convert_batches(
+        dataset_obj.to_batches(filter=filter_expr), dataset_obj.schema, output
+    )
+
+
+def list_versions(
+    ref_or_name: DatasetRef | str,
+    *,
+    catalog_uri: str = "sqlite:///:memory:",
+) -> List[VersionInfo]:
+    """
+    Return the retained versions of a dataset, oldest first, with their
+    commit time (UTC), operation, live file count and row count.
+    """
+
+    catalog = connect_catalog(catalog_uri, read_only=True)
+    try:
+        dataset = catalog.resolve_dataset(ref_or_name)
+        return [VersionInfo(**entry) for entry in catalog.list_versions(dataset.id)]
+    finally:
+        catalog.close()
+
+
+CHANGE_VERSION_COLUMN = "_commit_version"
+CHANGE_TYPE_COLUMN = "_change_type"
+
+# Operations that rewrite files without changing the rows a version returns.
+_DATA_PRESERVING_OPERATIONS = {"compact"}
+
+
+def read_changes(
+    ref_or_name: DatasetRef | str,
+    start_version: int,
+    end_version: Optional[int] = None,
+    *,
+    catalog_uri: str = "sqlite:///:memory:",
+    predicates: Optional[Sequence[PredicateInput]] = None,
+    output: str = "arrow",
+    storage_options: Optional[Dict[str, Any]] = None,
+) -> Any:
+    """
+    Return the rows added and removed by the versions after ``start_version``
+    up to and including ``end_version`` (default: the current version).
+
+    Each version is diffed against the previous one using the catalog alone:
+    files that appear are read as ``"insert"`` rows, files that disappear as
+    ``"delete"`` rows, and rows newly masked by a deletion vector as
+    ``"delete"`` rows. Files shared by both versions are not read. The
+    result carries the committing version in ``_commit_version`` and the
+    kind of change in ``_change_type``; compactions contribute no rows.
+    """
+
+    _validate_output(output)
+    catalog = connect_catalog(catalog_uri, read_only=True)
+    try:
+        dataset = catalog.resolve_dataset(ref_or_name)
+        end_version = dataset.current_version if end_version is None else end_version
+        if start_version < 0 or start_version > end_version:
+            raise DatasetError("start_version must be between 0 and end_version")
+        if end_version > dataset.current_version:
+            raise DatasetError(
+                f"Version {end_version} is newer than the current version "
+                f"{dataset.current_version}"
+            )
+        operations = {
+            entry["version"]: entry["operation"]
+            for entry in catalog.list_transactions_since(dataset.id, start_version - 1)
+            if entry["version"] <= end_version
+        }
+        expected = set(range(max(start_version, 1), end_version + 1))
+        if not expected <= operations.keys():
+            raise DatasetError(
+                f"Versions {start_version}..{end_version} are no longer available "
+                "(expired snapshots)"
+            )
+        file_records = catalog.list_file_records_between(
+            dataset.id, max(start_version, 1), end_version
+        )
+        latest_schema_bytes = catalog.get_latest_schema_bytes(dataset.id)
+        schema_version_bytes = catalog.fetch_schema_versions(
+            sorted(
+                {
+                    record["schema_version_id"]
+                    for record in file_records
+                    if record.get("schema_version_id") is not None
+                }
+            )
+        )
+    finally:
+        catalog.close()
+
+    parsed_predicates = parse_predicates(predicates)
+    storage_options = merge_storage_options(dataset.storage_options, storage_options)
+    schema = deserialize_schema(latest_schema_bytes) if latest_schema_bytes else None
+    fragment_schemas = {
+        schema_id: deserialize_schema(data) for schema_id, data in schema_version_bytes.items()
+    }
+    changes = _plan_changes(
+        catalog_uri, dataset.id, file_records, operations, start_version, parsed_predicates
+    )
+
+    filter_expr = _build_arrow_filter(parsed_predicates)
+    tables: List[pa.Table] = []
+    for (version, change_type), records in changes:
+        table = _build_dataset_from_fragments(
+            records,
+            predicates=parsed_predicates,
+            schema=schema,
+            fragment_schemas=fragment_schemas,
+            storage_options=storage_options,
+        ).to_table(filter=filter_expr)
+        table = table.append_column(
+            CHANGE_VERSION_COLUMN, pa.array([version] * table.num_rows, type=pa.int64())
+        )
+        tables.append(
+            table.append_column(
+                CHANGE_TYPE_COLUMN, pa.array([change_type] * table.num_rows, type=pa.string())
+            )
+        )
+    if not tables:
+        empty_schema = (schema or pa.schema([])).append(
+            pa.field(CHANGE_VERSION_COLUMN, pa.int64())
+        ).append(pa.field(CHANGE_TYPE_COLUMN, pa.string()))
+        return _convert_output(empty_schema.empty_table(), output)
+    return _convert_output(pa.concat_tables(tables, promote_options="default"), output)
+
+
+def _plan_changes(
+    catalog_uri: str,
+    dataset_id: int,
+    file_records: Sequence[dict[str, Any]],
+    operations: Dict[int, str],
+    start_version: int,
+    predicates: Sequence[Predicate],
+) -> List[Tuple[Tuple[int, str], List[dict[str, Any]]]]:
+    """Group the fragments to read by ``(version, change type)``, oldest first."""
+
+    try:
+        pruned = {
+            record["file_id"]: record
+            for record in _prune_files_and_row_groups(
+                catalog_uri=catalog_uri,
+                dataset_id=dataset_id,
+                version=start_version,
+                file_records=file_records,
+                predicates=predicates,
+            )
+        }
+    except DatasetError:
+        return []
+
+    by_version: Dict[int, Dict[str, dict[str, Any]]] = {}
+    for record in file_records:
+        by_version.setdefault(record["version"], {})[record["file_path"]] = record
+
+    changes: List[Tuple[Tuple[int, str], List[dict[str, Any]]]] = []
+    for version in range(start_version + 1, max(operations, default=start_version) + 1):
+        if operations[version] in _DATA_PRESERVING_OPERATIONS:
+            continue
+        previous = by_version.get(version - 1, {})
+        current = by_version.get(version, {})
+        inserted = [
+            pruned[record["id"]]
+            for path, record in current.items()
+            if path not in previous and record["id"] in pruned
+        ]
+        deleted = [
+            pruned[record["id"]]
+            for path, record in previous.items()
+            if path not in current and record["id"] in pruned
+        ]
+        for path in current.keys() & previous.keys():
+            newly_deleted = _newly_deleted_rows(
+                pruned.get(previous[path]["id"]), pruned.get(current[path]["id"])
+            )
+            if newly_deleted is not None:
+                deleted.append(newly_deleted)
+        if inserted:
+            changes.append(((version, "insert"), inserted))
+        if deleted:
+            changes.append(((version, "delete"), deleted))
+    return changes
+
+
+def _newly_deleted_rows(
+    previous: Optional[dict[str, Any]], current: Optional[dict[str, Any]]
+) -> Optional[dict[str, Any]]:
+    """
+    A fragment record that reads only the rows of a carried-forward file
+    masked by ``current``'s deletion vector but not by ``previous``'s.
+    """
+
+    if current is None or current.get("deletion_vector") is None:
+        return None
+    deleted = _decode_deletion_vector(current["deletion_vector"])
+    if previous is not None and previous.get("deletion_vector") is not None:
+        already_deleted = _decode_deletion_vector(previous["deletion_vector"])
+        deleted = pc.and_(deleted, pc.invert(already_deleted))
+    if not pc.any(deleted).as_py():
+        return None
+    return dict(current, deletion_vector=_encode_deletion_vector(pc.invert(deleted)))
+
+
+_OUTPUT_FORMATS = ("arrow", "pandas", "polars")
+
+
+def _validate_output(output: str) -> None:
+    if output not in _OUTPUT_FORMATS:
+        raise DatasetError(
+            f"Unsupported output '{output}'; expected one of {', '.join(_OUTPUT_FORMATS)}"
+        )
+    if output == "pandas" and pd is None:
+        raise DatasetError("output='pandas' requires the 'pandas' package to be installed")
+    if output == "polars" and pl is None:
+        raise DatasetError("output='polars' requires the 'polars' package to be installed")
+
+
+def _convert_output(table: pa.Table, output: str) -> Any:
+    """Convert a freshly scanned table; see ``_convert_batches``."""
+
+    if output == "arrow":
+        return table
+    return _convert_batches(table.to_batches(), table.schema, output)
+
+
+def _convert_batches(
+    batches: Iterable[pa.RecordBatch], schema: pa.Schema, output: str
+) -> Any:
+    """
+    Convert record batches one at a time as the scanner produces them, so
+    peak memory stays near one copy of the data.
+
+    Pandas columns are backed by ``pd.ArrowDtype`` so each batch is wrapped
+    rather than copied; ``split_blocks``/``self_destruct`` release its Arrow
+    buffers column by column for anything that still needs a copy, and the
+    per-batch frames are concatenated into chunked columns. Polars adopts
+    each batch as-is and concatenates without rechunking.
+    """
+
+    if output == "pandas":
+        frames = [
+            batch.to_pandas(split_blocks=True, self_destruct=True, types_mapper=pd.ArrowDtype)
+            for batch in batches
+        ]
+        if not frames:
+            return schema.empty_table().to_pandas(types_mapper=pd.ArrowDtype)
+        return pd.concat(frames, ignore_index=True) if len(frames) > 1 else frames[0]
+    if output == "polars":
+        frames = [pl.from_arrow(batch, rechunk=False) for batch in batches]
+        if not frames:
+            return pl.from_arrow(schema.empty_table())
+        return pl.concat(frames, rechunk=False) if len(frames) > 1 else frames[0]
+    return pa.Table.from_batches(batches, schema=schema)
+
+
+def head(
+    ref_or_name: DatasetRef | str,
+    n: int = 10,
+    *,
+    catalog_uri: str = "sqlite:///:memory:",
+    version: Optional[int] = None,
+    as_of: Optional[datetime] = None,
+    predicates: Optional[Sequence[PredicateInput]] = None,
+    output: str = "arrow",
+    storage_options: Optional[Dict[str, Any]] = None,
+) -> Any:
+    """Return the first ``n`` rows of a dataset version."""
+
+    return read_dataset(
+        ref_or_name,
+        catalog_uri=catalog_uri,
+        version=version,
+        as_of=as_of,
+        predicates=predicates,
+        limit=n,
+        output=output,
+        storage_options=storage_options,
+    )
+
+
+def sample(
+    ref_or_name: DatasetRef | str,
+    *,
+    fraction: Optional[float] = None,
+    n: Optional[int] = None,
+    seed: Optional[int] = None,
+    stratify: bool = False,
+    catalog_uri: str = "sqlite:///:memory:",
+    version: Optional[int] = None,
+    as_of: Optional[datetime] = None,
+    predicates: Optional[Sequence[PredicateInput]] = None,
+    output: str = "arrow",
+    storage_options: Optional[Dict[str, Any]] = None,
+) -> Any:
+    """
+    Read an approximate random sample of a dataset version.
+
+    Whole row groups are drawn in random order until the catalog's
+    ``row_count`` says the requested number of rows is covered, so only the
+    sampled row groups are fetched from storage; surplus rows are then dropped
+    at random. With ``stratify=True`` the draw and the trim are done
+    independently inside each partition, in proportion to its size.
+    """
+
+    if (fraction is None) == (n is None):
+        raise DatasetError("Exactly one of 'fraction' or 'n' must be provided")
+    if fraction is not None and not 0 < fraction <= 1:
+        raise DatasetError("fraction must be in the interval (0, 1]")
+    if n is not None and n < 0:
+        raise DatasetError("n must be a non-negative integer")
+    _validate_output(output)
+
+    snapshot = _open_snapshot(
+        ref_or_name,
+        catalog_uri=catalog_uri,
+        version=version,
+        as_of=as_of,
+        storage_options=storage_options,
+    )
+    parsed_predicates = parse_predicates(predicates)
+    pruned_files = _prune_files_and_row_groups(
+        catalog_uri=catalog_uri,
+        dataset_id=snapshot.dataset.id,
+        version=snapshot.version,
+        file_records=snapshot.file_records,
+        predicates=parsed_predicates,
+    )
+    rng = random.Random(seed)
+    strata = _sample_row_groups(
+        pruned_files,
+        fraction=fraction,
+        n=n,
+        rng=rng,
+        stratify=stratify,
+    )
+
+    def build(files: Sequence[dict[str, Any]]) -> ds.Dataset:
+        return _build_dataset_from_fragments(
+            files,
+            predicates=parsed_predicates,
+            schema=snapshot.schema,
+            fragment_schemas=snapshot.fragment_schemas,
+            storage_options=snapshot.storage_options,
+        )
+
+    if not strata:
+        return _convert_output(build(pruned_files[:1]).head(0), output)
+    filter_expr = _build_arrow_filter(parsed_predicates)
+    tables = []
+    for sampled_files, target_rows in strata:
+        table = build(sampled_files).to_table(filter=filter_expr)
+        # Row groups overshoot the target; drop surplus rows uniformly at
+        # random. Predicates shrink the row groups by an unknown amount, so
+        # their target is not comparable and every matching row is kept.
+        if not parsed_predicates and table.num_rows > target_rows:
+            keep = sorted(rng.sample(range(table.num_rows), target_rows))
+            table = table.take(pa.array(keep, type=pa.int64()))
+        tables.append(table)
+    return _convert_output(pa.concat_tables(tables), output)
+
+
+def _sample_row_groups(
+    pruned_files: Sequence[dict[str, Any]],
+    *,
+    fraction: Optional[float],
+    n: Optional[int],
+    rng: random.Random,
+    stratify: bool,
+) -> List[Tuple[List[dict[str, Any]], int]]:
+    """Pick row groups per stratum; return each stratum's files and row target."""
+
+    strata: Dict[Tuple[Tuple[str, str], ...], List[Tuple[int, int, int]]] = {}
+    for position, record in enumerate(pruned_files):
+        row_counts: Dict[int, Optional[int]] = record.get("row_group_row_counts") or {}
+        if not row_counts or any(count is None for count in row_counts.values()):
+            raise DatasetError(
+                f"Sampling requires row-group row counts for '{record['file_path']}'"
+            )
+        indices = record.get("row_groups")
+        if indices is None:
+            indices = sorted(row_counts)
+        key = (
+            tuple(sorted((record.get("partitions") or {}).items())) if stratify else ()
+        )
+        units = strata.setdefault(key, [])
+        for index in indices:
+            units.append((position, index, row_counts[index] or 0))
+
+    total_rows = sum(count for units in strata.values() for _, _, count in units)
+    if n is not None:
+        target_rows = min(n, total_rows)
+    else:
+        target_rows = math.ceil(total_rows * (fraction or 0))
+
+    sampled: List[Tuple[List[dict[str, Any]], int]] = []
+    for units in strata.values():
+        stratum_rows = sum(count for _, _, count in units)
+        if total_rows == 0 or stratum_rows == 0:
+            continue
+        stratum_target = math.ceil(target_rows * stratum_rows / total_rows)
+        selected: Dict[int, List[int]] = {}
+        covered = 0
+        for position, index, count in rng.sample(units, len(units)):
+            if covered >= stratum_target:
+                break
+            selected.setdefault(position, []).append(index)
+            covered += count
+        if selected:
+            files = [
+                dict(pruned_files[position], row_groups=sorted(indices))
+                for position, indices in sorted(selected.items())
+            ]
+            sampled.append((files, stratum_target))
+    return sampled
+
+
+def _limit_fragments(
+    pruned_files: Sequence[dict[str, Any]],
+    limit: int,
+) -> List[dict[str, Any]]:
+    """
+    Keep only the leading files/row groups needed to produce ``limit`` rows.
+
+    Relies on the catalog's per-row-group ``row_count``; as soon as a count is
+    unknown the remaining files are kept untouched so the scan stays correct.
+    """
+
+    if not pruned_files:
+        return []
+    if limit == 0:
+        # Keep one fragment so the resulting dataset still carries a schema.
+        return [pruned_files[0]]
+
+    result: List[dict[str, Any]] = []
+    remaining = limit
+    for position, record in enumerate(pruned_files):
+        row_counts: Dict[int, Optional[int]] = record.get("row_group_row_counts") or {}
+        if not row_counts or any(count is None for count in row_counts.values()):
+            result.extend(pruned_files[position:])
+            break
+        if record.get("deletion_vector") is not None:
+            # Deleted rows make the cataloged counts an overestimate.
+            result.append(record)
+            continue
+
+        indices = record.get("row_groups")
+        if indices is None:
+            indices = sorted(row_counts)
+
+        selected: List[int] = []
+        for index in indices:
+            selected.append(index)
+            remaining -= row_counts.get(index) or 0
+            if remaining <= 0:
+                break
+
+        if len(selected) < len(indices):
+            record = dict(record, row_groups=selected)
+        result.append(record)
+        if remaining <= 0:
+            break
+
+    return result
 
 
 def _prune_files_and_row_groups(
@@ -301,28 +1465,18 @@ def _prune_files_and_row_groups(
     predicates: Sequence[Predicate],
 ) -> List[dict[str, Any]]:
     partition_map: Dict[int, Dict[str, str]] = {}
-    row_group_map: Dict[int, List[dict[str, Any]]] = {}
 
-    catalog = connect_catalog(catalog_uri)
+    catalog = connect_catalog(catalog_uri, read_only=True)
     try:
         file_ids = [record["id"] for record in file_records]
         partition_map = catalog.fetch_partitions_for_files(file_ids)
-        row_group_map = catalog.fetch_row_groups_for_files(file_ids)
+        row_groups = catalog.fetch_row_groups_table(file_ids)
+        deletion_vectors = catalog.fetch_deletion_vectors(file_ids)
     finally:
         catalog.close()
 
-    if not predicates:
-        return [
-            {
-                "file_id": record["id"],
-                "file_path": record["file_path"],
-                "row_groups": None,
-                "partitions": partition_map.get(record["id"], {}),
-                "stats": _compute_file_stats(row_group_map.get(record["id"], [])),
-            }
-            for record in file_records
-        ]
-
+    row_group_map = _split_row_groups(row_groups)
+    no_row_groups: _RowGroupColumns = {name: [] for name in row_groups.column_names[1:]}
     eq_partition_filters = {
         pred.column: pred.value for pred in predicates if pred.op == "=="
     }
@@ -330,33 +1484,70 @@ def _prune_files_and_row_groups(
     result: List[dict[str, Any]] = []
     for record in file_records:
         file_id = record["id"]
-        file_path = record["file_path"]
         partitions = partition_map.get(file_id, {})
+        file_row_groups = row_group_map.get(file_id, no_row_groups)
 
-        if not _partitions_match(partition_map.get(file_id, {}), eq_partition_filters):
-            continue
-
-        selected_row_groups = _filter_row_groups(
-            row_group_map.get(file_id, []), predicates
-        )
-        if selected_row_groups is not None and not selected_row_groups:
-            continue
+        selected_row_groups = None
+        if predicates:
+            if not _partitions_match(partitions, eq_partition_filters):
+                continue
+            selected_row_groups = _filter_row_groups(file_row_groups, predicates)
+            if selected_row_groups is not None and not selected_row_groups:
+                continue
 
         result.append(
             {
                 "file_id": file_id,
-                "file_path": file_path,
+                "file_path": record["file_path"],
                 "row_groups": selected_row_groups,
                 "partitions": partitions,
-                "stats": _compute_file_stats(row_group_map.get(file_id, [])),
+                "stats": _compute_file_stats(file_row_groups),
+                "row_group_row_counts": _row_group_row_counts(file_row_groups),
+                "row_group_byte_ranges": _row_group_byte_ranges(file_row_groups),
+                "file_size_bytes": record.get("file_size_bytes"),
+                "footer_length": record.get("footer_length"),
+                "schema_version_id": record.get("schema_version_id"),
+                "deletion_vector": deletion_vectors.get(file_id),
             }
         )
 
-    if not result:
+    if predicates and not result:
         raise DatasetError("No data matches the provided predicates")
     return result
 
 
+# Cataloged row groups of one file, column-wise (``fetch_row_groups_table``
+# columns without ``file_id``).
+_RowGroupColumns = Dict[str, List[Any]]
+
+
+def _split_row_groups(table: pa.Table) -> Dict[int, _RowGroupColumns]:
+    """Slice the row-group table (ordered by ``file_id``) into per-file columns."""
+
+    runs = pc.run_end_encode(table.column("file_id").combine_chunks())
+    columns = table.drop_columns(["file_id"]).to_pydict()
+    result: Dict[int, _RowGroupColumns] = {}
+    start = 0
+    for file_id, stop in zip(runs.values.to_pylist(), runs.run_ends.to_pylist()):
+        result[file_id] = {name: values[start:stop] for name, values in columns.items()}
+        start = stop
+    return result
+
+
+def _row_group_row_counts(row_groups: _RowGroupColumns) -> Dict[int, Optional[int]]:
+    return dict(zip(row_groups["row_group_index"], row_groups["row_count"]))
+
+
+def _row_group_byte_ranges(row_groups: _RowGroupColumns) -> Dict[int, Tuple[int, int]]:
+    return {
+        index: (offset, length)
+        for index, offset, length in zip(
+            row_groups["row_group_index"], row_groups["byte_offset"], row_groups["byte_length"]
+        )
+        if offset is not None and length is not None
+    }
+
+
 def _partitions_match(
     file_partitions: Dict[str, str],
     equality_filters: Dict[str, Any],
@@ -371,30 +1562,22 @@ def _partitions_match(
 
 
 def _filter_row_groups(
-    row_group_records: Sequence[dict[str, Any]],
+    row_groups: _RowGroupColumns,
     predicates: Sequence[Predicate],
 ) -> Optional[List[int]]:
-    if not predicates or not row_group_records:
+    if not predicates or not row_groups["row_group_index"]:
         return None
 
     selected: List[int] = []
-    for record in row_group_records:
-        stats_min = (
-            json.loads(record["stats_min_json"]) if record.get("stats_min_json") else {}
-        )
-        stats_max = (
-            json.loads(record["stats_max_json"]) if record.get("stats_max_json") else {}
-        )
-
-        matches_all = True
-        for predicate in predicates:
-            if not _row_group_matches(stats_min, stats_max, predicate):
-                matches_all = False
-                break
-        if matches_all:
-            selected.append(record.get("row_group_index", 0))
+    for index, min_json, max_json in zip(
+        row_groups["row_group_index"], row_groups["stats_min_json"], row_groups["stats_max_json"]
+    ):
+        stats_min = json.loads(min_json) if min_json else {}
+        stats_max = json.loads(max_json) if max_json else {}
+        if all(_row_group_matches(stats_min, stats_max, predicate) for predicate in predicates):
+            selected.append(index)
 
-    return selected if selected else None
+    return selected
 
 
 def _row_group_matches(
@@ -421,62 +1604,303 @@ def _row_group_matches(
     return True
 
 
+# Arrow reads this many trailing bytes when it opens a Parquet file and only
+# issues a second request when the footer is longer.
+PARQUET_FOOTER_READ_SIZE = 64 * 1024
+
+_LOCAL_PROTOCOLS = {"file", "local", "memory"}
+
+
+def _should_prefetch(
+    prefetch: Optional[bool],
+    pruned_files: Sequence[dict[str, Any]],
+    storage_options: Optional[Dict[str, Any]] = None,
+) -> bool:
+    if prefetch is not None:
+        return prefetch
+    handle = resolve_filesystem(pruned_files[0]["file_path"], storage_options=storage_options)
+    return handle.protocol not in _LOCAL_PROTOCOLS
+
+
+def _prefetch_files(
+    pruned_files: Sequence[dict[str, Any]],
+    *,
+    row_groups: bool,
+    storage_options: Optional[Dict[str, Any]] = None,
+) -> Dict[str, RangeCachedFile]:
+    """
+    Fetch the footers (and with ``row_groups`` the selected row groups) of
+    every file in one batch of concurrent ranged reads, using the offsets
+    cataloged at write time. Files without a recorded size are skipped and
+    opened normally.
+    """
+
+    handle = resolve_filesystem(pruned_files[0]["file_path"], storage_options=storage_options)
+    sizes: Dict[str, int] = {}
+    requests: Dict[str, List[Tuple[int, int]]] = {}
+    for record in pruned_files:
+        size = record.get("file_size_bytes")
+        if not size:
+            continue
+        path = resolve_filesystem(record["file_path"], storage_options=storage_options).root_path
+        tail = max(PARQUET_FOOTER_READ_SIZE, record.get("footer_length") or 0)
+        ranges = [(max(size - tail, 0), size)]
+        if row_groups:
+            byte_ranges = record.get("row_group_byte_ranges") or {}
+            selected = record.get("row_groups")
+            for index in byte_ranges if selected is None else selected:
+                if index in byte_ranges:
+                    offset, length = byte_ranges[index]
+                    ranges.append((offset, offset + length))
+        sizes[path] = size
+        requests[path] = ranges
+
+    fetched = fetch_ranges(handle.filesystem, requests)
+    return {
+        path: RangeCachedFile(handle.filesystem, path, sizes[path], fetched.get(path, ()))
+        for path in requests
+    }
+
+
 def _build_dataset_from_fragments(
     pruned_files: Sequence[dict[str, Any]],
     predicates: Sequence[Predicate],
+    schema: Optional[pa.Schema] = None,
+    fragment_schemas: Optional[Dict[int, pa.Schema]] = None,
+    prefetched: Optional[Dict[str, RangeCachedFile]] = None,
+    storage_options: Optional[Dict[str, Any]] = None,
 ) -> ds.Dataset:
     if not pruned_files:
         raise DatasetError("No data matches the provided predicates")
 
-    first_handle = resolve_filesystem(pruned_files[0]["file_path"])
-    arrow_fs = _to_arrow_fs(first_handle)
+    first_handle = resolve_filesystem(
+        pruned_files[0]["file_path"], storage_options=storage_options
+    )
+    arrow_fs = arrow_filesystem(first_handle)
     format = ds.ParquetFileFormat()
 
-    fragments: List[ds.ParquetFileFragment] = []
-    schema: Optional[pa.Schema] = None
     partition_field_names: set[str] = set()
+    for record in pruned_files:
+        partition_field_names.update((record.get("partitions") or {}).keys())
+
+    if schema is not None:
+        for field_name in sorted(partition_field_names):
+            if schema.get_field_index(field_name) == -1:
+                schema = schema.append(pa.field(field_name, pa.string()))
+        _check_fragment_schemas(pruned_files, schema, fragment_schemas or {})
 
+    fragments: List[ds.ParquetFileFragment] = []
+    masked: List[Tuple[ds.ParquetFileFragment, pa.BooleanArray]] = []
     for record in pruned_files:
-        handle = resolve_filesystem(record["file_path"])
+        handle = resolve_filesystem(record["file_path"], storage_options=storage_options)
         if handle.protocol != first_handle.protocol:
             raise DatasetError(
                 "Mixed storage backends within a single version are not supported yet"
             )
 
-        partition_field_names.update((record.get("partitions") or {}).keys())
-
         fragment_expr = _build_fragment_expression(
             record.get("partitions") or {},
             record.get("stats") or {},
+            schema,
         )
-        fragment = format.make_fragment(
-            handle.root_path,
-            filesystem=arrow_fs,
-            partition_expression=fragment_expr,
-            row_groups=record.get("row_groups"),
-        )
-        fragments.append(fragment)
-        schema = schema or fragment.physical_schema
-
-    if not fragments or schema is None:
-        raise DatasetError("Unable to build fragments for dataset")
+        cached = (prefetched or {}).get(handle.root_path)
+
+        def make_fragment(row_groups: Optional[List[int]]) -> ds.ParquetFileFragment:
+            if cached is not None:
+                return format.make_fragment(
+                    pa.PythonFile(cached, mode="r"),
+                    partition_expression=fragment_expr,
+                    row_groups=row_groups,
+                )
+            return format.make_fragment(
+                handle.root_path,
+                filesystem=arrow_fs,
+                partition_expression=fragment_expr,
+                row_groups=row_groups,
+                file_size=record.get("file_size_bytes"),
+            )
 
-    for field_name in partition_field_names:
-        if schema.get_field_index(field_name) == -1:
-            schema = schema.append(pa.field(field_name, pa.string()))
+        if record.get("deletion_vector") is None:
+            fragments.append(make_fragment(record.get("row_groups")))
+            continue
+        # Row groups without deleted rows stay lazy; only the others are
+        # scanned with the deletion mask below.
+        clean, dirty, deleted = _split_masked_row_groups(record)
+        if clean:
+            fragments.append(make_fragment(clean))
+        if dirty is None or dirty:
+            masked.append((make_fragment(dirty), deleted))
+
+    if schema is None:
+        # Files written before schema versions were cataloged: fall back to the
+        # footer of the first fragment.
+        footer_fragments = fragments or [fragment for fragment, _ in masked]
+        if not footer_fragments:
+            raise DatasetError("Unable to build fragments for dataset")
+        schema = footer_fragments[0].physical_schema
+        for field_name in partition_field_names:
+            if schema.get_field_index(field_name) == -1:
+                schema = schema.append(pa.field(field_name, pa.string()))
 
     dataset = ds.FileSystemDataset(fragments, schema, format, arrow_fs)
-    return dataset
+    if not masked:
+        return dataset
+
+    # Arrow datasets have no row-position column, so the row groups holding
+    # deleted rows are scanned here, batch by batch, and only their live rows
+    # matching ``predicates`` are kept in memory.
+    filter_expr = _build_arrow_filter(predicates)
+    batches = [
+        batch
+        for fragment, deleted in masked
+        for batch in _masked_batches(fragment, deleted, schema, filter_expr)
+    ]
+    in_memory = ds.InMemoryDataset(batches or schema.empty_table(), schema=schema)
+    return ds.dataset([dataset, in_memory]) if fragments else in_memory
+
+
+def _encode_deletion_vector(deleted: pa.BooleanArray) -> dict[str, Any]:
+    """
+    Encode a per-row deletion mask (file order, no nulls, zero offset) as a
+    zlib-compressed Arrow bitmap; sparse deletes compress to a few bytes.
+    """
+
+    return {
+        "row_count": len(deleted),
+        "deleted_count": deleted.true_count,
+        "bitmap": zlib.compress(deleted.buffers()[1].to_pybytes()),
+    }
+
+
+def _decode_deletion_vector(vector: dict[str, Any]) -> pa.BooleanArray:
+    return pa.BooleanArray.from_buffers(
+        pa.bool_(),
+        vector["row_count"],
+        [None, pa.py_buffer(zlib.decompress(vector["bitmap"]))],
+    )
+
+
+def _row_group_slices(record: dict[str, Any]) -> Optional[List[Tuple[int, int]]]:
+    """
+    ``(offset, length)`` of each scanned row group within its file, in scan
+    order; ``None`` when the whole file is scanned.
+    """
+
+    row_counts: Dict[int, Optional[int]] = record.get("row_group_row_counts") or {}
+    selected = record.get("row_groups")
+    if selected is None or not row_counts or any(c is None for c in row_counts.values()):
+        return None
+    offsets: Dict[int, int] = {}
+    position = 0
+    for index in sorted(row_counts):
+        offsets[index] = position
+        position += row_counts[index] or 0
+    # Arrow scans a fragment's row groups in file order, whatever the order
+    # they were selected in.
+    return [(offsets[index], row_counts[index] or 0) for index in sorted(selected)]
+
+
+def _split_masked_row_groups(
+    record: dict[str, Any],
+) -> Tuple[List[int], Optional[List[int]], pa.BooleanArray]:
+    """
+    Split the scanned row groups of a file with a deletion vector into those
+    without deleted rows and those with some, and return the deletion mask
+    of the latter's rows in scan order. Row groups deleted entirely are
+    dropped. Without cataloged row counts the selection cannot be split and
+    is returned whole.
+    """
+
+    deleted = _decode_deletion_vector(record["deletion_vector"])
+    row_counts: Dict[int, Optional[int]] = record.get("row_group_row_counts") or {}
+    selected = record.get("row_groups")
+    if not row_counts or any(count is None for count in row_counts.values()):
+        return [], selected, deleted
+
+    offsets: Dict[int, int] = {}
+    position = 0
+    for index in sorted(row_counts):
+        offsets[index] = position
+        position += row_counts[index] or 0
+    clean: List[int] = []
+    dirty: List[int] = []
+    masks: List[pa.BooleanArray] = []
+    for index in sorted(row_counts if selected is None else selected):
+        mask = deleted.slice(offsets[index], row_counts[index])
+        if not mask.true_count:
+            clean.append(index)
+        elif mask.true_count < len(mask):
+            dirty.append(index)
+            masks.append(mask)
+    return clean, dirty, pa.concat_arrays(masks or [pa.array([], pa.bool_())])
+
+
+def _masked_batches(
+    fragment: ds.ParquetFileFragment,
+    deleted: pa.BooleanArray,
+    schema: pa.Schema,
+    filter_expr: Optional[ds.Expression],
+) -> Iterator[pa.RecordBatch]:
+    """
+    Scan ``fragment`` in file order and drop the rows flagged in ``deleted``
+    batch by batch; ``filter_expr`` is applied afterwards because filtering
+    during the scan would shift the positions the mask refers to.
+    """
+
+    position = 0
+    for batch in ds.Scanner.from_fragment(fragment, schema=schema).to_batches():
+        keep = pc.invert(deleted.slice(position, batch.num_rows))
+        position += batch.num_rows
+        batch = batch.filter(keep)
+        if filter_expr is not None:
+            batch = batch.filter(filter_expr)
+        if batch.num_rows:
+            yield batch
+
+
+def _check_fragment_schemas(
+    pruned_files: Sequence[dict[str, Any]],
+    schema: pa.Schema,
+    fragment_schemas: Dict[int, pa.Schema],
+) -> None:
+    """
+    Validate that every file's cataloged schema can be projected onto the read
+    schema. Missing columns are filled with nulls and narrower types are cast
+    by the scanner, so the check runs once per schema version, not per file.
+    """
+
+    checked: set[int] = set()
+    for record in pruned_files:
+        schema_version_id = record.get("schema_version_id")
+        if schema_version_id is None or schema_version_id in checked:
+            continue
+        checked.add(schema_version_id)
+        physical = fragment_schemas.get(schema_version_id)
+        if physical is None:
+            continue
+        for field in physical:
+            index = schema.get_field_index(field.name)
+            if index == -1 or field.type.equals(schema.field(index).type):
+                continue
+            target_type = schema.field(index).type
+            try:
+                pa.array([], type=field.type).cast(target_type)
+            except (pa.ArrowInvalid, pa.ArrowNotImplementedError) as exc:
+                raise DatasetError(
+                    f"Column '{field.name}' of schema version {schema_version_id} "
+                    f"cannot be read as '{target_type}'"
+                ) from exc
 
 
 def _build_fragment_expression(
     partitions: Dict[str, str],
     stats: Dict[str, Dict[str, Any]],
+    schema: Optional[pa.Schema] = None,
 ) -> Optional[ds.Expression]:
     expression: Optional[ds.Expression] = None
 
     for key, value in partitions.items():
-        part_expr = ds.field(key) == value
+        part_expr = ds.field(key) == _partition_scalar(value, key, schema)
         expression = part_expr if expression is None else expression & part_expr
 
     for column, bounds in stats.items():
@@ -492,6 +1916,18 @@ def _build_fragment_expression(
     return expression
 
 
+def _partition_scalar(value: str, key: str, schema: Optional[pa.Schema]) -> Any:
+    if schema is None or schema.get_field_index(key) == -1:
+        return value
+    target_type = schema.field(key).type
+    if pa.types.is_string(target_type):
+        return value
+    try:
+        return pa.scalar(value).cast(target_type)
+    except (pa.ArrowInvalid, pa.ArrowNotImplementedError):
+        return value
+
+
 def _build_arrow_filter(predicates: Sequence[Predicate]) -> Optional[ds.Expression]:
     expression: Optional[ds.Expression] = None
     for predicate in predicates:
@@ -514,17 +1950,11 @@ def _build_arrow_filter(predicates: Sequence[Predicate]) -> Optional[ds.Expressi
     return expression
 
 
-def _compute_file_stats(
-    row_group_records: Sequence[dict[str, Any]],
-) -> Dict[str, Dict[str, Any]]:
+def _compute_file_stats(row_groups: _RowGroupColumns) -> Dict[str, Dict[str, Any]]:
     stats: Dict[str, Dict[str, Any]] = {}
-    for record in row_group_records:
-        stats_min = (
-            json.loads(record["stats_min_json"]) if record.get("stats_min_json") else {}
-        )
-        stats_max = (
-            json.loads(record["stats_max_json"]) if record.get("stats_max_json") else {}
-        )
+    for min_json, max_json in zip(row_groups["stats_min_json"], row_groups["stats_max_json"]):
+        stats_min = json.loads(min_json) if min_json else {}
+        stats_max = json.loads(max_json) if max_json else {}
         for key, value in stats_min.items():
             entry = stats.setdefault(key, {"min": value, "max": value})
             existing_min = entry.get("min")
@@ -0,0 +1,143 @@
+"""
+Engine integration helpers.
+
+Each helper resolves the catalog-pruned ``FileSystemDataset`` for a dataset
+version and hands it to an engine through its Arrow dataset scan API. Filters
+and projections expressed on the engine side are pushed down into the Arrow
+scanner, which skips fragments via their partition/statistics expressions and
+Parquet row groups via footer statistics.
+"""
+
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Any, Dict, Optional, Sequence, cast
+
+import pyarrow.dataset as ds
+
+from .catalog import DatasetRef
+from .dataset import DatasetError, PredicateInput, read_dataset
+
+try:  # optional dependency
+    import duckdb  # type: ignore
+except Exception:  # pragma: no cover - duckdb optional
+    duckdb = None  # type: ignore
+
+try:  # optional dependency
+    import polars as pl  # type: ignore
+except Exception:  # pragma: no cover - polars optional
+    pl = None  # type: ignore
+
+try:  # optional dependency
+    import datafusion  # type: ignore
+except Exception:  # pragma: no cover - datafusion optional
+    datafusion = None  # type: ignore
+
+
+__all__ = ["scan_polars", "to_datafusion", "to_duckdb"]
+
+
+def to_duckdb(
+    ref_or_name: DatasetRef | str,
+    *,
+    catalog_uri: str = "sqlite:///:memory:",
+    version: Optional[int] = None,
+    as_of: Optional[datetime] = None,
+    predicates: Optional[Sequence[PredicateInput]] = None,
+    connection: Any = None,
+    table_name: Optional[str] = None,
+    storage_options: Optional[Dict[str, Any]] = None,
+) -> Any:
+    """
+    Return a DuckDB relation over the pruned dataset.
+
+    When ``table_name`` is given the dataset is also registered as a view on
+    ``connection`` so it can be referenced from SQL.
+    """
+
+    if duckdb is None:  # pragma: no cover - optional dependency
+        raise DatasetError("to_duckdb requires the 'duckdb' package to be installed")
+
+    dataset_obj = _pruned_dataset(
+        ref_or_name, catalog_uri, version, as_of, predicates, storage_options
+    )
+    connection = connection if connection is not None else duckdb.connect()
+    if table_name:
+        connection.register(table_name, dataset_obj)
+        return connection.view(table_name)
+    return connection.from_arrow(dataset_obj)
+
+
+def scan_polars(
+    ref_or_name: DatasetRef | str,
+    *,
+    catalog_uri: str = "sqlite:///:memory:",
+    version: Optional[int] = None,
+    as_of: Optional[datetime] = None,
+    predicates: Optional[Sequence[PredicateInput]] = None,
+    storage_options: Optional[Dict[str, Any]] = None,
+) -> Any:
+    """Return a Polars ``LazyFrame`` scanning the pruned dataset."""
+
+    if pl is None:  # pragma: no cover - optional dependency
+        raise DatasetError("scan_polars requires the 'polars' package to be installed")
+
+    dataset_obj = _pruned_dataset(
+        ref_or_name, catalog_uri, version, as_of, predicates, storage_options
+    )
+    return pl.scan_pyarrow_dataset(dataset_obj)
+
+
+def to_datafusion(
+    ref_or_name: DatasetRef | str,
+    *,
+    catalog_uri: str = "sqlite:///:memory:",
+    version: Optional[int] = None,
+    as_of: Optional[datetime] = None,
+    predicates: Optional[Sequence[PredicateInput]] = None,
+    context: Any = None,
+    table_name: Optional[str] = None,
+    storage_options: Optional[Dict[str, Any]] = None,
+) -> Any:
+    """
+    Register the pruned dataset on a DataFusion ``SessionContext`` and return
+    the corresponding DataFrame.
+
+    ``table_name`` defaults to the dataset name (or ``"dataset"`` when the
+    reference only carries a URI).
+    """
+
+    if datafusion is None:  # pragma: no cover - optional dependency
+        raise DatasetError(
+            "to_datafusion requires the 'datafusion' package to be installed"
+        )
+
+    dataset_obj = _pruned_dataset(
+        ref_or_name, catalog_uri, version, as_of, predicates, storage_options
+    )
+    context = context if context is not None else datafusion.SessionContext()
+    name = table_name or DatasetRef.from_legacy(ref_or_name).name or "dataset"
+    context.register_dataset(name, dataset_obj)
+    return context.table(name)
+
+
+def _pruned_dataset(
+    ref_or_name: DatasetRef | str,
+    catalog_uri: str,
+    version: Optional[int],
+    as_of: Optional[datetime],
+    predicates: Optional[Sequence[PredicateInput]],
+    storage_options: Optional[Dict[str, Any]],
+) -> ds.Dataset:
+    return cast(
+        ds.Dataset,
+        read_dataset(
+            ref_or_name,
+            catalog_uri=catalog_uri,
+            version=version,
+            as_of=as_of,
+            predicates=predicates,
+            as_dataset=True,
+            storage_options=storage_options,
+        ),
+    )
@@ -0,0 +1,550 @@
+"""
+Table maintenance operations.
+
+Maintenance never edits a committed version in place: it writes new files
+where needed and commits a new version whose file records replace the old
+ones, so readers pinned to an earlier version keep working.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import logging
+import re
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterator, List, Mapping, Optional, Sequence, Tuple
+
+from .catalog import DatasetRef, connect_catalog
+from .dataset import (
+    DatasetError,
+    _build_dataset_from_fragments,
+    _dataset_filesystem,
+    _open_snapshot,
+    _prepare_write_destination,
+    _prune_files_and_row_groups,
+    _register_write_intent,
+    _Snapshot,
+    _write_profile,
+    _write_table_files,
+)
+from .schema_manager import serialize_schema
+from .storage import FileSystemHandle
+
+__all__ = [
+    "CompactionResult",
+    "DEFAULT_RETENTION",
+    "DEFAULT_TARGET_FILE_SIZE",
+    "DEFAULT_RECOVERY_AGE",
+    "ExpireSnapshotsResult",
+    "RecoveryResult",
+    "VacuumResult",
+    "compact_dataset",
+    "expire_snapshots",
+    "recover",
+    "vacuum",
+]
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TARGET_FILE_SIZE = 128 * 1024 * 1024
+DEFAULT_RETENTION = timedelta(days=7)
+DEFAULT_RECOVERY_AGE = timedelta(hours=1)
+
+# Paths per ``fs.rm`` call; S3 caps a bulk delete request at 1000 keys.
+_DELETE_BATCH = 1000
+_VERSION_DIR = re.compile(r"^v\d+$")
+
+
+@dataclass
+class CompactionResult:
+    dataset_ref: DatasetRef
+    version: int
+    files_removed: Sequence[str] = ()
+    files_added: Sequence[str] = ()
+
+
+@dataclass
+class VacuumResult:
+    dataset_ref: DatasetRef
+    deleted_files: List[str] = field(default_factory=list)
+    retained_files: List[str] = field(default_factory=list)
+    errors: List[str] = field(default_factory=list)
+    dry_run: bool = False
+
+
+@dataclass
+class ExpireSnapshotsResult:
+    dataset_ref: DatasetRef
+    expired_through: Optional[int] = None
+    versions_expired: int = 0
+    files_tombstoned: int = 0
+
+
+@dataclass
+class RecoveryResult:
+    dataset_ref: DatasetRef
+    intents_resolved: int = 0
+    tombstoned_files: List[str] = field(default_factory=list)
+    dry_run: bool = False
+
+
+def compact_dataset(
+    ref_or_name: DatasetRef | str,
+    *,
+    catalog_uri: str = "sqlite:///:memory:",
+    target_file_size: int = DEFAULT_TARGET_FILE_SIZE,
+    partition_filter: Optional[Mapping[str, Any]] = None,
+    sort_by: Optional[Sequence[str]] = None,
+    max_workers: Optional[int] = None,
+    storage_options: Optional[Dict[str, Any]] = None,
+) -> CompactionResult:
+    """
+    Rewrite the small files of the current version into fewer, larger files.
+
+    Files smaller than ``target_file_size`` are bin-packed per partition
+    (first-fit decreasing on the cataloged file sizes) and every bin holding
+    more than one file is rewritten as a single file, optionally sorted by
+    ``sort_by``. Files carrying a deletion vector are always rewritten so the
+    deleted rows are dropped for good. Bins are rewritten concurrently on a
+    thread pool. The new files and the untouched records are committed as
+    one new version; if any other commit lands first, CommitConflictError is
+    raised and the rewritten files are left for vacuum.
+
+    ``partition_filter`` restricts compaction to partitions whose values
+    equal the given mapping.
+    """
+
+    if target_file_size <= 0:
+        raise DatasetError("target_file_size must be a positive number of bytes")
+
+    snapshot = _open_snapshot(
+        ref_or_name, catalog_uri=catalog_uri, version=None, storage_options=storage_options
+    )
+    records = _prune_files_and_row_groups(
+        catalog_uri=catalog_uri,
+        dataset_id=snapshot.dataset.id,
+        version=snapshot.version,
+        file_records=snapshot.file_records,
+        predicates=[],
+    )
+    bins = _plan_bins(records, target_file_size, partition_filter or {})
+    dataset_ref = DatasetRef(
+        name=snapshot.dataset.name,
+        base_uri=snapshot.dataset.base_uri,
+        dataset_id=snapshot.dataset.id,
+        catalog_uri=catalog_uri,
+    )
+    if not bins:
+        return CompactionResult(dataset_ref=dataset_ref, version=snapshot.version)
+
+    catalog = connect_catalog(catalog_uri)
+    try:
+        schema_version_id = (
+            catalog.ensure_schema_version(snapshot.dataset.id, serialize_schema(snapshot.schema))
+            if snapshot.schema is not None
+            else None
+        )
+        version = snapshot.version + 1
+        fs_handle = _dataset_filesystem(snapshot.dataset, storage_options)
+        destinations = [_prepare_write_destination(fs_handle, version) for _ in bins]
+        intent_ids = [
+            _register_write_intent(
+                catalog, snapshot.dataset.id, version, fs_handle, base_dir, template
+            )
+            for base_dir, template in destinations
+        ]
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            rewritten = list(
+                pool.map(
+                    lambda job: _rewrite_bin(
+                        snapshot, job[0], fs_handle, job[1], schema_version_id, sort_by
+                    ),
+                    zip(bins, destinations),
+                )
+            )
+        new_files = [entry for entries in rewritten for entry in entries]
+        removed_ids = {record["file_id"] for group in bins for record in group}
+        removed_paths = [record["file_path"] for group in bins for record in group]
+        catalog.record_write_with_metadata(
+            snapshot.dataset,
+            version=version,
+            files=new_files,
+            operation="compact",
+            carried_file_ids=[
+                record["file_id"] for record in records if record["file_id"] not in removed_ids
+            ],
+            metadata={
+                "files_removed": len(removed_paths),
+                "files_added": len(new_files),
+                "target_file_size": target_file_size,
+            },
+            intent_ids=intent_ids,
+        )
+    finally:
+        catalog.close()
+
+    return CompactionResult(
+        dataset_ref=dataset_ref,
+        version=version,
+        files_removed=removed_paths,
+        files_added=[entry["file_path"] for entry in new_files],
+    )
+
+
+def _plan_bins(
+    records: Sequence[dict[str, Any]],
+    target_file_size: int,
+    partition_filter: Mapping[str, Any],
+) -> List[List[dict[str, Any]]]:
+    groups: Dict[Tuple[Tuple[str, str], ...], List[dict[str, Any]]] = {}
+    for record in records:
+        partitions = record.get("partitions") or {}
+        if any(
+            key not in partitions or str(partitions[key]) != str(value)
+            for key, value in partition_filter.items()
+        ):
+            continue
+        has_deletes = record.get("deletion_vector") is not None
+        if (record.get("file_size_bytes") or 0) >= target_file_size and not has_deletes:
+            continue
+        groups.setdefault(tuple(sorted(partitions.items())), []).append(record)
+
+    bins: List[List[dict[str, Any]]] = []
+    for candidates in groups.values():
+        open_bins: List[Tuple[int, List[dict[str, Any]]]] = []
+        for record in sorted(
+            candidates, key=lambda item: item.get("file_size_bytes") or 0, reverse=True
+        ):
+            size = record.get("file_size_bytes") or 0
+            for index, (used, members) in enumerate(open_bins):
+                if used + size <= target_file_size:
+                    members.append(record)
+                    open_bins[index] = (used + size, members)
+                    break
+            else:
+                open_bins.append((size, [record]))
+        bins.extend(
+            members
+            for _, members in open_bins
+            if len(members) > 1 or members[0].get("deletion_vector") is not None
+        )
+    return bins
+
+
+def _rewrite_bin(
+    snapshot: _Snapshot,
+    group: Sequence[dict[str, Any]],
+    fs_handle: FileSystemHandle,
+    destination: Tuple[str, str],
+    schema_version_id: Optional[int],
+    sort_by: Optional[Sequence[str]],
+) -> List[dict[str, Any]]:
+    table = _build_dataset_from_fragments(
+        group,
+        predicates=[],
+        schema=snapshot.schema,
+        fragment_schemas=snapshot.fragment_schemas,
+        storage_options=snapshot.storage_options,
+    ).to_table()
+    if sort_by:
+        table = table.sort_by([(column, "ascending") for column in sort_by])
+
+    base_dir, filename_template = destination
+    return _write_table_files(
+        fs_handle,
+        base_dir,
+        filename_template,
+        table,
+        partition_by=list((group[0].get("partitions") or {}).keys()),
+        schema_version_id=schema_version_id,
+        profile=_write_profile(snapshot.dataset),
+    )
+
+
+def vacuum(
+    ref_or_name: DatasetRef | str,
+    *,
+    catalog_uri: str = "sqlite:///:memory:",
+    retention: timedelta = DEFAULT_RETENTION,
+    dry_run: bool = False,
+    max_workers: Optional[int] = None,
+    storage_options: Optional[Dict[str, Any]] = None,
+) -> VacuumResult:
+    """
+    Delete files under the dataset's ``v{version}`` directories that no live
+    catalog record references.
+
+    Version directories are listed concurrently and diffed against the set
+    of referenced paths. Unreferenced files modified within ``retention`` are
+    kept (and reported in ``retained_files``) so that in-flight writers and
+    readers of recently superseded versions are not disturbed. Deletes are
+    issued as bulk ``fs.rm`` calls on a thread pool; tombstoned records of
+    deleted files are then purged from the catalog. With ``dry_run`` nothing
+    is deleted and ``deleted_files`` lists what would have been removed.
+    """
+
+    if retention < timedelta(0):
+        raise DatasetError("retention must not be negative")
+
+    catalog = connect_catalog(catalog_uri)
+    try:
+        dataset = catalog.resolve_dataset(ref_or_name)
+        if not dataset.base_uri:
+            raise DatasetError("Dataset has no base_uri configured")
+        result = VacuumResult(
+            dataset_ref=DatasetRef(
+                name=dataset.name,
+                base_uri=dataset.base_uri,
+                dataset_id=dataset.id,
+                catalog_uri=catalog_uri,
+            ),
+            dry_run=dry_run,
+        )
+        fs_handle = _dataset_filesystem(dataset, storage_options)
+        fs = fs_handle.filesystem
+        cutoff = datetime.now(timezone.utc) - retention
+        listing = list(_list_version_files(fs_handle, max_workers))
+        # Read the referenced set only after listing so that a file committed
+        # while the listing ran is never mistaken for an orphan.
+        referenced = catalog.list_referenced_file_paths(dataset.id)
+
+        candidates: List[str] = []
+        for path, info in listing:
+            if fs.unstrip_protocol(path) in referenced:
+                continue
+            modified = _modified_at(info)
+            if modified is None or modified > cutoff:
+                result.retained_files.append(fs.unstrip_protocol(path))
+            else:
+                candidates.append(path)
+
+        if not dry_run and candidates:
+            batches = [
+                candidates[start : start + _DELETE_BATCH]
+                for start in range(0, len(candidates), _DELETE_BATCH)
+            ]
+            with ThreadPoolExecutor(max_workers=max_workers) as pool:
+                outcomes = list(pool.map(lambda batch: _remove_batch(fs, batch), batches))
+            for batch, error in zip(batches, outcomes):
+                if error is not None:
+                    result.errors.append(error)
+                    continue
+                result.deleted_files.extend(fs.unstrip_protocol(path) for path in batch)
+            _remove_empty_dirs(fs, fs_handle.root_path, candidates)
+            catalog.purge_tombstoned_files(dataset.id, result.deleted_files)
+        elif dry_run:
+            result.deleted_files.extend(fs.unstrip_protocol(path) for path in candidates)
+    finally:
+        catalog.close()
+
+    logger.info(
+        "vacuum %s: deleted=%d retained=%d errors=%d dry_run=%s",
+        result.dataset_ref.name or result.dataset_ref.base_uri,
+        len(result.deleted_files),
+        len(result.retained_files),
+        len(result.errors),
+        dry_run,
+    )
+    return result
+
+
+def _list_version_files(
+    fs_handle: FileSystemHandle, max_workers: Optional[int]
+) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """Yield ``(path, info)`` for every file below a ``v{version}`` directory."""
+
+    fs = fs_handle.filesystem
+    sep = getattr(fs, "sep", "/")
+    try:
+        entries = fs.ls(fs_handle.root_path, detail=True)
+    except FileNotFoundError:
+        return
+    version_dirs = [
+        entry["name"]
+        for entry in entries
+        if entry.get("type") == "directory"
+        and _VERSION_DIR.match(entry["name"].rstrip(sep).rsplit(sep, 1)[-1])
+    ]
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        for listing in pool.map(lambda path: fs.find(path, detail=True), version_dirs):
+            for path, info in listing.items():
+                if info.get("type") == "file":
+                    yield path, info
+
+
+def _modified_at(info: Dict[str, Any]) -> Optional[datetime]:
+    for key in ("mtime", "LastModified", "last_modified", "updated", "created"):
+        value = info.get(key)
+        if value is None:
+            continue
+        if isinstance(value, (int, float)):
+            return datetime.fromtimestamp(value, tz=timezone.utc)
+        if isinstance(value, str):
+            with contextlib.suppress(ValueError):
+                value = datetime.fromisoformat(value.replace("Z", "+00:00"))
+        if isinstance(value, datetime):
+            return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+    return None
+
+
+def _remove_batch(fs: Any, paths: Sequence[str]) -> Optional[str]:
+    try:
+        fs.rm(list(paths))
+    except Exception as exc:  # report and keep going with the other batches
+        return f"{paths[0]} (+{len(paths) - 1} more): {exc}"
+    return None
+
+
+def _remove_empty_dirs(fs: Any, root_path: str, removed: Sequence[str]) -> None:
+    """Drop directories emptied by a vacuum, deepest first, up to ``root_path``."""
+
+    sep = getattr(fs, "sep", "/")
+    root = root_path.rstrip(sep)
+    directories: set[str] = set()
+    for path in removed:
+        parent = path.rsplit(sep, 1)[0]
+        while parent.startswith(root) and len(parent) > len(root):
+            directories.add(parent)
+            parent = parent.rsplit(sep, 1)[0]
+    for directory in sorted(directories, key=len, reverse=True):
+        with contextlib.suppress(Exception):
+            if not fs.ls(directory, detail=False):
+                fs.rmdir(directory)
+
+
+def expire_snapshots(
+    ref_or_name: DatasetRef | str,
+    *,
+    catalog_uri: str = "sqlite:///:memory:",
+    keep_last: Optional[int] = None,
+    older_than: Optional[datetime] = None,
+    batch_size: int = 1000,
+    reclaim_space: bool = True,
+) -> ExpireSnapshotsResult:
+    """
+    Expire old versions so the catalog stops growing with every commit.
+
+    Every version up to the newest one that is both outside the last
+    ``keep_last`` versions and committed before ``older_than`` is expired
+    (either bound may be omitted, not both); the current version is always
+    kept. Expired versions lose their transaction, file, row-group and
+    partition rows in batched transactions of ``batch_size`` versions. Files
+    no retained version references stay behind as tombstoned records for
+    ``vacuum``. With ``reclaim_space`` the catalog database is compacted
+    afterwards.
+    """
+
+    if keep_last is None and older_than is None:
+        raise DatasetError("expire_snapshots requires keep_last and/or older_than")
+    if keep_last is not None and keep_last < 1:
+        raise DatasetError("keep_last must be at least 1")
+    if batch_size < 1:
+        raise DatasetError("batch_size must be a positive integer")
+
+    catalog = connect_catalog(catalog_uri)
+    try:
+        dataset = catalog.resolve_dataset(ref_or_name)
+        result = ExpireSnapshotsResult(
+            dataset_ref=DatasetRef(
+                name=dataset.name,
+                base_uri=dataset.base_uri,
+                dataset_id=dataset.id,
+                catalog_uri=catalog_uri,
+            )
+        )
+        through = dataset.current_version - (keep_last or 1)
+        boundary = (
+            catalog.find_expiry_boundary(dataset.id, through_version=through, older_than=older_than)
+            if through > 0
+            else None
+        )
+        if boundary is None:
+            return result
+        result.expired_through = boundary
+        result.versions_expired, result.files_tombstoned = catalog.expire_versions(
+            dataset.id, boundary, batch_size=batch_size
+        )
+        if reclaim_space:
+            catalog.reclaim_space()
+    finally:
+        catalog.close()
+
+    logger.info(
+        "expire_snapshots %s: through=v%s versions=%d tombstoned=%d",
+        result.dataset_ref.name or result.dataset_ref.base_uri,
+        result.expired_through,
+        result.versions_expired,
+        result.files_tombstoned,
+    )
+    return result
+
+
+def recover(
+    ref_or_name: DatasetRef | str,
+    *,
+    catalog_uri: str = "sqlite:///:memory:",
+    min_age: timedelta = DEFAULT_RECOVERY_AGE,
+    dry_run: bool = False,
+    storage_options: Optional[Dict[str, Any]] = None,
+) -> RecoveryResult:
+    """
+    Reconcile writes that never committed.
+
+    Every write registers an intent (target directory and file-name prefix)
+    before producing files and clears it in its commit transaction. Intents
+    older than ``min_age`` therefore belong to writers that crashed or gave
+    up; only their directories are listed, so the cost follows the number of
+    failed writes rather than the size of the dataset. Files found there are
+    recorded as tombstones for ``vacuum`` and the intent is dropped.
+    """
+
+    catalog = connect_catalog(catalog_uri)
+    try:
+        dataset = catalog.resolve_dataset(ref_or_name)
+        result = RecoveryResult(
+            dataset_ref=DatasetRef(
+                name=dataset.name,
+                base_uri=dataset.base_uri,
+                dataset_id=dataset.id,
+                catalog_uri=catalog_uri,
+            ),
+            dry_run=dry_run,
+        )
+        intents = catalog.list_write_intents(
+            dataset.id, created_before=datetime.now(timezone.utc) - min_age
+        )
+        for intent in intents:
+            orphans = _list_intent_files(
+                _dataset_filesystem(dataset, storage_options, intent["directory"]), intent
+            )
+            result.tombstoned_files.extend(orphans)
+            if not dry_run:
+                catalog.resolve_write_intent(dataset.id, intent, orphans)
+        result.intents_resolved = len(intents)
+    finally:
+        catalog.close()
+
+    logger.info(
+        "recover %s: intents=%d tombstoned=%d dry_run=%s",
+        result.dataset_ref.name or result.dataset_ref.base_uri,
+        result.intents_resolved,
+        len(result.tombstoned_files),
+        dry_run,
+    )
+    return result
+
+
+def _list_intent_files(fs_handle: FileSystemHandle, intent: Dict[str, Any]) -> List[str]:
+    fs = fs_handle.filesystem
+    sep = getattr(fs, "sep", "/")
+    try:
+        paths = fs.find(fs_handle.root_path)
+    except FileNotFoundError:
+        return []
+    return sorted(
+        fs.unstrip_protocol(path)
+        for path in paths
+        if path.rsplit(sep, 1)[-1].startswith(intent["file_prefix"])
+    )
@@ -0,0 +1,512 @@
+"""
+Row-level deletes, updates and merges.
+
+Matching rows are recorded as per-file deletion vectors in the catalog
+instead of rewriting the Parquet files that hold them; readers drop the
+flagged rows while scanning and ``compact_dataset`` folds the vectors into
+rewritten files. Updates and merges additionally write the new rows as files.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Mapping, Optional, Sequence, Tuple
+
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from .catalog import CommitConflictError, DatasetRef, connect_catalog
+from .dataset import (
+    DatasetError,
+    Predicate,
+    PredicateInput,
+    _build_arrow_filter,
+    _build_dataset_from_fragments,
+    _dataset_filesystem,
+    _decode_deletion_vector,
+    _encode_deletion_vector,
+    _open_snapshot,
+    _prepare_table_for_write,
+    _prepare_write_destination,
+    _prune_files_and_row_groups,
+    _register_write_intent,
+    _row_group_slices,
+    _Snapshot,
+    _write_profile,
+    _write_table_files,
+    parse_predicates,
+)
+from .schema_manager import serialize_schema
+from .storage import resolve_filesystem
+
+__all__ = ["MutationResult", "delete_rows", "merge_dataset", "update_rows"]
+
+
+@dataclass
+class MutationResult:
+    dataset_ref: DatasetRef
+    version: int
+    rows_affected: int = 0
+    files_affected: int = 0
+    files_added: Sequence[str] = ()
+    rows_written: int = 0
+
+
+def delete_rows(
+    ref_or_name: DatasetRef | str,
+    predicates: Sequence[PredicateInput],
+    *,
+    catalog_uri: str = "sqlite:///:memory:",
+    max_commit_retries: int = 5,
+    storage_options: Optional[Dict[str, Any]] = None,
+) -> MutationResult:
+    """
+    Delete the rows of the current version that match all ``predicates``.
+
+    Candidate files and row groups are located with the catalog statistics;
+    only their predicate columns are read to find the matching positions,
+    which are merged into each file's deletion vector. The new version
+    carries every file forward, so no data is rewritten.
+    """
+
+    return _mutate(
+        ref_or_name, predicates, None, catalog_uri, max_commit_retries, storage_options
+    )
+
+
+def update_rows(
+    ref_or_name: DatasetRef | str,
+    predicates: Sequence[PredicateInput],
+    assignments: Mapping[str, Any],
+    *,
+    catalog_uri: str = "sqlite:///:memory:",
+    max_commit_retries: int = 5,
+    storage_options: Optional[Dict[str, Any]] = None,
+) -> MutationResult:
+    """
+    Set ``assignments`` (column -> value) on the rows matching ``predicates``.
+
+    The original rows are masked with deletion vectors and their updated
+    copies are written as new files, all in one commit.
+    """
+
+    if not assignments:
+        raise DatasetError("update_rows requires at least one assignment")
+    return _mutate(
+        ref_or_name, predicates, assignments, catalog_uri, max_commit_retries, storage_options
+    )
+
+
+def _mutate(
+    ref_or_name: DatasetRef | str,
+    predicates: Sequence[PredicateInput],
+    assignments: Optional[Mapping[str, Any]],
+    catalog_uri: str,
+    max_commit_retries: int,
+    storage_options: Optional[Dict[str, Any]],
+) -> MutationResult:
+    parsed_predicates = parse_predicates(predicates)
+    if not parsed_predicates:
+        raise DatasetError("Row mutations require at least one predicate")
+
+    attempt = 0
+    while True:
+        try:
+            return _mutate_once(
+                ref_or_name, parsed_predicates, assignments, catalog_uri, storage_options
+            )
+        except CommitConflictError:
+            # Deletion vectors are positions in a specific snapshot; replan
+            # against the new one.
+            if attempt >= max_commit_retries:
+                raise
+            attempt += 1
+
+
+def _mutate_once(
+    ref_or_name: DatasetRef | str,
+    predicates: Sequence[Any],
+    assignments: Optional[Mapping[str, Any]],
+    catalog_uri: str,
+    storage_options: Optional[Dict[str, Any]],
+) -> MutationResult:
+    snapshot = _open_snapshot(
+        ref_or_name, catalog_uri=catalog_uri, version=None, storage_options=storage_options
+    )
+    dataset_ref = DatasetRef(
+        name=snapshot.dataset.name,
+        base_uri=snapshot.dataset.base_uri,
+        dataset_id=snapshot.dataset.id,
+        catalog_uri=catalog_uri,
+    )
+    if assignments is not None and snapshot.schema is not None:
+        unknown = [name for name in assignments if snapshot.schema.get_field_index(name) == -1]
+        if unknown:
+            raise DatasetError(f"Unknown columns in assignments: {', '.join(unknown)}")
+    try:
+        candidates = _prune_files_and_row_groups(
+            catalog_uri=catalog_uri,
+            dataset_id=snapshot.dataset.id,
+            version=snapshot.version,
+            file_records=snapshot.file_records,
+            predicates=predicates,
+        )
+    except DatasetError:
+        return MutationResult(dataset_ref=dataset_ref, version=snapshot.version)
+
+    filter_expr = _build_arrow_filter(predicates)
+    vectors, matched_tables, rows_affected = _plan_deletions(
+        snapshot,
+        candidates,
+        lambda table: table.filter(filter_expr),
+        columns=None if assignments is not None else sorted({p.column for p in predicates}),
+    )
+
+    if not vectors:
+        return MutationResult(dataset_ref=dataset_ref, version=snapshot.version)
+
+    version = snapshot.version + 1
+    catalog = connect_catalog(catalog_uri)
+    try:
+        new_files: List[dict[str, Any]] = []
+        intent_ids: List[int] = []
+        if assignments is not None:
+            new_files, intent_id = _write_updated_rows(
+                catalog, snapshot, candidates, matched_tables, assignments, version
+            )
+            intent_ids.append(intent_id)
+        catalog.record_write_with_metadata(
+            snapshot.dataset,
+            version=version,
+            files=new_files,
+            operation="delete" if assignments is None else "update",
+            carried_file_ids=[record["id"] for record in snapshot.file_records],
+            metadata={"rows_affected": rows_affected, "files_affected": len(vectors)},
+            intent_ids=intent_ids,
+            deletion_vectors=vectors,
+        )
+    finally:
+        catalog.close()
+
+    return MutationResult(
+        dataset_ref=dataset_ref,
+        version=version,
+        rows_affected=rows_affected,
+        files_affected=len(vectors),
+        files_added=[entry["file_path"] for entry in new_files],
+    )
+
+
+def _plan_deletions(
+    snapshot: _Snapshot,
+    candidates: Sequence[dict[str, Any]],
+    select: Callable[[pa.Table], pa.Table],
+    *,
+    columns: Optional[Sequence[str]],
+) -> Tuple[Dict[str, dict[str, Any]], List[pa.Table], int]:
+    """Build the new deletion vector of every candidate file with selected rows."""
+
+    vectors: Dict[str, dict[str, Any]] = {}
+    matched_tables: List[pa.Table] = []
+    rows = 0
+    for record in candidates:
+        positions, matched = _match_rows(snapshot, record, select, columns)
+        if not len(positions):
+            continue
+        rows += len(positions)
+        vectors[record["file_path"]] = _merge_deletions(record, positions)
+        matched_tables.append(matched)
+    return vectors, matched_tables, rows
+
+
+def _match_rows(
+    snapshot: _Snapshot,
+    record: dict[str, Any],
+    select: Callable[[pa.Table], pa.Table],
+    columns: Optional[Sequence[str]],
+) -> Tuple[pa.Array, pa.Table]:
+    """
+    Return the file positions of the live rows in ``record`` kept by
+    ``select`` together with those rows.
+    """
+
+    table = _build_dataset_from_fragments(
+        [dict(record, deletion_vector=None)],
+        predicates=[],
+        schema=snapshot.schema,
+        fragment_schemas=snapshot.fragment_schemas,
+        storage_options=snapshot.storage_options,
+    ).to_table(columns=columns)
+    slices = _row_group_slices(record)
+    if slices is None:
+        positions = pa.array(range(table.num_rows), type=pa.int64())
+    else:
+        positions = pa.concat_arrays(
+            [pa.array(range(offset, offset + length), type=pa.int64()) for offset, length in slices]
+            or [pa.array([], type=pa.int64())]
+        )
+    table = table.append_column("__position", positions)
+    if record.get("deletion_vector") is not None:
+        already_deleted = _decode_deletion_vector(record["deletion_vector"])
+        table = table.filter(pc.invert(pc.take(already_deleted, positions)))
+    matched = select(table)
+    return matched.column("__position").combine_chunks(), matched.drop_columns(["__position"])
+
+
+def _merge_deletions(record: dict[str, Any], positions: pa.Array) -> dict[str, Any]:
+    existing = record.get("deletion_vector")
+    if existing is not None:
+        row_count = existing["row_count"]
+    else:
+        counts = (record.get("row_group_row_counts") or {}).values()
+        if not counts or any(count is None for count in counts):
+            raise DatasetError(
+                f"Deleting rows requires row-group row counts for '{record['file_path']}'"
+            )
+        row_count = sum(counts)
+    deleted = pc.is_in(pa.array(range(row_count), type=pa.int64()), value_set=positions)
+    if existing is not None:
+        deleted = pc.or_(_decode_deletion_vector(existing), deleted)
+    return _encode_deletion_vector(deleted)
+
+
+def _write_updated_rows(
+    catalog: Any,
+    snapshot: _Snapshot,
+    candidates: Sequence[dict[str, Any]],
+    matched_tables: Sequence[pa.Table],
+    assignments: Mapping[str, Any],
+    version: int,
+) -> Tuple[List[dict[str, Any]], int]:
+    table = pa.concat_tables(matched_tables)
+    for name, value in assignments.items():
+        index = table.schema.get_field_index(name)
+        column_type = table.schema.field(index).type
+        table = table.set_column(
+            index,
+            table.schema.field(index),
+            pa.array([value] * table.num_rows, type=column_type),
+        )
+
+    schema_version_id = (
+        catalog.ensure_schema_version(snapshot.dataset.id, serialize_schema(snapshot.schema))
+        if snapshot.schema is not None
+        else None
+    )
+    fs_handle = resolve_filesystem(
+        snapshot.dataset.base_uri, storage_options=snapshot.storage_options
+    )
+    base_dir, filename_template = _prepare_write_destination(fs_handle, version)
+    intent_id = _register_write_intent(
+        catalog, snapshot.dataset.id, version, fs_handle, base_dir, filename_template
+    )
+    files = _write_table_files(
+        fs_handle,
+        base_dir,
+        filename_template,
+        table,
+        partition_by=list((candidates[0].get("partitions") or {}).keys()),
+        schema_version_id=schema_version_id,
+        profile=_write_profile(snapshot.dataset),
+    )
+    return files, intent_id
+
+
+def merge_dataset(
+    ref_or_name: DatasetRef | str,
+    data: Any,
+    *,
+    on: Sequence[str],
+    catalog_uri: str = "sqlite:///:memory:",
+    base_uri: Optional[str] = None,
+    partition_by: Optional[Sequence[str]] = None,
+    schema_merge: bool = True,
+    promote_to_string: bool = False,
+    max_commit_retries: int = 5,
+    storage_options: Optional[Dict[str, Any]] = None,
+) -> MutationResult:
+    """
+    Upsert ``data`` into the current version, matching rows on the ``on`` keys.
+
+    The incoming rows are written once as new files. Existing rows with the
+    same keys are masked with deletion vectors; candidate files are found
+    from the catalog's min/max statistics of the key columns (and partition
+    values when a key is a partition column), so only files whose key range
+    overlaps the incoming keys are read. Every other file is carried forward
+    untouched.
+    """
+
+    if not on:
+        raise DatasetError("merge_dataset requires at least one key column in 'on'")
+
+    catalog = connect_catalog(catalog_uri)
+    try:
+        dataset = catalog.resolve_dataset(ref_or_name, create_if_missing=True, base_uri=base_uri)
+        if not dataset.base_uri:
+            raise DatasetError("Dataset has no base_uri configured")
+        table, schema_version_id = _prepare_table_for_write(
+            catalog,
+            dataset,
+            data,
+            schema_merge=schema_merge,
+            promote_to_string=promote_to_string,
+        )
+        missing = [key for key in on if table.schema.get_field_index(key) == -1]
+        if missing:
+            raise DatasetError(f"Merge keys missing from data: {', '.join(missing)}")
+        if partition_by is None and dataset.current_version > 0:
+            partition_by = _current_partition_keys(catalog, dataset.id, dataset.current_version)
+
+        fs_handle = _dataset_filesystem(dataset, storage_options)
+        version = dataset.current_version + 1
+        base_dir, filename_template = _prepare_write_destination(fs_handle, version)
+        intent_id = _register_write_intent(
+            catalog, dataset.id, version, fs_handle, base_dir, filename_template
+        )
+        new_files = _write_table_files(
+            fs_handle,
+            base_dir,
+            filename_template,
+            table,
+            partition_by=partition_by,
+            schema_version_id=schema_version_id,
+            profile=_write_profile(dataset),
+        )
+    finally:
+        catalog.close()
+
+    keys = table.select(list(on)).group_by(list(on)).aggregate([])
+    attempt = 0
+    while True:
+        try:
+            return _merge_once(
+                ref_or_name,
+                catalog_uri,
+                keys,
+                new_files,
+                intent_id,
+                table.num_rows,
+                storage_options,
+            )
+        except CommitConflictError:
+            if attempt >= max_commit_retries:
+                raise
+            attempt += 1
+
+
+def _merge_once(
+    ref_or_name: DatasetRef | str,
+    catalog_uri: str,
+    keys: pa.Table,
+    new_files: Sequence[dict[str, Any]],
+    intent_id: int,
+    rows_written: int,
+    storage_options: Optional[Dict[str, Any]],
+) -> MutationResult:
+    catalog = connect_catalog(catalog_uri)
+    try:
+        dataset = catalog.resolve_dataset(ref_or_name)
+    finally:
+        catalog.close()
+
+    vectors: Dict[str, dict[str, Any]] = {}
+    carried: List[int] = []
+    rows_affected = 0
+    if dataset.current_version > 0:
+        snapshot = _open_snapshot(
+            ref_or_name, catalog_uri=catalog_uri, version=None, storage_options=storage_options
+        )
+        dataset = snapshot.dataset
+        carried = [record["id"] for record in snapshot.file_records]
+        candidates = _merge_candidates(snapshot, catalog_uri, keys)
+        vectors, _, rows_affected = _plan_deletions(
+            snapshot,
+            candidates,
+            lambda table: table.join(keys, keys=keys.column_names, join_type="left semi"),
+            columns=keys.column_names,
+        )
+
+    catalog = connect_catalog(catalog_uri)
+    try:
+        catalog.record_write_with_metadata(
+            dataset,
+            version=dataset.current_version + 1,
+            files=new_files,
+            operation="merge",
+            carried_file_ids=carried,
+            metadata={
+                "rows_affected": rows_affected,
+                "files_affected": len(vectors),
+                "rows_written": rows_written,
+            },
+            intent_ids=[intent_id],
+            deletion_vectors=vectors,
+        )
+    finally:
+        catalog.close()
+
+    return MutationResult(
+        dataset_ref=DatasetRef(
+            name=dataset.name,
+            base_uri=dataset.base_uri,
+            dataset_id=dataset.id,
+            catalog_uri=catalog_uri,
+        ),
+        version=dataset.current_version + 1,
+        rows_affected=rows_affected,
+        files_affected=len(vectors),
+        files_added=[entry["file_path"] for entry in new_files],
+        rows_written=rows_written,
+    )
+
+
+def _merge_candidates(
+    snapshot: _Snapshot, catalog_uri: str, keys: pa.Table
+) -> List[dict[str, Any]]:
+    """
+    Files (and row groups) whose key statistics overlap the incoming keys.
+
+    The min/max of every key column becomes a range predicate for the
+    catalog's row-group statistics; keys that are partition columns have no
+    statistics and are matched against the files' partition values instead.
+    """
+
+    predicates: List[Predicate] = []
+    for name in keys.column_names:
+        bounds = pc.min_max(keys.column(name)).as_py()
+        if bounds["min"] is None:
+            continue
+        predicates.append(Predicate(column=name, op=">=", value=bounds["min"]))
+        predicates.append(Predicate(column=name, op="<=", value=bounds["max"]))
+
+    try:
+        candidates = _prune_files_and_row_groups(
+            catalog_uri=catalog_uri,
+            dataset_id=snapshot.dataset.id,
+            version=snapshot.version,
+            file_records=snapshot.file_records,
+            predicates=predicates,
+        )
+    except DatasetError:
+        return []
+    values = {
+        name: {str(value) for value in keys.column(name).to_pylist()}
+        for name in keys.column_names
+    }
+    return [
+        record
+        for record in candidates
+        if all(
+            name not in values or value in values[name]
+            for name, value in (record.get("partitions") or {}).items()
+        )
+    ]
+
+
+def _current_partition_keys(catalog: Any, dataset_id: int, version: int) -> Optional[List[str]]:
+    records = catalog.list_file_records_for_version(dataset_id, version)
+    if not records:
+        return None
+    partitions = catalog.fetch_partitions_for_files([records[0]["id"]])
+    keys = list(partitions.get(records[0]["id"], {}).keys())
+    return keys or None
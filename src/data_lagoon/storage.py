@@ -1,9 +1,17 @@
 from __future__ import annotations
 
+import bisect
+import inspect
+import io
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
-from typing import Dict, Optional
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple
 
 import fsspec
+import pyarrow.fs as pa_fs
+from fsspec.core import split_protocol
 
 
 @dataclass(frozen=True)
@@ -13,15 +21,77 @@ class FileSystemHandle:
     protocol: str
 
 
+# Filesystems are cached per protocol and options so connection pools,
+# credentials and TLS sessions are shared by every file and call that uses
+# the same store. Chained URLs (``simplecache::s3://...``) are not cached.
+_cache_lock = threading.Lock()
+_filesystems: Dict[Tuple[Any, ...], fsspec.AbstractFileSystem] = {}
+_arrow_filesystems: Dict[int, Tuple[fsspec.AbstractFileSystem, pa_fs.FileSystem]] = {}
+
+
 def resolve_filesystem(
     uri: str,
     *,
     storage_options: Optional[Dict[str, object]] = None,
 ) -> FileSystemHandle:
-    fs, path = fsspec.url_to_fs(uri, **(storage_options or {}))
-    protocol = _protocol_from_fs(fs)
-    normalized_path = path or ""
-    return FileSystemHandle(fs, normalized_path, protocol)
+    options = storage_options or {}
+    if "::" in uri:
+        fs, path = fsspec.url_to_fs(uri, **options)
+        return FileSystemHandle(fs, path or "", _protocol_from_fs(fs))
+
+    protocol = split_protocol(uri)[0] or "file"
+    fs_class = fsspec.get_filesystem_class(protocol)
+    # Some backends derive options from the URL itself (e.g. the account in
+    # ``abfs://container@account``), so those are part of the key as well.
+    key = (protocol, _freeze({**fs_class._get_kwargs_from_urls(uri), **options}))
+    with _cache_lock:
+        fs = _filesystems.get(key)
+    if fs is None:
+        fs, path = fsspec.url_to_fs(uri, **options)
+        with _cache_lock:
+            fs = _filesystems.setdefault(key, fs)
+    else:
+        path = fs._strip_protocol(uri)
+    return FileSystemHandle(fs, path or "", _protocol_from_fs(fs))
+
+
+def arrow_filesystem(handle: FileSystemHandle) -> pa_fs.FileSystem:
+    """Return the (cached) Arrow filesystem wrapping ``handle.filesystem``."""
+
+    with _cache_lock:
+        cached = _arrow_filesystems.get(id(handle.filesystem))
+        if cached is None or cached[0] is not handle.filesystem:
+            arrow_fs = pa_fs.PyFileSystem(pa_fs.FSSpecHandler(handle.filesystem))
+            cached = _arrow_filesystems[id(handle.filesystem)] = (handle.filesystem, arrow_fs)
+        return cached[1]
+
+
+def clear_filesystem_cache() -> None:
+    """Drop cached filesystems, e.g. after rotating credentials."""
+
+    with _cache_lock:
+        _filesystems.clear()
+        _arrow_filesystems.clear()
+
+
+# Event loops and sockets of async filesystems do not survive ``fork``.
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=clear_filesystem_cache)
+
+
+def merge_storage_options(
+    *options: Optional[Mapping[str, Any]],
+) -> Optional[Dict[str, Any]]:
+    """Merge option mappings left to right; ``None`` when all are empty."""
+
+    merged: Dict[str, Any] = {}
+    for entry in options:
+        merged.update(entry or {})
+    return merged or None
+
+
+def _freeze(options: Mapping[str, Any]) -> Tuple[Tuple[str, str], ...]:
+    return tuple(sorted((str(key), repr(value)) for key, value in options.items()))
 
 
 def _protocol_from_fs(fs: fsspec.AbstractFileSystem) -> str:
@@ -29,3 +99,157 @@ def _protocol_from_fs(fs: fsspec.AbstractFileSystem) -> str:
     if isinstance(protocol, (list, tuple)):
         return protocol[0]
     return protocol
+
+
+DEFAULT_UPLOAD_WORKERS = 16
+# Multipart part size; larger parts mean fewer requests per file, and S3
+# allows at most 10,000 parts per object.
+DEFAULT_UPLOAD_CHUNK_SIZE = 64 * 1024 * 1024
+
+
+@dataclass(frozen=True)
+class StagingOptions:
+    """
+    Write files to a local directory first, then upload them concurrently.
+
+    ``directory`` is where the temporary staging directory is created (the
+    system default when ``None``); ``max_workers`` files are uploaded at a
+    time with multipart parts of ``chunk_size`` bytes.
+    """
+
+    directory: Optional[str] = None
+    max_workers: int = DEFAULT_UPLOAD_WORKERS
+    chunk_size: int = DEFAULT_UPLOAD_CHUNK_SIZE
+
+
+def upload_files(
+    filesystem: fsspec.AbstractFileSystem,
+    uploads: Sequence[Tuple[str, str]],
+    *,
+    max_workers: int = DEFAULT_UPLOAD_WORKERS,
+    chunk_size: int = DEFAULT_UPLOAD_CHUNK_SIZE,
+) -> None:
+    """Copy ``(local_path, remote_path)`` pairs to ``filesystem`` in parallel."""
+
+    if not uploads:
+        return
+    options = _upload_options(filesystem, chunk_size)
+    for parent in sorted({filesystem._parent(remote) for _, remote in uploads}):
+        filesystem.makedirs(parent, exist_ok=True)
+    with ThreadPoolExecutor(
+        max_workers=min(max_workers, len(uploads)), thread_name_prefix="data-lagoon-upload"
+    ) as pool:
+        for future in [
+            pool.submit(filesystem.put_file, local, remote, **options)
+            for local, remote in uploads
+        ]:
+            future.result()
+
+
+def _upload_options(filesystem: fsspec.AbstractFileSystem, chunk_size: int) -> Dict[str, int]:
+    # Object-store backends (s3fs, gcsfs) take the multipart part size as
+    # ``chunksize``; the generic implementation streams through ``open`` and
+    # uses ``block_size`` as the part size instead.
+    put_file = getattr(filesystem, "_put_file", filesystem.put_file)
+    if "chunksize" in inspect.signature(put_file).parameters:
+        return {"chunksize": chunk_size}
+    return {"block_size": chunk_size}
+
+
+# Ranges closer than this are fetched as one request (Arrow's default
+# ``hole_size_limit`` for coalesced reads).
+RANGE_COALESCE_GAP = 8 * 1024
+
+
+def fetch_ranges(
+    filesystem: fsspec.AbstractFileSystem,
+    requests: Mapping[str, Sequence[Tuple[int, int]]],
+) -> Dict[str, List[Tuple[int, bytes]]]:
+    """
+    Fetch ``(start, end)`` byte ranges of many files with one ``cat_ranges``
+    call; asynchronous filesystems (S3, GCS, HTTP, ...) issue the requests
+    concurrently. Nearby ranges of a file are coalesced first.
+    """
+
+    paths: List[str] = []
+    starts: List[int] = []
+    ends: List[int] = []
+    for path, ranges in requests.items():
+        for start, end in _coalesce_ranges(ranges):
+            paths.append(path)
+            starts.append(start)
+            ends.append(end)
+    if not paths:
+        return {}
+    blobs = filesystem.cat_ranges(paths, starts, ends, on_error="raise")
+    fetched: Dict[str, List[Tuple[int, bytes]]] = {}
+    for path, start, blob in zip(paths, starts, blobs):
+        fetched.setdefault(path, []).append((start, blob))
+    return fetched
+
+
+def _coalesce_ranges(ranges: Sequence[Tuple[int, int]]) -> List[Tuple[int, int]]:
+    merged: List[Tuple[int, int]] = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1] + RANGE_COALESCE_GAP:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+class RangeCachedFile(io.RawIOBase):
+    """
+    Read-only file that serves reads from prefetched ranges and falls back
+    to a ranged ``cat_file`` (cached as well) for anything not prefetched.
+    """
+
+    def __init__(
+        self,
+        filesystem: fsspec.AbstractFileSystem,
+        path: str,
+        size: int,
+        ranges: Sequence[Tuple[int, bytes]] = (),
+    ) -> None:
+        super().__init__()
+        self._filesystem = filesystem
+        self._path = path
+        self._size = size
+        self._ranges = sorted(ranges, key=lambda item: item[0])
+        self._position = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._position
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_CUR:
+            offset += self._position
+        elif whence == io.SEEK_END:
+            offset += self._size
+        self._position = max(0, offset)
+        return self._position
+
+    def readinto(self, buffer: "bytearray | memoryview") -> int:
+        length = min(len(buffer), self._size - self._position)
+        if length <= 0:
+            return 0
+        data = self._read(self._position, self._position + length)
+        buffer[:length] = data
+        self._position += length
+        return length
+
+    def _read(self, start: int, end: int) -> bytes:
+        index = bisect.bisect_right([offset for offset, _ in self._ranges], start) - 1
+        if index >= 0:
+            offset, blob = self._ranges[index]
+            if end <= offset + len(blob):
+                return blob[start - offset : end - offset]
+        blob = self._filesystem.cat_file(self._path, start=start, end=end)
+        bisect.insort(self._ranges, (start, blob), key=lambda item: item[0])
+        return blob
@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import pathlib
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from unittest import mock
+
+import pyarrow as pa
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1] / "src"))
+
+from data_lagoon import aio  # noqa: E402
+from data_lagoon.aio import (  # noqa: E402
+    connect_catalog_async,
+    list_versions_async,
+    read_dataset_async,
+    write_dataset_async,
+)
+
+
+class AsyncApiTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.base_uri = os.path.join(self.temp_dir.name, "dataset")
+        self.catalog_uri = f"sqlite:///{os.path.join(self.temp_dir.name, 'catalog.db')}"
+
+    def tearDown(self) -> None:
+        self.temp_dir.cleanup()
+
+    def test_write_then_read_concurrently(self) -> None:
+        async def main() -> list[pa.Table]:
+            await write_dataset_async(
+                "example",
+                pa.table({"value": [1, 2, 3]}),
+                catalog_uri=self.catalog_uri,
+                base_uri=self.base_uri,
+            )
+            return await asyncio.gather(
+                *(read_dataset_async("example", catalog_uri=self.catalog_uri) for _ in range(8))
+            )
+
+        tables = asyncio.run(main())
+
+        self.assertEqual(len(tables), 8)
+        self.assertTrue(all(table.column("value").to_pylist() == [1, 2, 3] for table in tables))
+
+    def test_blocking_work_runs_off_the_event_loop(self) -> None:
+        def slow_read(*args, **kwargs):
+            time.sleep(0.2)
+            return threading.current_thread().name
+
+        async def main() -> tuple[list[str], float]:
+            start = time.perf_counter()
+            names = await asyncio.gather(
+                *(read_dataset_async("example", catalog_uri=self.catalog_uri) for _ in range(4))
+            )
+            return names, time.perf_counter() - start
+
+        with mock.patch.object(aio, "read_dataset", slow_read):
+            names, elapsed = asyncio.run(main())
+
+        self.assertLess(elapsed, 0.6)
+        self.assertTrue(all(name.startswith("data-lagoon-io") for name in names))
+
+    def test_async_catalog_uses_one_thread(self) -> None:
+        async def main():
+            await write_dataset_async(
+                "example",
+                pa.table({"value": [1]}),
+                catalog_uri=self.catalog_uri,
+                base_uri=self.base_uri,
+            )
+            async with await connect_catalog_async(self.catalog_uri) as catalog:
+                dataset = await catalog.resolve_dataset("example")
+                names = [dataset.name for dataset in await catalog.list_datasets()]
+                with self.assertRaises(AttributeError):
+                    catalog._execute
+            versions = await list_versions_async("example", catalog_uri=self.catalog_uri)
+            return dataset, names, versions
+
+        dataset, names, versions = asyncio.run(main())
+
+        self.assertEqual(dataset.current_version, 1)
+        self.assertEqual(names, ["example"])
+        self.assertEqual([info.version for info in versions], [1])
+
+
+if __name__ == "__main__":
+    unittest.main()
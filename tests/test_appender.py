@@ -0,0 +1,120 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import pathlib
+import sys
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+import pyarrow as pa
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1] / "src"))
+
+from data_lagoon import appender as appender_module  # noqa: E402
+from data_lagoon.appender import Appender  # noqa: E402
+from data_lagoon.dataset import DatasetError, list_versions, read_dataset  # noqa: E402
+
+
+class AppenderTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.base_uri = os.path.join(self.temp_dir.name, "dataset")
+        self.catalog_uri = f"sqlite:///{os.path.join(self.temp_dir.name, 'catalog.db')}"
+
+    def tearDown(self) -> None:
+        self.temp_dir.cleanup()
+
+    def _appender(self, **kwargs) -> Appender:
+        return Appender(
+            "stream", catalog_uri=self.catalog_uri, base_uri=self.base_uri, **kwargs
+        )
+
+    def _versions(self) -> list[int]:
+        return [info.row_count for info in list_versions("stream", catalog_uri=self.catalog_uri)]
+
+    def test_flushes_one_version_per_row_threshold(self) -> None:
+        with self._appender(max_rows=5) as appender:
+            results = [appender.append(pa.table({"value": [i, i]})) for i in range(6)]
+            self.assertEqual(appender.buffered_rows, 0)
+            self.assertIsNone(appender.flush())
+
+        committed = [result for result in results if result is not None]
+        self.assertEqual([result.row_count for result in committed], [6, 6])
+        self.assertEqual([len(result.files) for result in committed], [1, 1])
+        self.assertEqual(self._versions(), [6, 6])
+
+    def test_close_flushes_remainder_and_rejects_appends(self) -> None:
+        appender = self._appender(max_rows=100)
+        appender.append(pa.table({"value": [1]}))
+        appender.append(pa.table({"value": [2], "extra": ["x"]}))
+
+        result = appender.close()
+
+        self.assertEqual(result.row_count, 2)
+        table = read_dataset("stream", catalog_uri=self.catalog_uri)
+        self.assertEqual(table.column("extra").to_pylist(), [None, "x"])
+        with self.assertRaises(DatasetError):
+            appender.append(pa.table({"value": [3]}))
+
+    def test_spills_past_memory_limit(self) -> None:
+        with self._appender(
+            max_rows=1000, memory_limit_bytes=1, spill_dir=self.temp_dir.name
+        ) as appender:
+            for i in range(3):
+                appender.append(pa.table({"value": [i]}))
+            spill_files = list(pathlib.Path(self.temp_dir.name).glob("appender-*.arrows"))
+            self.assertEqual(len(spill_files), 1)
+
+        self.assertFalse(any(pathlib.Path(self.temp_dir.name).glob("appender-*.arrows")))
+        values = read_dataset("stream", catalog_uri=self.catalog_uri).column("value")
+        self.assertEqual(values.to_pylist(), [0, 1, 2])
+
+    def test_flush_keeps_arrival_order_across_spills(self) -> None:
+        with self._appender(
+            max_rows=1000, memory_limit_bytes=100, spill_dir=self.temp_dir.name
+        ) as appender:
+            appender.append(pa.table({"value": [-1]}))
+            appender.append(pa.table({"value": list(range(100))}))
+            appender.append(pa.table({"value": [100]}))
+
+        values = read_dataset("stream", catalog_uri=self.catalog_uri).column("value")
+        self.assertEqual(values.to_pylist(), [-1, *range(101)])
+
+    def test_interval_flushes_idle_buffer(self) -> None:
+        with self._appender(max_bytes=None, flush_interval=0.05) as appender:
+            appender.append(pa.table({"value": [1]}))
+            deadline = time.monotonic() + 5
+            while appender.buffered_rows and time.monotonic() < deadline:
+                time.sleep(0.01)
+            self.assertEqual(appender.buffered_rows, 0)
+        self.assertEqual(self._versions(), [1])
+
+    def test_failed_flush_keeps_rows(self) -> None:
+        appender = self._appender(max_rows=100)
+        appender.append(pa.table({"value": [1]}))
+        with mock.patch.object(appender_module, "write_dataset", side_effect=OSError("down")):
+            with self.assertRaises(OSError):
+                appender.flush()
+        self.assertEqual(appender.buffered_rows, 1)
+        self.assertEqual(appender.close().row_count, 1)
+
+    def test_async_producers(self) -> None:
+        async def produce(appender: Appender, worker: int) -> None:
+            for i in range(10):
+                await appender.append_async(pa.table({"worker": [worker], "seq": [i]}))
+
+        async def main() -> None:
+            async with self._appender(max_rows=15) as appender:
+                await asyncio.gather(*(produce(appender, worker) for worker in range(3)))
+
+        asyncio.run(main())
+
+        self.assertEqual(sum(self._versions()), 30)
+        self.assertEqual(len(self._versions()), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,130 @@
+from __future__ import annotations
+
+import os
+import pathlib
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+import pyarrow as pa
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1] / "src"))
+
+from data_lagoon.batch import write_batch  # noqa: E402
+from data_lagoon.catalog import CommitConflictError, SqlCatalog, connect_catalog  # noqa: E402
+from data_lagoon.dataset import DatasetError, read_dataset, write_dataset  # noqa: E402
+
+
+class BatchWriteTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.catalog_uri = f"sqlite:///{os.path.join(self.temp_dir.name, 'catalog.db')}"
+
+    def tearDown(self) -> None:
+        self.temp_dir.cleanup()
+
+    def _base(self, name: str) -> str:
+        return os.path.join(self.temp_dir.name, name)
+
+    def _current_versions(self, *names: str) -> list[int]:
+        catalog = connect_catalog(self.catalog_uri)
+        try:
+            return [
+                dataset.current_version if dataset else 0
+                for dataset in (catalog.get_dataset_by_name(name) for name in names)
+            ]
+        finally:
+            catalog.close()
+
+    def test_commits_all_datasets_in_one_transaction(self) -> None:
+        write_dataset(
+            "orders",
+            pa.table({"day": ["a", "b"], "value": [1, 2]}),
+            catalog_uri=self.catalog_uri,
+            base_uri=self._base("orders"),
+            partition_by=["day"],
+        )
+        with mock.patch.object(
+            SqlCatalog, "record_writes", autospec=True, side_effect=SqlCatalog.record_writes
+        ) as record_writes:
+            with write_batch(catalog_uri=self.catalog_uri, max_workers=2) as batch:
+                batch.write(
+                    "orders",
+                    pa.table({"day": ["b"], "value": [20]}),
+                    partition_by=["day"],
+                    mode="overwrite_partitions",
+                )
+                batch.write("customers", pa.table({"id": [1, 2]}), base_uri=self._base("c"))
+
+        self.assertEqual(record_writes.call_count, 1)
+        self.assertEqual([result.version for result in batch.results], [2, 1])
+        self.assertEqual([result.row_count for result in batch.results], [1, 2])
+        orders = read_dataset("orders", catalog_uri=self.catalog_uri).sort_by("value")
+        self.assertEqual(orders.column("value").to_pylist(), [1, 20])
+        customers = read_dataset("customers", catalog_uri=self.catalog_uri)
+        self.assertEqual(customers.column("id").to_pylist(), [1, 2])
+
+    def test_exception_commits_nothing(self) -> None:
+        with self.assertRaises(RuntimeError):
+            with write_batch(catalog_uri=self.catalog_uri) as batch:
+                batch.write("a", pa.table({"v": [1]}), base_uri=self._base("a"))
+                batch.write("b", pa.table({"v": [2]}), base_uri=self._base("b"))
+                raise RuntimeError("upstream failed")
+
+        self.assertEqual(self._current_versions("a", "b"), [0, 0])
+        with self.assertRaises(DatasetError):
+            batch.write("a", pa.table({"v": [1]}))
+
+    def test_conflicting_dataset_rolls_back_whole_batch(self) -> None:
+        for name in ("a", "b"):
+            write_dataset(
+                name,
+                pa.table({"day": ["x"], "v": [0]}),
+                catalog_uri=self.catalog_uri,
+                base_uri=self._base(name),
+                partition_by=["day"],
+            )
+
+        with self.assertRaises(CommitConflictError):
+            with write_batch(catalog_uri=self.catalog_uri) as batch:
+                batch.write("a", pa.table({"v": [1], "day": ["x"]}), partition_by=["day"])
+                batch.write(
+                    "b",
+                    pa.table({"v": [1], "day": ["x"]}),
+                    partition_by=["day"],
+                    mode="overwrite_partitions",
+                )
+                write_dataset(
+                    "b",
+                    pa.table({"day": ["x"], "v": [9]}),
+                    catalog_uri=self.catalog_uri,
+                    partition_by=["day"],
+                    mode="overwrite_partitions",
+                )
+
+        self.assertEqual(self._current_versions("a", "b"), [1, 2])
+
+    def test_rebases_over_concurrent_appends(self) -> None:
+        write_dataset(
+            "a", pa.table({"v": [0]}), catalog_uri=self.catalog_uri, base_uri=self._base("a")
+        )
+
+        with write_batch(catalog_uri=self.catalog_uri) as batch:
+            batch.write("a", pa.table({"v": [1]}))
+            batch.write("b", pa.table({"v": [2]}), base_uri=self._base("b"))
+            write_dataset("a", pa.table({"v": [5]}), catalog_uri=self.catalog_uri)
+
+        self.assertEqual([result.version for result in batch.results], [3, 1])
+        self.assertEqual(self._current_versions("a", "b"), [3, 1])
+
+    def test_rejects_duplicate_dataset(self) -> None:
+        batch = write_batch(catalog_uri=self.catalog_uri)
+        batch.write("a", pa.table({"v": [1]}), base_uri=self._base("a"))
+        with self.assertRaises(DatasetError):
+            batch.write("a", pa.table({"v": [2]}))
+        batch.abort()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,13 +1,19 @@
 from __future__ import annotations
 
+import os
 import pathlib
+import sqlite3
 import sys
+import tempfile
 import unittest
+from datetime import datetime, timedelta, timezone
 
 sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1] / "src"))
 
+from data_lagoon import catalog as catalog_module  # noqa: E402
 from data_lagoon import (  # noqa: E402
     CatalogError,
+    CommitConflictError,
     DatasetConflictError,
     DatasetIdentity,
     DatasetNotFoundError,
@@ -83,6 +89,241 @@ class CatalogCoreTests(unittest.TestCase):
         datasets = self.catalog.list_datasets()
         self.assertEqual([d.name for d in datasets], ["sales", "marketing"])
 
+    def test_record_write_rejects_stale_snapshot(self) -> None:
+        dataset = self.catalog.register_dataset("sales", "file:///tmp/sales")
+        files = [{"file_path": "file:///tmp/sales/v1/a.parquet", "row_count": 1}]
+        self.catalog.record_write_with_metadata(dataset, version=1, files=files)
+
+        with self.assertRaises(CommitConflictError):
+            self.catalog.record_write_with_metadata(dataset, version=1, files=files)
+        with self.assertRaises(CommitConflictError):
+            self.catalog.record_write_with_metadata(dataset, version=2, files=files)
+
+        latest = self.catalog.get_dataset_by_id(dataset.id)
+        self.assertEqual(latest.current_version, 1)
+        transactions = self.catalog.list_transactions_since(dataset.id, 0)
+        self.assertEqual([t["version"] for t in transactions], [1])
+
+    def test_row_groups_table_is_ordered_by_file(self) -> None:
+        dataset = self.catalog.register_dataset("sales", "file:///tmp/sales")
+        files = [
+            {
+                "file_path": f"file:///tmp/sales/v1/part-{i}.parquet",
+                "row_count": 2,
+                "row_groups": [
+                    {"row_group_index": 1, "row_count": 1, "byte_offset": 8, "byte_length": 4},
+                    {"row_group_index": 0, "row_count": 1, "byte_offset": 4, "byte_length": 4},
+                ],
+            }
+            for i in range(2)
+        ]
+        self.catalog.record_write_with_metadata(dataset, version=1, files=files)
+        file_ids = [
+            record["id"] for record in self.catalog.list_file_records_for_version(dataset.id, 1)
+        ]
+
+        table = self.catalog.fetch_row_groups_table(file_ids)
+        self.assertEqual(table.column("file_id").to_pylist(), sorted(file_ids * 2))
+        self.assertEqual(table.column("row_group_index").to_pylist(), [0, 1, 0, 1])
+        self.assertEqual(table.column("byte_offset").to_pylist(), [4, 8, 4, 8])
+        self.assertEqual(self.catalog.fetch_row_groups_table([]).num_rows, 0)
+
+    def test_storage_options_round_trip(self) -> None:
+        dataset = self.catalog.register_dataset(
+            "sales", "s3://bucket/sales", storage_options={"anon": True}
+        )
+        self.assertEqual(dataset.storage_options, {"anon": True})
+
+        updated = self.catalog.set_storage_options(dataset, {"endpoint_url": "http://minio"})
+        self.assertEqual(
+            self.catalog.resolve_dataset("sales").storage_options,
+            {"endpoint_url": "http://minio"},
+        )
+        self.assertIsNone(self.catalog.set_storage_options(updated, None).storage_options)
+
+
+class SqliteProfileTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.catalog_path = os.path.join(self.temp_dir.name, "catalog.db")
+
+    def tearDown(self) -> None:
+        self.temp_dir.cleanup()
+
+    def _pragma(self, catalog: SqlCatalog, name: str) -> object:
+        return catalog._connection.execute(f"PRAGMA {name}").fetchone()[0]
+
+    def test_default_profile_enables_wal(self) -> None:
+        catalog = connect_catalog(f"sqlite:///{self.catalog_path}")
+        try:
+            self.assertEqual(self._pragma(catalog, "journal_mode"), "wal")
+            self.assertEqual(self._pragma(catalog, "synchronous"), 1)  # NORMAL
+            self.assertEqual(self._pragma(catalog, "busy_timeout"), 30_000)
+        finally:
+            catalog.close()
+
+    def test_profile_and_overrides_from_query(self) -> None:
+        catalog = connect_catalog(
+            f"sqlite:///{self.catalog_path}?profile=legacy&busy_timeout_ms=1234"
+        )
+        try:
+            self.assertEqual(self._pragma(catalog, "journal_mode"), "delete")
+            self.assertEqual(self._pragma(catalog, "busy_timeout"), 1234)
+        finally:
+            catalog.close()
+        with self.assertRaises(CatalogError):
+            connect_catalog(f"sqlite:///{self.catalog_path}?profile=unknown")
+        with self.assertRaises(CatalogError):
+            connect_catalog(f"sqlite:///{self.catalog_path}?synchronous=off;drop")
+
+    def test_read_only_connection_rejects_writes(self) -> None:
+        writer = connect_catalog(f"sqlite:///{self.catalog_path}")
+        writer.register_dataset("sales", "file:///tmp/sales")
+        writer.close()
+
+        reader = connect_catalog(f"sqlite:///{self.catalog_path}", read_only=True)
+        try:
+            self.assertTrue(reader.read_only)
+            self.assertEqual(reader.resolve_dataset("sales").name, "sales")
+            with self.assertRaises(sqlite3.OperationalError):
+                reader.register_dataset("other", "file:///tmp/other")
+        finally:
+            reader.close()
+
+
+@unittest.skipIf(catalog_module.duckdb is None, "duckdb not installed")
+class DuckDBCatalogTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.catalog = connect_catalog(
+            f"duckdb://{os.path.join(self.temp_dir.name, 'catalog.duckdb')}"
+        )
+
+    def tearDown(self) -> None:
+        self.catalog.close()
+        self.temp_dir.cleanup()
+
+    def test_bulk_commit_and_arrow_row_groups(self) -> None:
+        dataset = self.catalog.register_dataset("sales", "file:///tmp/sales")
+        files = [
+            {
+                "file_path": f"file:///tmp/sales/v1/part-{i}.parquet",
+                "row_count": 20,
+                "partitions": {"day": str(i)},
+                "row_groups": [
+                    {"row_group_index": 0, "row_count": 10, "stats_min": {"v": 0}},
+                    {"row_group_index": 1, "row_count": 10, "stats_min": {"v": 10}},
+                ],
+            }
+            for i in range(3)
+        ]
+        updated = self.catalog.record_write_with_metadata(dataset, version=1, files=files)
+        self.assertEqual(updated.current_version, 1)
+
+        records = self.catalog.list_file_records_for_version(dataset.id, 1)
+        file_ids = [record["id"] for record in records]
+        self.assertEqual(len(set(file_ids)), 3)
+
+        table = self.catalog.fetch_row_groups_table(file_ids)
+        self.assertEqual(table.num_rows, 6)
+        self.assertEqual(table.column_names[0], "file_id")
+        grouped = self.catalog.fetch_row_groups_for_files(file_ids)
+        self.assertEqual(
+            [rg["row_count"] for rg in grouped[file_ids[0]]], [10, 10]
+        )
+        self.assertEqual(
+            self.catalog.fetch_partitions_for_files(file_ids)[file_ids[2]], {"day": "2"}
+        )
+
+        with self.assertRaises(CommitConflictError):
+            self.catalog.record_write_with_metadata(dataset, version=1, files=files)
+        self.assertEqual(len(self.catalog.list_file_records_for_version(dataset.id, 1)), 3)
+
+    def test_read_only_open_while_writer_is_connected(self) -> None:
+        self.catalog.register_dataset("sales", "file:///tmp/sales")
+        reader = connect_catalog(
+            f"duckdb://{os.path.join(self.temp_dir.name, 'catalog.duckdb')}", read_only=True
+        )
+        try:
+            self.assertEqual(reader.resolve_dataset("sales").name, "sales")
+        finally:
+            reader.close()
+
+
+POSTGRES_URI = os.environ.get("DATA_LAGOON_TEST_POSTGRES_URI")
+
+
+@unittest.skipUnless(POSTGRES_URI, "DATA_LAGOON_TEST_POSTGRES_URI not set")
+class PostgresCatalogTests(unittest.TestCase):
+    def setUp(self) -> None:
+        catalog = connect_catalog(POSTGRES_URI)
+        try:
+            catalog._execute(
+                "DROP TABLE IF EXISTS write_intents, deletion_vectors, partitions, row_groups, "
+                "files, transactions, schema_versions, datasets CASCADE"
+            )
+        finally:
+            catalog.close()
+        self.catalog = connect_catalog(POSTGRES_URI)
+
+    def tearDown(self) -> None:
+        self.catalog.close()
+
+    def test_register_and_resolve(self) -> None:
+        created = self.catalog.register_dataset("sales", "file:///tmp/sales")
+        self.assertEqual(self.catalog.backend, "postgresql")
+        self.assertEqual(self.catalog.resolve_dataset("sales"), created)
+        with self.assertRaises(DatasetConflictError):
+            self.catalog.register_dataset("sales", "file:///tmp/other")
+
+    def test_schema_versions_and_commit_conflicts(self) -> None:
+        dataset = self.catalog.register_dataset("sales", "file:///tmp/sales")
+        first = self.catalog.ensure_schema_version(dataset.id, b"schema-a")
+        second = self.catalog.ensure_schema_version(dataset.id, b"schema-b")
+        self.assertNotEqual(first, second)
+        self.assertEqual(self.catalog.ensure_schema_version(dataset.id, b"schema-a"), first)
+        self.assertEqual(self.catalog.get_latest_schema_bytes(dataset.id), b"schema-b")
+
+        files = [
+            {
+                "file_path": "file:///tmp/sales/v1/a.parquet",
+                "row_count": 2,
+                "schema_version_id": second,
+                "partitions": {"day": "1"},
+                "row_groups": [{"row_group_index": 0, "row_count": 2}],
+            }
+        ]
+        self.catalog.record_write_with_metadata(dataset, version=1, files=files)
+        with self.assertRaises(CommitConflictError):
+            self.catalog.record_write_with_metadata(dataset, version=1, files=files)
+        records = self.catalog.list_file_records_for_version(dataset.id, 1)
+        self.assertEqual(len(records), 1)
+        self.assertEqual(
+            self.catalog.fetch_partitions_for_files([records[0]["id"]]),
+            {records[0]["id"]: {"day": "1"}},
+        )
+
+    def test_commit_times_are_utc_in_any_session_time_zone(self) -> None:
+        connection = self.catalog._connection
+        connection.execute("SET TIME ZONE 'America/New_York'")
+        catalog = SqlCatalog(connection, backend="postgresql")
+        dataset = catalog.register_dataset("sales", "file:///tmp/sales")
+        catalog.record_write_with_metadata(
+            dataset, version=1, files=[{"file_path": "file:///tmp/sales/v1/a.parquet"}]
+        )
+        now = datetime.now(timezone.utc)
+
+        self.assertEqual(catalog.find_version_as_of(dataset.id, now), 1)
+        committed = catalog.list_versions(dataset.id)[0]["timestamp"]
+        self.assertLess(abs(committed - now.replace(tzinfo=None)), timedelta(minutes=1))
+
+    def test_pooled_connections_are_reused(self) -> None:
+        for _ in range(20):
+            connect_catalog(POSTGRES_URI).close()
+        self.assertEqual(len(catalog_module._POSTGRES_POOLS), 1)
+        pool = next(iter(catalog_module._POSTGRES_POOLS.values()))
+        self.assertLessEqual(pool.get_stats()["pool_size"], 2)
+
 
 class HelperFunctionTests(unittest.TestCase):
     def test_looks_like_uri(self) -> None:
@@ -1,20 +1,47 @@
 from __future__ import annotations
 
+import json
 import os
 import pathlib
 import sys
 import tempfile
 import unittest
+from datetime import datetime, timedelta, timezone
+from typing import Any
+from unittest import mock
 
 import fsspec
 import sqlite3
 import pyarrow as pa
 import pyarrow.dataset as ds
+import pyarrow.parquet as pq
 
 sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1] / "src"))
 
-from data_lagoon import DatasetRef, SchemaMismatchError  # noqa: E402
-from data_lagoon.dataset import DatasetError, read_dataset, write_dataset  # noqa: E402
+from data_lagoon import (  # noqa: E402
+    CommitConflictError,
+    DatasetRef,
+    SchemaMismatchError,
+    SqlCatalog,
+    connect_catalog,
+)
+from data_lagoon import catalog as catalog_module  # noqa: E402
+from data_lagoon import dataset as dataset_module  # noqa: E402
+from data_lagoon.dataset import (  # noqa: E402
+    DatasetError,
+    ParquetWriteProfile,
+    WriteResult,
+    head,
+    list_versions,
+    pd,
+    pl,
+    read_changes,
+    read_dataset,
+    sample,
+    set_write_profile,
+    write_dataset,
+)
+from data_lagoon.storage import StagingOptions, clear_filesystem_cache  # noqa: E402
 
 
 class DatasetReadWriteTests(unittest.TestCase):
@@ -94,6 +121,30 @@ class DatasetReadWriteTests(unittest.TestCase):
         finally:
             conn.close()
 
+    def test_read_upgrades_catalog_created_by_older_release(self) -> None:
+        write_dataset(
+            "example",
+            pa.table({"value": [1, 2, 3]}),
+            catalog_uri=self.catalog_uri,
+            base_uri=self.base_uri,
+        )
+        # Reduce the catalog to the layout of the first release.
+        conn = sqlite3.connect(self.catalog_path)
+        try:
+            conn.execute("DROP TABLE deletion_vectors")
+            conn.execute("DROP TABLE write_intents")
+            conn.execute("ALTER TABLE files DROP COLUMN footer_length")
+            conn.execute("ALTER TABLE row_groups DROP COLUMN byte_offset")
+            conn.execute("ALTER TABLE row_groups DROP COLUMN byte_length")
+            conn.execute("ALTER TABLE datasets DROP COLUMN storage_options_json")
+            conn.execute("ALTER TABLE datasets DROP COLUMN write_profile_json")
+            conn.commit()
+        finally:
+            conn.close()
+
+        result = read_dataset("example", catalog_uri=self.catalog_uri)
+        self.assertEqual(result.column("value").to_pylist(), [1, 2, 3])
+
     def test_partition_predicate_filters_rows(self) -> None:
         table = pa.table(
             {"date": ["2024-01-01", "2024-01-02"], "value": [1, 2]}
@@ -234,6 +285,652 @@ class DatasetReadWriteTests(unittest.TestCase):
         result = read_dataset("example", catalog_uri=self.catalog_uri)
         self.assertEqual(result.column("value").type, pa.int64())
 
+    def _write_row_groups(self, values: list[list[int]]) -> None:
+        schema = pa.schema([("value", pa.int64())])
+        batches = [
+            pa.RecordBatch.from_arrays([pa.array(chunk)], schema.names)
+            for chunk in values
+        ]
+        reader = pa.RecordBatchReader.from_batches(schema, batches)
+        write_dataset(
+            "example",
+            reader,
+            catalog_uri=self.catalog_uri,
+            base_uri=self.base_uri,
+        )
+
+    def test_limit_returns_leading_rows(self) -> None:
+        self._write_row_groups([[0, 1, 2], [3, 4]])
+
+        limited = read_dataset("example", catalog_uri=self.catalog_uri, limit=2)
+        self.assertEqual(limited.to_pydict(), {"value": [0, 1]})
+
+        self.assertEqual(head("example", 4, catalog_uri=self.catalog_uri).num_rows, 4)
+        self.assertEqual(head("example", 0, catalog_uri=self.catalog_uri).num_rows, 0)
+
+    def test_limit_prunes_row_groups_without_predicates(self) -> None:
+        self._write_row_groups([[0, 1, 2], [3, 4]])
+
+        dataset_obj = read_dataset(
+            "example", catalog_uri=self.catalog_uri, limit=2, as_dataset=True
+        )
+        fragments = list(dataset_obj.get_fragments())
+        self.assertEqual(len(fragments), 1)
+        self.assertEqual([rg.id for rg in fragments[0].row_groups], [0])
+
+    def test_limit_with_predicates(self) -> None:
+        self._write_row_groups([[0, 1, 2], [3, 4]])
+
+        limited = read_dataset(
+            "example",
+            catalog_uri=self.catalog_uri,
+            predicates=[("value", ">=", 1)],
+            limit=3,
+        )
+        self.assertEqual(limited.to_pydict(), {"value": [1, 2, 3]})
+
+    def test_negative_limit_raises(self) -> None:
+        self._write_row_groups([[0]])
+        with self.assertRaises(DatasetError):
+            read_dataset("example", catalog_uri=self.catalog_uri, limit=-1)
+
+    def test_sample_by_count_reads_subset_of_row_groups(self) -> None:
+        self._write_row_groups([[i * 10 + j for j in range(10)] for i in range(10)])
+
+        sampled = sample("example", n=15, seed=7, catalog_uri=self.catalog_uri)
+        self.assertEqual(sampled.num_rows, 15)
+        values = sampled.column("value").to_pylist()
+        self.assertEqual(len(set(values)), 15)
+        self.assertTrue(set(values) <= set(range(100)))
+
+        again = sample("example", n=15, seed=7, catalog_uri=self.catalog_uri)
+        self.assertEqual(again.to_pydict(), sampled.to_pydict())
+
+    def test_sample_by_fraction(self) -> None:
+        self._write_row_groups([[i * 10 + j for j in range(10)] for i in range(10)])
+        sampled = sample("example", fraction=0.3, seed=1, catalog_uri=self.catalog_uri)
+        self.assertEqual(sampled.num_rows, 30)
+
+    def test_sample_stratified_by_partition(self) -> None:
+        table = pa.table(
+            {
+                "date": ["2024-01-01"] * 20 + ["2024-01-02"] * 20,
+                "value": list(range(40)),
+            }
+        )
+        write_dataset(
+            "example",
+            table,
+            catalog_uri=self.catalog_uri,
+            base_uri=self.base_uri,
+            partition_by=["date"],
+        )
+        sampled = sample(
+            "example",
+            fraction=0.1,
+            seed=3,
+            stratify=True,
+            catalog_uri=self.catalog_uri,
+        )
+        self.assertEqual(
+            sorted(sampled.column("date").to_pylist()),
+            ["2024-01-01", "2024-01-01", "2024-01-02", "2024-01-02"],
+        )
+
+    def test_sample_requires_single_mode(self) -> None:
+        self._write_row_groups([[0]])
+        with self.assertRaises(DatasetError):
+            sample("example", catalog_uri=self.catalog_uri)
+        with self.assertRaises(DatasetError):
+            sample("example", fraction=0.5, n=1, catalog_uri=self.catalog_uri)
+
+    def test_old_version_read_with_latest_schema(self) -> None:
+        table1 = pa.table({"value": pa.array([1, 2], type=pa.int32())})
+        write_dataset(
+            "example",
+            table1,
+            catalog_uri=self.catalog_uri,
+            base_uri=self.base_uri,
+        )
+        table2 = pa.table({"value": pa.array([3], type=pa.int64()), "extra": [10]})
+        write_dataset("example", table2, catalog_uri=self.catalog_uri)
+
+        conn = sqlite3.connect(self.catalog_path)
+        try:
+            versions = conn.execute(
+                "SELECT version FROM schema_versions ORDER BY version"
+            ).fetchall()
+            self.assertEqual(versions, [(0,), (1,)])
+        finally:
+            conn.close()
+
+        previous = read_dataset("example", catalog_uri=self.catalog_uri, version=1)
+        self.assertEqual(previous.schema.field("value").type, pa.int64())
+        self.assertEqual(previous.to_pydict(), {"value": [1, 2], "extra": [None, None]})
+
+    @unittest.skipIf(pd is None, "pandas not installed")
+    def test_read_pandas_output_uses_arrow_dtypes(self) -> None:
+        table = pa.table({"value": [1, 2, 3], "name": ["a", "b", "c"]})
+        write_dataset("example", table, catalog_uri=self.catalog_uri, base_uri=self.base_uri)
+
+        frame = read_dataset("example", catalog_uri=self.catalog_uri, output="pandas")
+        self.assertIsInstance(frame, pd.DataFrame)
+        self.assertIsInstance(frame["value"].dtype, pd.ArrowDtype)
+        self.assertEqual(frame["name"].tolist(), ["a", "b", "c"])
+
+    @unittest.skipIf(pd is None or pl is None, "pandas and polars not installed")
+    def test_frame_outputs_are_assembled_from_record_batches(self) -> None:
+        table = pa.table({"value": list(range(10)), "name": [f"n{i}" for i in range(10)]})
+        write_dataset(
+            "example",
+            table,
+            catalog_uri=self.catalog_uri,
+            base_uri=self.base_uri,
+            write_profile=ParquetWriteProfile(max_rows_per_group=3),
+        )
+
+        frame = read_dataset("example", catalog_uri=self.catalog_uri, output="pandas")
+        self.assertEqual(frame["value"].tolist(), list(range(10)))
+        self.assertEqual(list(frame.index), list(range(10)))
+        self.assertIsInstance(frame["name"].dtype, pd.ArrowDtype)
+        polars_frame = read_dataset("example", catalog_uri=self.catalog_uri, output="polars")
+        self.assertEqual(polars_frame["name"].to_list(), table.column("name").to_pylist())
+
+        empty = read_dataset(
+            "example",
+            catalog_uri=self.catalog_uri,
+            predicates=[("name", "==", "n10")],
+            output="pandas",
+        )
+        self.assertEqual(list(empty.columns), ["value", "name"])
+        self.assertEqual(len(empty), 0)
+
+    @unittest.skipIf(pl is None, "polars not installed")
+    def test_read_polars_output(self) -> None:
+        table = pa.table({"value": [1, 2, 3]})
+        write_dataset("example", table, catalog_uri=self.catalog_uri, base_uri=self.base_uri)
+
+        frame = head("example", 2, catalog_uri=self.catalog_uri, output="polars")
+        self.assertIsInstance(frame, pl.DataFrame)
+        self.assertEqual(frame["value"].to_list(), [1, 2])
+
+    def test_read_rejects_unknown_output(self) -> None:
+        table = pa.table({"value": [1]})
+        write_dataset("example", table, catalog_uri=self.catalog_uri, base_uri=self.base_uri)
+        with self.assertRaises(DatasetError):
+            read_dataset("example", catalog_uri=self.catalog_uri, output="numpy")
+        with self.assertRaises(DatasetError):
+            read_dataset(
+                "example", catalog_uri=self.catalog_uri, as_dataset=True, output="polars"
+            )
+
+    def test_write_retries_after_concurrent_append(self) -> None:
+        write_dataset(
+            "example", pa.table({"value": [1]}), catalog_uri=self.catalog_uri, base_uri=self.base_uri
+        )
+        original = SqlCatalog.record_write_with_metadata
+        raced = []
+
+        def racing_commit(catalog, dataset, **kwargs):
+            if not raced:
+                raced.append(True)
+                write_dataset("example", pa.table({"value": [2]}), catalog_uri=self.catalog_uri)
+            return original(catalog, dataset, **kwargs)
+
+        with mock.patch.object(SqlCatalog, "record_write_with_metadata", racing_commit):
+            result = write_dataset(
+                "example", pa.table({"value": [3]}), catalog_uri=self.catalog_uri
+            )
+
+        self.assertEqual(result.version, 3)
+        self.assertTrue(all(self._uri_exists(path) for path in result.files))
+        self.assertEqual(
+            read_dataset("example", catalog_uri=self.catalog_uri).to_pydict(), {"value": [3]}
+        )
+        self.assertEqual(
+            read_dataset("example", catalog_uri=self.catalog_uri, version=2).to_pydict(),
+            {"value": [2]},
+        )
+
+    def test_write_gives_up_after_max_commit_retries(self) -> None:
+        write_dataset(
+            "example", pa.table({"value": [1]}), catalog_uri=self.catalog_uri, base_uri=self.base_uri
+        )
+        original = SqlCatalog.record_write_with_metadata
+
+        racing = []
+
+        def always_raced(catalog, dataset, **kwargs):
+            if not racing:
+                racing.append(True)
+                try:
+                    write_dataset(
+                        "example", pa.table({"value": [0]}), catalog_uri=self.catalog_uri
+                    )
+                finally:
+                    racing.pop()
+            return original(catalog, dataset, **kwargs)
+
+        with mock.patch.object(SqlCatalog, "record_write_with_metadata", always_raced):
+            with self.assertRaises(CommitConflictError):
+                write_dataset(
+                    "example",
+                    pa.table({"value": [3]}),
+                    catalog_uri=self.catalog_uri,
+                    max_commit_retries=1,
+                )
+
+    def test_overwrite_partitions_replaces_only_incoming_partitions(self) -> None:
+        write_dataset(
+            "example",
+            pa.table({"day": ["a", "b", "c"], "value": [1, 2, 3]}),
+            catalog_uri=self.catalog_uri,
+            base_uri=self.base_uri,
+            partition_by=["day"],
+        )
+        result = write_dataset(
+            "example",
+            pa.table({"day": ["b", "b"], "value": [20, 21]}),
+            catalog_uri=self.catalog_uri,
+            partition_by=["day"],
+            mode="overwrite_partitions",
+        )
+
+        self.assertEqual(result.version, 2)
+        latest = read_dataset("example", catalog_uri=self.catalog_uri).sort_by("value")
+        self.assertEqual(latest.column("value").to_pylist(), [1, 3, 20, 21])
+        self.assertEqual(latest.column("day").to_pylist(), ["a", "c", "b", "b"])
+        partition_b = read_dataset(
+            "example", catalog_uri=self.catalog_uri, predicates=[("day", "==", "b")]
+        )
+        self.assertEqual(sorted(partition_b.column("value").to_pylist()), [20, 21])
+        self.assertEqual(
+            sorted(read_dataset("example", catalog_uri=self.catalog_uri, version=1)
+                   .column("value").to_pylist()),
+            [1, 2, 3],
+        )
+
+    def test_overwrite_partitions_requires_partition_by(self) -> None:
+        with self.assertRaises(DatasetError):
+            write_dataset(
+                "example",
+                pa.table({"value": [1]}),
+                catalog_uri=self.catalog_uri,
+                base_uri=self.base_uri,
+                mode="overwrite_partitions",
+            )
+        with self.assertRaises(DatasetError):
+            write_dataset(
+                "example",
+                pa.table({"value": [1]}),
+                catalog_uri=self.catalog_uri,
+                base_uri=self.base_uri,
+                mode="replace",
+            )
+
+    def test_concurrent_partition_overwrites(self) -> None:
+        write_dataset(
+            "example",
+            pa.table({"day": ["a", "b"], "value": [1, 2]}),
+            catalog_uri=self.catalog_uri,
+            base_uri=self.base_uri,
+            partition_by=["day"],
+        )
+        original = SqlCatalog.record_write_with_metadata
+
+        def overwrite(day: str, value: int) -> WriteResult:
+            return write_dataset(
+                "example",
+                pa.table({"day": [day], "value": [value]}),
+                catalog_uri=self.catalog_uri,
+                partition_by=["day"],
+                mode="overwrite_partitions",
+            )
+
+        def racing_commit(racing_day):
+            raced = []
+
+            def commit(catalog, dataset, **kwargs):
+                if not raced:
+                    raced.append(True)
+                    overwrite(racing_day, 100)
+                return original(catalog, dataset, **kwargs)
+
+            return commit
+
+        with mock.patch.object(SqlCatalog, "record_write_with_metadata", racing_commit("a")):
+            result = overwrite("b", 200)
+        self.assertEqual(result.version, 3)
+        self.assertEqual(
+            sorted(read_dataset("example", catalog_uri=self.catalog_uri)
+                   .column("value").to_pylist()),
+            [100, 200],
+        )
+
+        with mock.patch.object(SqlCatalog, "record_write_with_metadata", racing_commit("b")):
+            with self.assertRaises(CommitConflictError):
+                overwrite("b", 300)
+
+    def _changes(self, *args, **kwargs) -> list[tuple]:
+        table = read_changes("example", *args, catalog_uri=self.catalog_uri, **kwargs)
+        columns = ["_commit_version", "_change_type", "day", "value"]
+        return sorted(zip(*(table.column(name).to_pylist() for name in columns)))
+
+    def test_read_changes_diffs_versions_from_catalog(self) -> None:
+        write_dataset(
+            "example",
+            pa.table({"day": ["a", "b"], "value": [1, 2]}),
+            catalog_uri=self.catalog_uri,
+            base_uri=self.base_uri,
+            partition_by=["day"],
+        )
+        write_dataset(
+            "example",
+            pa.table({"day": ["b"], "value": [20]}),
+            catalog_uri=self.catalog_uri,
+            partition_by=["day"],
+            mode="overwrite_partitions",
+        )
+
+        self.assertEqual(
+            self._changes(1),
+            [(2, "delete", "b", 2), (2, "insert", "b", 20)],
+        )
+        self.assertEqual(
+            self._changes(0, 1),
+            [(1, "insert", "a", 1), (1, "insert", "b", 2)],
+        )
+        self.assertEqual(
+            self._changes(0, predicates=[("day", "==", "a")]), [(1, "insert", "a", 1)]
+        )
+        self.assertEqual(self._changes(2), [])
+
+    def test_read_changes_validates_range(self) -> None:
+        write_dataset(
+            "example",
+            pa.table({"value": [1]}),
+            catalog_uri=self.catalog_uri,
+            base_uri=self.base_uri,
+        )
+        with self.assertRaises(DatasetError):
+            read_changes("example", 2, 1, catalog_uri=self.catalog_uri)
+        with self.assertRaises(DatasetError):
+            read_changes("example", 0, 5, catalog_uri=self.catalog_uri)
+
+    def _write_timed_versions(self) -> None:
+        for value in (1, 2, 3):
+            write_dataset(
+                "example",
+                pa.table({"value": [value] * value}),
+                catalog_uri=self.catalog_uri,
+                base_uri=self.base_uri,
+            )
+        with sqlite3.connect(self.catalog_path) as conn:
+            for version, day in ((1, 1), (2, 2), (3, 3)):
+                conn.execute(
+                    "UPDATE transactions SET timestamp = ? WHERE version = ?",
+                    (f"2026-03-0{day} 00:00:00", version),
+                )
+
+    def test_read_as_of_timestamp(self) -> None:
+        self._write_timed_versions()
+
+        def values(as_of: datetime) -> list[int]:
+            table = read_dataset("example", catalog_uri=self.catalog_uri, as_of=as_of)
+            return table.column("value").to_pylist()
+
+        self.assertEqual(values(datetime(2026, 3, 2)), [2, 2])
+        self.assertEqual(values(datetime(2026, 3, 2, 12, 30)), [2, 2])
+        self.assertEqual(values(datetime(2026, 3, 2, 1, tzinfo=timezone.utc)), [2, 2])
+        self.assertEqual(values(datetime(2027, 1, 1)), [3, 3, 3])
+        with self.assertRaises(DatasetError):
+            values(datetime(2026, 2, 1))
+        with self.assertRaises(DatasetError):
+            read_dataset(
+                "example", catalog_uri=self.catalog_uri, version=1, as_of=datetime(2026, 3, 2)
+            )
+
+    def test_list_versions_reports_counts(self) -> None:
+        self._write_timed_versions()
+
+        versions = list_versions("example", catalog_uri=self.catalog_uri)
+
+        self.assertEqual([info.version for info in versions], [1, 2, 3])
+        self.assertEqual([info.row_count for info in versions], [1, 2, 3])
+        self.assertEqual([info.file_count for info in versions], [1, 1, 1])
+        self.assertEqual(versions[0].operation, "append")
+        self.assertEqual(versions[2].timestamp, datetime(2026, 3, 3))
+
+    def test_prefetch_reads_footers_and_row_groups_in_one_batch(self) -> None:
+        schema = pa.schema([("value", pa.int64())])
+        batches = [
+            pa.RecordBatch.from_arrays([pa.array([0, 1, 2])], schema.names),
+            pa.RecordBatch.from_arrays([pa.array([3, 4])], schema.names),
+        ]
+        reader = pa.RecordBatchReader.from_batches(schema, batches)
+        write_dataset("example", reader, catalog_uri=self.catalog_uri, base_uri=self.base_uri)
+
+        with mock.patch(
+            "data_lagoon.dataset.fetch_ranges", wraps=dataset_module.fetch_ranges
+        ) as fetch:
+            filtered = read_dataset(
+                "example",
+                catalog_uri=self.catalog_uri,
+                predicates=[("value", ">=", 3)],
+                prefetch=True,
+            )
+            lazy = read_dataset(
+                "example", catalog_uri=self.catalog_uri, as_dataset=True, prefetch=True
+            )
+            self.assertEqual(lazy.to_table().to_pydict(), {"value": [0, 1, 2, 3, 4]})
+
+        self.assertEqual(filtered.to_pydict(), {"value": [3, 4]})
+        self.assertEqual(fetch.call_count, 2)
+        # Footer plus the one selected row group, then the footer alone.
+        (_, requests), _ = fetch.call_args_list[0]
+        self.assertEqual([len(ranges) for ranges in requests.values()], [2])
+        (_, requests), _ = fetch.call_args_list[1]
+        self.assertEqual([len(ranges) for ranges in requests.values()], [1])
+
+    def test_footer_length_recorded_at_write(self) -> None:
+        result = write_dataset(
+            "example",
+            pa.table({"value": [1, 2, 3]}),
+            catalog_uri=self.catalog_uri,
+            base_uri=self.base_uri,
+        )
+        with fsspec.open(result.files[0], "rb") as handle:
+            data = handle.read()
+        metadata_length = int.from_bytes(data[-8:-4], "little")
+
+        conn = sqlite3.connect(self.catalog_path)
+        try:
+            (footer_length,) = conn.execute("SELECT footer_length FROM files").fetchone()
+        finally:
+            conn.close()
+        self.assertEqual(footer_length, metadata_length + 8)
+
+    def test_storage_options_merge_catalog_and_call(self) -> None:
+        catalog = connect_catalog(self.catalog_uri)
+        try:
+            catalog.register_dataset(
+                "example", self.base_uri, storage_options={"auto_mkdir": True, "tag": "a"}
+            )
+        finally:
+            catalog.close()
+
+        with mock.patch(
+            "data_lagoon.dataset.resolve_filesystem", wraps=dataset_module.resolve_filesystem
+        ) as resolve:
+            write_dataset(
+                "example",
+                pa.table({"value": [1]}),
+                catalog_uri=self.catalog_uri,
+                storage_options={"tag": "b"},
+            )
+            read_back = read_dataset("example", catalog_uri=self.catalog_uri)
+
+        self.assertEqual(read_back.to_pydict(), {"value": [1]})
+        options = [call.kwargs["storage_options"] for call in resolve.call_args_list]
+        self.assertEqual(options[0], {"auto_mkdir": True, "tag": "b"})
+        self.assertEqual(options[-1], {"auto_mkdir": True, "tag": "a"})
+
+    def test_filesystems_are_cached_across_files_and_calls(self) -> None:
+        table = pa.table({"day": ["a", "b", "c"], "value": [1, 2, 3]})
+        write_dataset(
+            "example",
+            table,
+            catalog_uri=self.catalog_uri,
+            base_uri=self.base_uri,
+            partition_by=["day"],
+        )
+        clear_filesystem_cache()
+
+        with mock.patch(
+            "data_lagoon.storage.fsspec.url_to_fs", wraps=fsspec.url_to_fs
+        ) as url_to_fs:
+            for _ in range(2):
+                self.assertEqual(
+                    read_dataset("example", catalog_uri=self.catalog_uri).num_rows, 3
+                )
+        self.assertEqual(url_to_fs.call_count, 1)
+
+    def test_staged_write_uploads_files_to_final_paths(self) -> None:
+        staging_root = os.path.join(self.temp_dir.name, "staging")
+        os.makedirs(staging_root)
+        base_uri = "memory://bucket/staged"
+        table = pa.table({"day": ["a", "b", "a"], "value": [1, 2, 3]})
+
+        with mock.patch(
+            "data_lagoon.dataset.upload_files", wraps=dataset_module.upload_files
+        ) as upload:
+            result = write_dataset(
+                DatasetRef(name="staged", base_uri=base_uri),
+                table,
+                catalog_uri=self.catalog_uri,
+                partition_by=["day"],
+                staging=StagingOptions(directory=staging_root, max_workers=2),
+            )
+
+        self.assertEqual(upload.call_count, 1)
+        self.assertEqual(len(upload.call_args.args[1]), 2)
+        self.assertTrue(all("/bucket/staged/v1/day=" in path for path in result.files))
+        self.assertTrue(all(self._uri_exists(path) for path in result.files))
+        self.assertEqual(os.listdir(staging_root), [])
+
+        read_back = read_dataset("staged", catalog_uri=self.catalog_uri, prefetch=True)
+        self.assertEqual(sorted(read_back.column("value").to_pylist()), [1, 2, 3])
+        filtered = read_dataset(
+            "staged", catalog_uri=self.catalog_uri, predicates=[("day", "==", "b")]
+        )
+        self.assertEqual(filtered.column("value").to_pylist(), [2])
+
+    def _compressions(self, paths: list[str]) -> set[str]:
+        codecs = set()
+        for path in paths:
+            row_group = pq.read_metadata(path).row_group(0)
+            codecs.update(row_group.column(i).compression for i in range(row_group.num_columns))
+        return codecs
+
+    def test_write_profile_is_cataloged_and_applied(self) -> None:
+        table = pa.table({"name": ["a", "b", "c"], "value": [1.0, 2.0, 3.0]})
+        write_dataset("example", table, catalog_uri=self.catalog_uri, base_uri=self.base_uri)
+        set_write_profile("example", "balanced", catalog_uri=self.catalog_uri)
+
+        catalog = connect_catalog(self.catalog_uri)
+        try:
+            stored = catalog.get_dataset_by_name("example").write_profile
+        finally:
+            catalog.close()
+        self.assertEqual(stored["compression"], "zstd")
+
+        profiled = write_dataset("example", table, catalog_uri=self.catalog_uri)
+        self.assertEqual(self._compressions(profiled.files), {"ZSTD"})
+        override = write_dataset(
+            "example", table, catalog_uri=self.catalog_uri, write_profile="fast-write"
+        )
+        self.assertEqual(self._compressions(override.files), {"LZ4"})
+
+        set_write_profile("example", None, catalog_uri=self.catalog_uri)
+        restored = write_dataset("example", table, catalog_uri=self.catalog_uri)
+        self.assertEqual(self._compressions(restored.files), {"SNAPPY"})
+
+    def test_write_profile_bounds_row_groups_and_truncates_statistics(self) -> None:
+        profile = ParquetWriteProfile(max_rows_per_group=2, statistics_truncate_length=3)
+        table = pa.table(
+            {"name": ["apple-1", "apple-2", "melon-1", "melon-2"], "value": [1, 2, 3, 4]}
+        )
+        write_dataset(
+            "example",
+            table,
+            catalog_uri=self.catalog_uri,
+            base_uri=self.base_uri,
+            write_profile=profile,
+        )
+
+        with sqlite3.connect(self.catalog_path) as conn:
+            rows = conn.execute(
+                "SELECT stats_min_json, stats_max_json FROM row_groups ORDER BY row_group_index"
+            ).fetchall()
+        self.assertEqual(len(rows), 2)
+        self.assertEqual(json.loads(rows[0][0])["name"], "app")
+        self.assertEqual(json.loads(rows[0][1])["name"], "apq")
+
+        result = read_dataset(
+            "example", catalog_uri=self.catalog_uri, predicates=[("name", "==", "apple-2")]
+        )
+        self.assertEqual(result.column("value").to_pylist(), [2])
+        self.assertEqual(dataset_module._truncate_max("a\U0010ffff", 1), "b")
+        self.assertIsNone(dataset_module._truncate_max("\U0010ffff\U0010ffff", 1))
+
+    def test_unknown_write_profile_raises(self) -> None:
+        with self.assertRaises(DatasetError):
+            write_dataset(
+                "example",
+                pa.table({"value": [1]}),
+                catalog_uri=self.catalog_uri,
+                base_uri=self.base_uri,
+                write_profile="tiny",
+            )
+
+
+@unittest.skipIf(catalog_module.duckdb is None, "duckdb not installed")
+class NonUtcDuckDBTimeTravelTests(unittest.TestCase):
+    """Time travel against a DuckDB catalog opened on a host west of UTC."""
+
+    def setUp(self) -> None:
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.catalog_uri = f"duckdb://{os.path.join(self.temp_dir.name, 'catalog.duckdb')}"
+        connect = catalog_module.duckdb.connect
+
+        def connect_in_new_york(*args: Any, **kwargs: Any) -> Any:
+            # DuckDB takes its session time zone from the host's ``TZ``.
+            connection = connect(*args, **kwargs)
+            connection.execute("SET TimeZone = 'America/New_York'")
+            return connection
+
+        patcher = mock.patch.object(catalog_module.duckdb, "connect", connect_in_new_york)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self) -> None:
+        self.temp_dir.cleanup()
+
+    def test_as_of_and_list_versions_use_utc(self) -> None:
+        base_uri = os.path.join(self.temp_dir.name, "dataset")
+        write_dataset(
+            "example", pa.table({"v": [1]}), catalog_uri=self.catalog_uri, base_uri=base_uri
+        )
+        between = datetime.now(timezone.utc)
+        write_dataset("example", pa.table({"v": [2]}), catalog_uri=self.catalog_uri)
+
+        self.assertEqual(
+            read_dataset("example", catalog_uri=self.catalog_uri, as_of=between).to_pydict(),
+            {"v": [1]},
+        )
+        first = list_versions("example", catalog_uri=self.catalog_uri)[0].timestamp
+        self.assertLess(abs(first - between.replace(tzinfo=None)), timedelta(minutes=1))
+
 
 if __name__ == "__main__":
     unittest.main()
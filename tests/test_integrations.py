@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+import os
+import pathlib
+import sys
+import tempfile
+import unittest
+
+import pyarrow as pa
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1] / "src"))
+
+from data_lagoon.dataset import write_dataset  # noqa: E402
+from data_lagoon.integrations import (  # noqa: E402
+    datafusion,
+    duckdb,
+    pl,
+    scan_polars,
+    to_datafusion,
+    to_duckdb,
+)
+
+
+class EngineIntegrationTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.base_uri = os.path.join(self.temp_dir.name, "dataset")
+        self.catalog_uri = f"sqlite:///{os.path.join(self.temp_dir.name, 'catalog.db')}"
+        table = pa.table(
+            {
+                "date": ["2024-01-01", "2024-01-01", "2024-01-02"],
+                "value": [1, 2, 3],
+            }
+        )
+        write_dataset(
+            "example",
+            table,
+            catalog_uri=self.catalog_uri,
+            base_uri=self.base_uri,
+            partition_by=["date"],
+        )
+
+    def tearDown(self) -> None:
+        self.temp_dir.cleanup()
+
+    @unittest.skipIf(duckdb is None, "duckdb not installed")
+    def test_to_duckdb_relation(self) -> None:
+        relation = to_duckdb("example", catalog_uri=self.catalog_uri)
+        rows = relation.filter("date = '2024-01-01'").project("value").fetchall()
+        self.assertEqual(sorted(rows), [(1,), (2,)])
+
+    @unittest.skipIf(duckdb is None, "duckdb not installed")
+    def test_to_duckdb_registers_view(self) -> None:
+        connection = duckdb.connect()
+        to_duckdb(
+            "example",
+            catalog_uri=self.catalog_uri,
+            predicates=[("date", "==", "2024-01-02")],
+            connection=connection,
+            table_name="example",
+        )
+        rows = connection.sql("SELECT value FROM example").fetchall()
+        self.assertEqual(rows, [(3,)])
+
+    @unittest.skipIf(pl is None, "polars not installed")
+    def test_scan_polars_pushdown(self) -> None:
+        frame = (
+            scan_polars("example", catalog_uri=self.catalog_uri)
+            .filter(pl.col("value") >= 2)
+            .select("value")
+            .collect()
+        )
+        self.assertEqual(sorted(frame["value"].to_list()), [2, 3])
+
+    @unittest.skipIf(datafusion is None, "datafusion not installed")
+    def test_to_datafusion(self) -> None:
+        frame = to_datafusion("example", catalog_uri=self.catalog_uri)
+        result = frame.filter(datafusion.col("value") > datafusion.lit(1)).to_arrow_table()
+        self.assertEqual(sorted(result.column("value").to_pylist()), [2, 3])
+
+
+if __name__ == "__main__":
+    unittest.main()
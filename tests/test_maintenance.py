@@ -0,0 +1,448 @@
+from __future__ import annotations
+
+import os
+import pathlib
+import sqlite3
+import sys
+import tempfile
+import time
+import unittest
+from datetime import datetime, timedelta, timezone
+from typing import Any
+from unittest import mock
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1] / "src"))
+
+from data_lagoon import catalog as catalog_module  # noqa: E402
+from data_lagoon.catalog import (  # noqa: E402
+    CommitConflictError,
+    SqlCatalog,
+    connect_catalog,
+)
+from data_lagoon.dataset import DatasetError, read_dataset, write_dataset  # noqa: E402
+from data_lagoon.maintenance import (  # noqa: E402
+    compact_dataset,
+    expire_snapshots,
+    recover,
+    vacuum,
+)
+
+
+class CompactionTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.base_uri = os.path.join(self.temp_dir.name, "dataset")
+        self.catalog_uri = f"sqlite:///{os.path.join(self.temp_dir.name, 'catalog.db')}"
+
+    def tearDown(self) -> None:
+        self.temp_dir.cleanup()
+
+    def _write_small_files(self, tables: list[pa.Table], **kwargs) -> int:
+        """Commit one version that holds the files of several small writes."""
+
+        for table in tables:
+            write_dataset(
+                "example", table, catalog_uri=self.catalog_uri, base_uri=self.base_uri, **kwargs
+            )
+        catalog = connect_catalog(self.catalog_uri)
+        try:
+            dataset = catalog.resolve_dataset("example")
+            file_ids = [
+                record["id"]
+                for version in range(1, dataset.current_version + 1)
+                for record in catalog.list_file_records_for_version(dataset.id, version)
+            ]
+            catalog.record_write_with_metadata(
+                dataset,
+                version=dataset.current_version + 1,
+                files=[],
+                carried_file_ids=file_ids,
+            )
+            return dataset.current_version + 1
+        finally:
+            catalog.close()
+
+    def _files(self, version: int) -> list[str]:
+        catalog = connect_catalog(self.catalog_uri)
+        try:
+            dataset = catalog.resolve_dataset("example")
+            return list(catalog.list_files_for_version(dataset.id, version))
+        finally:
+            catalog.close()
+
+    def test_compaction_merges_small_files_into_new_version(self) -> None:
+        version = self._write_small_files(
+            [pa.table({"value": [i, i + 10]}) for i in range(4)]
+        )
+        self.assertEqual(len(self._files(version)), 4)
+
+        result = compact_dataset("example", catalog_uri=self.catalog_uri, sort_by=["value"])
+
+        self.assertEqual(result.version, version + 1)
+        self.assertEqual(result.dataset_ref.catalog_uri, self.catalog_uri)
+        self.assertIsNotNone(result.dataset_ref.dataset_id)
+        self.assertEqual(len(result.files_removed), 4)
+        self.assertEqual(self._files(result.version), list(result.files_added))
+        self.assertEqual(len(result.files_added), 1)
+        self.assertEqual(
+            read_dataset("example", catalog_uri=self.catalog_uri).to_pydict(),
+            {"value": [0, 1, 2, 3, 10, 11, 12, 13]},
+        )
+        self.assertEqual(
+            len(read_dataset("example", catalog_uri=self.catalog_uri, version=version)), 8
+        )
+
+    def test_compaction_respects_partitions_and_filter(self) -> None:
+        version = self._write_small_files(
+            [
+                pa.table({"day": ["a", "b"], "value": [1, 2]}),
+                pa.table({"day": ["a", "b"], "value": [3, 4]}),
+            ],
+            partition_by=["day"],
+        )
+
+        result = compact_dataset(
+            "example", catalog_uri=self.catalog_uri, partition_filter={"day": "a"}
+        )
+
+        self.assertEqual(len(result.files_removed), 2)
+        self.assertEqual(len(result.files_added), 1)
+        self.assertIn("day=a", result.files_added[0])
+        files = self._files(result.version)
+        self.assertEqual(len(files), 3)
+        table = read_dataset(
+            "example", catalog_uri=self.catalog_uri, predicates=[("day", "==", "b")]
+        )
+        self.assertEqual(sorted(table.column("value").to_pylist()), [2, 4])
+        table = read_dataset(
+            "example", catalog_uri=self.catalog_uri, predicates=[("value", ">=", 3)]
+        )
+        self.assertEqual(sorted(table.column("value").to_pylist()), [3, 4])
+
+    def test_files_above_target_are_left_alone(self) -> None:
+        version = self._write_small_files(
+            [pa.table({"value": [1]}), pa.table({"value": [2]})]
+        )
+
+        result = compact_dataset("example", catalog_uri=self.catalog_uri, target_file_size=1)
+
+        self.assertEqual(result.version, version)
+        self.assertEqual(list(result.files_added), [])
+
+    def test_compaction_conflicts_with_concurrent_commit(self) -> None:
+        self._write_small_files([pa.table({"value": [1]}), pa.table({"value": [2]})])
+        original = SqlCatalog.record_write_with_metadata
+        raced = []
+
+        def racing_commit(catalog, dataset, **kwargs):
+            if not raced:
+                raced.append(True)
+                write_dataset("example", pa.table({"value": [3]}), catalog_uri=self.catalog_uri)
+            return original(catalog, dataset, **kwargs)
+
+        with mock.patch.object(SqlCatalog, "record_write_with_metadata", racing_commit):
+            with self.assertRaises(CommitConflictError):
+                compact_dataset("example", catalog_uri=self.catalog_uri)
+
+
+class VacuumTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.base_uri = os.path.join(self.temp_dir.name, "dataset")
+        self.catalog_path = os.path.join(self.temp_dir.name, "catalog.db")
+        self.catalog_uri = f"sqlite:///{self.catalog_path}"
+        self.result = write_dataset(
+            "example",
+            pa.table({"day": ["a", "b"], "value": [1, 2]}),
+            catalog_uri=self.catalog_uri,
+            base_uri=self.base_uri,
+            partition_by=["day"],
+        )
+
+    def tearDown(self) -> None:
+        self.temp_dir.cleanup()
+
+    def _orphan(self, relative: str, age: timedelta) -> str:
+        path = os.path.join(self.base_uri, relative)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        pq.write_table(pa.table({"value": [0]}), path)
+        stamp = time.time() - age.total_seconds()
+        os.utime(path, (stamp, stamp))
+        return path
+
+    def test_vacuum_deletes_old_orphans_only(self) -> None:
+        old = self._orphan("v2/day=c/part-crashed.parquet", timedelta(days=30))
+        recent = self._orphan("v2/part-in-flight.parquet", timedelta(minutes=5))
+        unrelated = self._orphan("_staging/keep.parquet", timedelta(days=30))
+
+        result = vacuum("example", catalog_uri=self.catalog_uri, retention=timedelta(days=7))
+
+        self.assertEqual(len(result.deleted_files), 1)
+        self.assertTrue(result.deleted_files[0].endswith("part-crashed.parquet"))
+        self.assertEqual(result.dataset_ref.catalog_uri, self.catalog_uri)
+        self.assertIsNotNone(result.dataset_ref.dataset_id)
+        self.assertEqual(len(result.retained_files), 1)
+        self.assertFalse(os.path.exists(old))
+        self.assertFalse(os.path.exists(os.path.dirname(old)))
+        self.assertTrue(os.path.exists(recent))
+        self.assertTrue(os.path.exists(unrelated))
+        self.assertEqual(
+            read_dataset("example", catalog_uri=self.catalog_uri).num_rows, 2
+        )
+
+    def test_dry_run_keeps_files(self) -> None:
+        orphan = self._orphan("v1/part-orphan.parquet", timedelta(days=30))
+
+        result = vacuum(
+            "example", catalog_uri=self.catalog_uri, retention=timedelta(0), dry_run=True
+        )
+
+        self.assertTrue(result.dry_run)
+        self.assertEqual(len(result.deleted_files), 1)
+        self.assertTrue(os.path.exists(orphan))
+
+    def test_vacuum_removes_tombstoned_records(self) -> None:
+        with sqlite3.connect(self.catalog_path) as conn:
+            conn.execute("UPDATE files SET is_tombstoned = 1")
+        for path in self.result.files:
+            local = path.removeprefix("file://")
+            os.utime(local, (0, 0))
+
+        result = vacuum("example", catalog_uri=self.catalog_uri, retention=timedelta(days=1))
+
+        self.assertEqual(sorted(result.deleted_files), sorted(self.result.files))
+        with sqlite3.connect(self.catalog_path) as conn:
+            self.assertEqual(conn.execute("SELECT COUNT(*) FROM files").fetchone()[0], 0)
+            self.assertEqual(conn.execute("SELECT COUNT(*) FROM row_groups").fetchone()[0], 0)
+            self.assertEqual(conn.execute("SELECT COUNT(*) FROM partitions").fetchone()[0], 0)
+
+
+class ExpireSnapshotsTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.base_uri = os.path.join(self.temp_dir.name, "dataset")
+        self.catalog_path = os.path.join(self.temp_dir.name, "catalog.db")
+        self.catalog_uri = f"sqlite:///{self.catalog_path}"
+        self.files = [
+            write_dataset(
+                "example",
+                pa.table({"day": ["a"], "value": [i]}),
+                catalog_uri=self.catalog_uri,
+                base_uri=self.base_uri,
+                partition_by=["day"],
+            ).files[0]
+            for i in range(5)
+        ]
+
+    def tearDown(self) -> None:
+        self.temp_dir.cleanup()
+
+    def _count(self, sql: str) -> int:
+        with sqlite3.connect(self.catalog_path) as conn:
+            return conn.execute(sql).fetchone()[0]
+
+    def test_keep_last_expires_older_versions(self) -> None:
+        result = expire_snapshots(
+            "example", catalog_uri=self.catalog_uri, keep_last=2, batch_size=2
+        )
+
+        self.assertEqual(result.expired_through, 3)
+        self.assertEqual(result.versions_expired, 3)
+        self.assertEqual(result.dataset_ref.catalog_uri, self.catalog_uri)
+        self.assertIsNotNone(result.dataset_ref.dataset_id)
+        self.assertEqual(result.files_tombstoned, 3)
+        self.assertEqual(self._count("SELECT COUNT(*) FROM transactions"), 2)
+        self.assertEqual(self._count("SELECT COUNT(*) FROM files WHERE is_tombstoned = 1"), 3)
+        self.assertEqual(self._count("SELECT COUNT(*) FROM row_groups"), 2)
+        self.assertEqual(self._count("SELECT COUNT(*) FROM partitions"), 2)
+        self.assertEqual(
+            read_dataset("example", catalog_uri=self.catalog_uri, version=4).to_pydict(),
+            {"value": [3], "day": ["a"]},
+        )
+        with self.assertRaises(DatasetError):
+            read_dataset("example", catalog_uri=self.catalog_uri, version=1)
+
+        swept = vacuum("example", catalog_uri=self.catalog_uri, retention=timedelta(0))
+        self.assertEqual(sorted(swept.deleted_files), sorted(self.files[:3]))
+        self.assertEqual(self._count("SELECT COUNT(*) FROM files"), 2)
+
+    def test_files_carried_into_retained_versions_stay_live(self) -> None:
+        catalog = connect_catalog(self.catalog_uri)
+        try:
+            dataset = catalog.resolve_dataset("example")
+            file_ids = [
+                record["id"]
+                for record in catalog.list_file_records_for_version(dataset.id, 5)
+            ]
+            catalog.record_write_with_metadata(
+                dataset, version=6, files=[], carried_file_ids=file_ids
+            )
+        finally:
+            catalog.close()
+
+        result = expire_snapshots("example", catalog_uri=self.catalog_uri, keep_last=1)
+
+        self.assertEqual(result.versions_expired, 5)
+        self.assertEqual(result.files_tombstoned, 4)
+        self.assertEqual(
+            self._count("SELECT COUNT(*) FROM files WHERE is_tombstoned = 0"), 1
+        )
+        self.assertEqual(
+            read_dataset("example", catalog_uri=self.catalog_uri).column("value").to_pylist(),
+            [4],
+        )
+
+    def test_older_than_bounds_expiry(self) -> None:
+        result = expire_snapshots(
+            "example",
+            catalog_uri=self.catalog_uri,
+            older_than=datetime(2000, 1, 1, tzinfo=timezone.utc),
+        )
+        self.assertIsNone(result.expired_through)
+        self.assertEqual(self._count("SELECT COUNT(*) FROM transactions"), 5)
+
+        result = expire_snapshots(
+            "example",
+            catalog_uri=self.catalog_uri,
+            older_than=datetime.now(timezone.utc) + timedelta(minutes=1),
+        )
+        self.assertEqual(result.expired_through, 4)
+
+    def test_requires_a_bound(self) -> None:
+        with self.assertRaises(DatasetError):
+            expire_snapshots("example", catalog_uri=self.catalog_uri)
+
+
+class RecoveryTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.base_uri = os.path.join(self.temp_dir.name, "dataset")
+        self.catalog_path = os.path.join(self.temp_dir.name, "catalog.db")
+        self.catalog_uri = f"sqlite:///{self.catalog_path}"
+        write_dataset(
+            "example",
+            pa.table({"day": ["a"], "value": [1]}),
+            catalog_uri=self.catalog_uri,
+            base_uri=self.base_uri,
+            partition_by=["day"],
+        )
+
+    def tearDown(self) -> None:
+        self.temp_dir.cleanup()
+
+    def _crashed_write(self) -> None:
+        with mock.patch.object(
+            SqlCatalog, "record_write_with_metadata", side_effect=RuntimeError("crash")
+        ):
+            with self.assertRaises(RuntimeError):
+                write_dataset(
+                    "example",
+                    pa.table({"day": ["a", "b"], "value": [2, 3]}),
+                    catalog_uri=self.catalog_uri,
+                    partition_by=["day"],
+                )
+
+    def _intent_count(self) -> int:
+        with sqlite3.connect(self.catalog_path) as conn:
+            return conn.execute("SELECT COUNT(*) FROM write_intents").fetchone()[0]
+
+    def test_committed_writes_clear_their_intent(self) -> None:
+        self.assertEqual(self._intent_count(), 0)
+
+    def test_recover_tombstones_files_of_crashed_writes(self) -> None:
+        self._crashed_write()
+        self.assertEqual(self._intent_count(), 1)
+        with sqlite3.connect(self.catalog_path) as conn:
+            conn.execute("UPDATE write_intents SET created_at = '2000-01-01 00:00:00'")
+
+        result = recover("example", catalog_uri=self.catalog_uri)
+
+        self.assertEqual(result.intents_resolved, 1)
+        self.assertEqual(len(result.tombstoned_files), 2)
+        self.assertEqual(result.dataset_ref.catalog_uri, self.catalog_uri)
+        self.assertIsNotNone(result.dataset_ref.dataset_id)
+        self.assertEqual(self._intent_count(), 0)
+        with sqlite3.connect(self.catalog_path) as conn:
+            tombstones = conn.execute(
+                "SELECT COUNT(*) FROM files WHERE is_tombstoned = 1"
+            ).fetchone()[0]
+        self.assertEqual(tombstones, 2)
+        self.assertEqual(
+            read_dataset("example", catalog_uri=self.catalog_uri).to_pydict(),
+            {"value": [1], "day": ["a"]},
+        )
+
+        swept = vacuum("example", catalog_uri=self.catalog_uri, retention=timedelta(0))
+        self.assertEqual(sorted(swept.deleted_files), result.tombstoned_files)
+
+    def test_recent_intents_are_left_for_in_flight_writers(self) -> None:
+        self._crashed_write()
+
+        result = recover("example", catalog_uri=self.catalog_uri, dry_run=True)
+        self.assertEqual(result.intents_resolved, 0)
+
+        result = recover("example", catalog_uri=self.catalog_uri, min_age=timedelta(hours=-1))
+        self.assertEqual(result.intents_resolved, 1)
+
+
+@unittest.skipIf(catalog_module.duckdb is None, "duckdb not installed")
+class NonUtcDuckDBTests(unittest.TestCase):
+    """DuckDB catalogs opened on a host west of UTC."""
+
+    def setUp(self) -> None:
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.base_uri = os.path.join(self.temp_dir.name, "dataset")
+        self.catalog_uri = f"duckdb://{os.path.join(self.temp_dir.name, 'catalog.duckdb')}"
+        connect = catalog_module.duckdb.connect
+
+        def connect_in_new_york(*args: Any, **kwargs: Any) -> Any:
+            # DuckDB takes its session time zone from the host's ``TZ``.
+            connection = connect(*args, **kwargs)
+            connection.execute("SET TimeZone = 'America/New_York'")
+            return connection
+
+        patcher = mock.patch.object(catalog_module.duckdb, "connect", connect_in_new_york)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        write_dataset(
+            "example",
+            pa.table({"value": [1]}),
+            catalog_uri=self.catalog_uri,
+            base_uri=self.base_uri,
+        )
+
+    def tearDown(self) -> None:
+        self.temp_dir.cleanup()
+
+    def test_recover_leaves_recent_intents_alone(self) -> None:
+        with mock.patch.object(
+            SqlCatalog, "record_write_with_metadata", side_effect=RuntimeError("crash")
+        ):
+            with self.assertRaises(RuntimeError):
+                write_dataset("example", pa.table({"value": [2]}), catalog_uri=self.catalog_uri)
+
+        result = recover("example", catalog_uri=self.catalog_uri, dry_run=True)
+
+        self.assertEqual(result.intents_resolved, 0)
+
+    def test_older_than_keeps_recent_versions(self) -> None:
+        write_dataset("example", pa.table({"value": [2]}), catalog_uri=self.catalog_uri)
+
+        result = expire_snapshots(
+            "example",
+            catalog_uri=self.catalog_uri,
+            older_than=datetime.now(timezone.utc) - timedelta(minutes=1),
+        )
+
+        self.assertIsNone(result.expired_through)
+        self.assertEqual(
+            read_dataset("example", catalog_uri=self.catalog_uri, version=1).to_pydict(),
+            {"value": [1]},
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
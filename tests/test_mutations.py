@@ -0,0 +1,239 @@
+from __future__ import annotations
+
+import os
+import pathlib
+import sqlite3
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+import pyarrow as pa
+import pyarrow.dataset as ds
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1] / "src"))
+
+from data_lagoon.dataset import (  # noqa: E402
+    DatasetError,
+    ParquetWriteProfile,
+    head,
+    list_versions,
+    read_changes,
+    read_dataset,
+    write_dataset,
+)
+from data_lagoon.maintenance import compact_dataset  # noqa: E402
+from data_lagoon import mutations  # noqa: E402
+from data_lagoon.mutations import delete_rows, merge_dataset, update_rows  # noqa: E402
+
+
+class DeletionVectorTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.base_uri = os.path.join(self.temp_dir.name, "dataset")
+        self.catalog_path = os.path.join(self.temp_dir.name, "catalog.db")
+        self.catalog_uri = f"sqlite:///{self.catalog_path}"
+        self.original = write_dataset(
+            "example",
+            pa.table({"day": ["a"] * 5 + ["b"] * 5, "value": list(range(10))}),
+            catalog_uri=self.catalog_uri,
+            base_uri=self.base_uri,
+            partition_by=["day"],
+        )
+
+    def tearDown(self) -> None:
+        self.temp_dir.cleanup()
+
+    def _values(self, **kwargs) -> list[int]:
+        table = read_dataset("example", catalog_uri=self.catalog_uri, **kwargs)
+        return sorted(table.column("value").to_pylist())
+
+    def test_delete_rows_masks_rows_without_rewriting_files(self) -> None:
+        result = delete_rows(
+            "example", [("value", ">=", 3), ("value", "<", 6)], catalog_uri=self.catalog_uri
+        )
+
+        self.assertEqual(result.version, 2)
+        self.assertEqual(result.dataset_ref.catalog_uri, self.catalog_uri)
+        self.assertIsNotNone(result.dataset_ref.dataset_id)
+        self.assertEqual(result.rows_affected, 3)
+        self.assertEqual(result.files_affected, 2)
+        self.assertEqual(list(result.files_added), [])
+        self.assertEqual(self._values(), [0, 1, 2, 6, 7, 8, 9])
+        self.assertEqual(self._values(predicates=[("day", "==", "b")]), [6, 7, 8, 9])
+        self.assertEqual(self._values(version=1), list(range(10)))
+        self.assertEqual(head("example", 9, catalog_uri=self.catalog_uri).num_rows, 7)
+        self.assertEqual(list_versions("example", catalog_uri=self.catalog_uri)[-1].row_count, 7)
+        with sqlite3.connect(self.catalog_path) as conn:
+            rows = conn.execute(
+                "SELECT DISTINCT file_path FROM files WHERE version = 2"
+            ).fetchall()
+        self.assertEqual(sorted(path for (path,) in rows), sorted(self.original.files))
+
+    def test_repeated_deletes_accumulate(self) -> None:
+        delete_rows("example", [("value", "==", 1)], catalog_uri=self.catalog_uri)
+        result = delete_rows("example", [("value", "<=", 2)], catalog_uri=self.catalog_uri)
+
+        self.assertEqual(result.rows_affected, 2)
+        self.assertEqual(self._values(), [3, 4, 5, 6, 7, 8, 9])
+
+    def test_delete_without_matches_is_a_no_op(self) -> None:
+        result = delete_rows("example", [("value", ">", 100)], catalog_uri=self.catalog_uri)
+
+        self.assertEqual(result.version, 1)
+        self.assertEqual(result.rows_affected, 0)
+        with self.assertRaises(DatasetError):
+            delete_rows("example", [], catalog_uri=self.catalog_uri)
+
+    def test_update_rows_rewrites_only_matching_rows(self) -> None:
+        result = update_rows(
+            "example", [("value", ">=", 8)], {"value": 100}, catalog_uri=self.catalog_uri
+        )
+
+        self.assertEqual(result.rows_affected, 2)
+        self.assertEqual(len(result.files_added), 1)
+        self.assertIn("day=b", result.files_added[0])
+        self.assertEqual(self._values(), [0, 1, 2, 3, 4, 5, 6, 7, 100, 100])
+        self.assertEqual(
+            self._values(predicates=[("day", "==", "b")]), [5, 6, 7, 100, 100]
+        )
+        with self.assertRaises(DatasetError):
+            update_rows("example", [("value", "==", 1)], {"missing": 1}, catalog_uri=self.catalog_uri)
+
+    def test_only_row_groups_with_deletions_are_materialized(self) -> None:
+        write_dataset(
+            "grouped",
+            pa.table({"value": list(range(10))}),
+            catalog_uri=self.catalog_uri,
+            base_uri=os.path.join(self.temp_dir.name, "grouped"),
+            write_profile=ParquetWriteProfile(max_rows_per_group=2),
+        )
+        # Row group 1 loses one row, row group 3 both of its rows.
+        delete_rows("grouped", [("value", "==", 3)], catalog_uri=self.catalog_uri)
+        delete_rows(
+            "grouped", [("value", ">=", 6), ("value", "<=", 7)], catalog_uri=self.catalog_uri
+        )
+
+        dataset = read_dataset("grouped", catalog_uri=self.catalog_uri, as_dataset=True)
+        lazy, in_memory = dataset.children
+        self.assertIsInstance(lazy, ds.FileSystemDataset)
+        self.assertEqual(
+            [group.id for fragment in lazy.get_fragments() for group in fragment.row_groups],
+            [0, 2, 4],
+        )
+        self.assertEqual(in_memory.to_table().column("value").to_pylist(), [2])
+        self.assertEqual(
+            sorted(dataset.to_table(columns=["value"]).column("value").to_pylist()),
+            [0, 1, 2, 4, 5, 8, 9],
+        )
+        filtered = read_dataset(
+            "grouped", catalog_uri=self.catalog_uri, predicates=[("value", ">=", 2)]
+        )
+        self.assertEqual(sorted(filtered.column("value").to_pylist()), [2, 4, 5, 8, 9])
+
+    def test_compaction_folds_deletion_vectors(self) -> None:
+        delete_rows("example", [("value", "<", 2)], catalog_uri=self.catalog_uri)
+
+        result = compact_dataset("example", catalog_uri=self.catalog_uri)
+
+        self.assertEqual(len(result.files_removed), 1)
+        self.assertEqual(self._values(), list(range(2, 10)))
+        with sqlite3.connect(self.catalog_path) as conn:
+            vectors = conn.execute(
+                """
+                SELECT COUNT(*) FROM deletion_vectors
+                JOIN files ON files.id = deletion_vectors.file_id
+                WHERE files.version = ?
+                """,
+                (result.version,),
+            ).fetchone()[0]
+        self.assertEqual(vectors, 0)
+
+    def test_read_changes_reports_masked_rows(self) -> None:
+        delete_rows("example", [("value", "==", 1)], catalog_uri=self.catalog_uri)
+        update_rows("example", [("value", "==", 7)], {"value": 70}, catalog_uri=self.catalog_uri)
+        compact_dataset("example", catalog_uri=self.catalog_uri)
+
+        table = read_changes("example", 1, catalog_uri=self.catalog_uri)
+        columns = ("_commit_version", "_change_type", "value")
+        rows = zip(*(table.column(name).to_pylist() for name in columns))
+        self.assertEqual(
+            sorted(rows), [(2, "delete", 1), (3, "delete", 7), (3, "insert", 70)]
+        )
+
+
+class MergeTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.base_uri = os.path.join(self.temp_dir.name, "dataset")
+        self.catalog_uri = f"sqlite:///{os.path.join(self.temp_dir.name, 'catalog.db')}"
+        write_dataset(
+            "example",
+            pa.table({"id": list(range(10)), "day": ["a"] * 5 + ["b"] * 5, "value": [0] * 10}),
+            catalog_uri=self.catalog_uri,
+            base_uri=self.base_uri,
+            partition_by=["day"],
+        )
+
+    def tearDown(self) -> None:
+        self.temp_dir.cleanup()
+
+    def _rows(self) -> list[tuple]:
+        table = read_dataset("example", catalog_uri=self.catalog_uri)
+        return sorted(zip(*(table.column(name).to_pylist() for name in ("id", "value"))))
+
+    def test_merge_upserts_rows_and_reads_only_overlapping_files(self) -> None:
+        match_rows = mock.Mock(wraps=mutations._match_rows)
+        with mock.patch.object(mutations, "_match_rows", match_rows):
+            result = merge_dataset(
+                "example",
+                pa.table({"id": [6, 7, 42], "day": ["b", "b", "b"], "value": [1, 1, 1]}),
+                on=["id"],
+                catalog_uri=self.catalog_uri,
+            )
+
+        self.assertEqual(result.dataset_ref.catalog_uri, self.catalog_uri)
+        self.assertIsNotNone(result.dataset_ref.dataset_id)
+        self.assertEqual(result.rows_affected, 2)
+        self.assertEqual(result.rows_written, 3)
+        self.assertEqual(result.files_affected, 1)
+        self.assertEqual(match_rows.call_count, 1)
+        self.assertIn("day=b", match_rows.call_args.args[1]["file_path"])
+        self.assertEqual(
+            self._rows(),
+            [(0, 0), (1, 0), (2, 0), (3, 0), (4, 0), (5, 0), (6, 1), (7, 1), (8, 0), (9, 0),
+             (42, 1)],
+        )
+
+    def test_merge_matches_on_partition_keys(self) -> None:
+        merge_dataset(
+            "example",
+            pa.table({"id": [5, 5], "day": ["a", "b"], "value": [2, 3]}),
+            on=["id", "day"],
+            catalog_uri=self.catalog_uri,
+        )
+
+        table = read_dataset("example", catalog_uri=self.catalog_uri)
+        rows = sorted(zip(*(table.column(n).to_pylist() for n in ("id", "day", "value"))))
+        self.assertEqual(
+            rows,
+            [(0, "a", 0), (1, "a", 0), (2, "a", 0), (3, "a", 0), (4, "a", 0),
+             (5, "a", 2), (5, "b", 3), (6, "b", 0), (7, "b", 0), (8, "b", 0), (9, "b", 0)],
+        )
+
+    def test_merge_into_new_dataset_and_missing_keys(self) -> None:
+        result = merge_dataset(
+            "fresh",
+            pa.table({"id": [1, 2]}),
+            on=["id"],
+            catalog_uri=self.catalog_uri,
+            base_uri=os.path.join(self.temp_dir.name, "fresh"),
+        )
+
+        self.assertEqual((result.version, result.rows_affected, result.rows_written), (1, 0, 2))
+        with self.assertRaises(DatasetError):
+            merge_dataset("fresh", pa.table({"id": [3]}), on=["key"], catalog_uri=self.catalog_uri)
+
+
+if __name__ == "__main__":
+    unittest.main()